@@ -0,0 +1,231 @@
+"""
+Admission control for write bursts.
+
+When an event opens its call or its registration, a lot of writes for that
+event arrive at the same moment. Each ``AdmissionQueue`` gives every event
+a bounded FIFO of pending writes, drained by one writer thread per queue:
+
+* a request enqueues its write and waits for the result; the writer thread
+  takes up to ``batch_size`` items of one event in arrival order, then moves
+  on to the next event with pending writes (fair ordering, no lock convoy on
+  SQLite);
+* registrations are written ``batch_size`` at a time in one transaction
+  with one ``bulk_create`` (group commit); submissions, which carry files
+  and index updates, are written one per transaction but still through the
+  queue;
+* when ``ADMISSION_QUEUE_LIMIT`` writes are already pending for the event,
+  the request is refused with ``429`` and a ``Retry-After`` derived from the
+  recent batch times.
+
+The writer thread has its own database connection, so it cannot see rows a
+caller has not committed yet: a write submitted inside a transaction is
+written right away in that transaction instead of being queued. Queues live
+in the process, so limits apply per worker process. Depth and wait-time
+metrics are served by ``admission/stats/``.
+"""
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from rest_framework import serializers
+from rest_framework.exceptions import Throttled
+
+from .cache import invalidate_shared, invalidate_users
+from .models import Event, Registration
+from .stats import registrations_added
+
+WAIT_SAMPLES = 1000
+
+
+class Saturated(Throttled):
+    default_detail = 'Too many pending requests for this event, please retry shortly.'
+
+
+class AdmissionQueue:
+
+    def __init__(self, name, write_batch, batch_size=None):
+        self.name = name
+        self.write_batch = write_batch
+        self._batch_size = batch_size
+        self.condition = threading.Condition()
+        #event id -> deque of (item, future); the oldest lane is drained first
+        self.lanes = {}
+        self.writer = None
+        self.reset_stats()
+
+    @property
+    def batch_size(self):
+        return self._batch_size or getattr(settings, 'ADMISSION_BATCH_SIZE', 50)
+
+    @property
+    def queue_limit(self):
+        return getattr(settings, 'ADMISSION_QUEUE_LIMIT', 200)
+
+    def reset_stats(self):
+        self.admitted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.written = 0
+        self.max_depth = 0
+        self.batch_seconds = deque(maxlen=100)
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+    def retry_after(self, depth):
+        average = sum(self.batch_seconds) / len(self.batch_seconds) if self.batch_seconds else 0.1
+        return max(1, math.ceil(depth / self.batch_size * average))
+
+    def submit(self, event_id, item):
+        """Queue ``item`` for ``event_id`` and block until it is written; returns the writer's result."""
+        future = Future()
+        enqueued = time.monotonic()
+        inline = connection.in_atomic_block
+        with self.condition:
+            pending = self.lanes.get(event_id, ())
+            if len(pending) >= self.queue_limit:
+                self.rejected += 1
+                raise Saturated(wait=self.retry_after(len(pending)))
+            self.admitted += 1
+            self.max_depth = max(self.max_depth, len(pending) + 1)
+            if not inline:
+                self.lanes.setdefault(event_id, deque()).append((item, future))
+                self.start_writer()
+                self.condition.notify_all()
+        if inline:
+            self.run_batch(event_id, [(item, future)])
+
+        try:
+            return future.result()
+        finally:
+            with self.condition:
+                self.waits.append(time.monotonic() - enqueued)
+
+    def start_writer(self):
+        # called with the condition held
+        if self.writer is None or not self.writer.is_alive():
+            self.writer = threading.Thread(target=self.write_forever, name=f'admission-{self.name}', daemon=True)
+            self.writer.start()
+
+    def write_forever(self):
+        while True:
+            with self.condition:
+                while not self.lanes:
+                    self.condition.wait()
+                event_id = next(iter(self.lanes))
+                pending = self.lanes.pop(event_id)
+                batch = [pending.popleft() for _ in range(min(self.batch_size, len(pending)))]
+                if pending:
+                    # back of the line, behind the other events
+                    self.lanes[event_id] = pending
+            close_old_connections()
+            self.run_batch(event_id, batch)
+
+    def run_batch(self, event_id, batch):
+        started = time.monotonic()
+        try:
+            results = self.write_batch(event_id, [item for item, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        with self.condition:
+            self.batches += 1
+            self.written += len(batch)
+            self.batch_seconds.append(time.monotonic() - started)
+
+    def stats(self):
+        with self.condition:
+            waits = sorted(self.waits)
+            depths = {event_id: len(pending) for event_id, pending in self.lanes.items() if pending}
+            return {
+                'queue_depth': sum(depths.values()),
+                'queue_depth_by_event': depths,
+                'max_queue_depth': self.max_depth,
+                'queue_limit': self.queue_limit,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'batches': self.batches,
+                'written': self.written,
+                'average_batch_size': round(self.written / self.batches, 2) if self.batches else 0,
+                'wait_ms': {
+                    'average': round(sum(waits) / len(waits) * 1000, 2) if waits else 0,
+                    'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0,
+                    'max': round(waits[-1] * 1000, 2) if waits else 0,
+                },
+            }
+
+
+def write_registrations(event_id, items):
+    """
+    ``items`` are ``(user, validated_data)``; returns a Registration or a
+    ValidationError per item, in order, after one transaction.
+    """
+    try:
+        return write_registration_batch(event_id, items)
+    except IntegrityError:
+        # raced with a registration written by another process: settle item by item
+        return write_one_by_one(event_id, [
+            lambda item=item: write_registration_batch(event_id, [item])[0] for item in items
+        ])
+
+
+def write_registration_batch(event_id, items):
+    results = [None] * len(items)
+    seen = set()
+    new = []
+    with transaction.atomic():
+        existing = set(
+            Registration.objects.filter(event_id=event_id, user_id__in=[user.id for user, _ in items])
+            .values_list('user_id', flat=True)
+        )
+        for index, (user, data) in enumerate(items):
+            if user.id in existing or user.id in seen:
+                results[index] = serializers.ValidationError({'detail': 'You are already registered to this event.'})
+                continue
+            seen.add(user.id)
+            new.append((index, Registration(event_id=event_id, user=user, **data)))
+        if new:
+            Registration.objects.bulk_create([registration for _, registration in new])
+            # bulk_create skips the post_save receivers
+            registrations_added(event_id, [registration for _, registration in new])
+            organizer_id = Event.objects.filter(pk=event_id).values_list('organizer_id', flat=True).first()
+            user_ids = [registration.user_id for _, registration in new] + [organizer_id]
+
+            def invalidate():
+                invalidate_users(user_ids)
+                invalidate_shared()
+            transaction.on_commit(invalidate)
+    for index, registration in new:
+        results[index] = registration
+    return results
+
+
+def write_one_by_one(event_id, items):
+    """``items`` are callables, each run in its own transaction."""
+    results = []
+    for write in items:
+        try:
+            with transaction.atomic():
+                result = write()
+        except IntegrityError:
+            result = serializers.ValidationError({'detail': 'This record already exists.'})
+        except serializers.ValidationError as exc:
+            result = exc
+        results.append(result)
+    return results
+
+
+registration_queue = AdmissionQueue('registrations', write_registrations)
+submission_queue = AdmissionQueue('submissions', write_one_by_one, batch_size=1)
+
+QUEUES = [registration_queue, submission_queue]
+
+
+def admission_stats():
+    return {queue.name: queue.stats() for queue in QUEUES}
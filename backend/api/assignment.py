@@ -0,0 +1,332 @@
+"""
+Automatic reviewer assignment.
+
+Submissions (title, abstract, keywords) and reviewers (research domain, bio)
+are turned into TF-IDF bag-of-words vectors over the reviewer vocabulary --
+terms no reviewer uses cannot contribute to an affinity, so they are dropped
+up front. The vectors are kept as sparse entries and the submission x
+reviewer cosine affinity matrix is computed in chunks over the shared terms,
+so memory does not grow with the vocabulary. ``solve`` assigns ``k``
+reviewers per submission without exceeding ``max_load`` per reviewer.
+"""
+import re
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count
+
+from .cache import invalidate_users
+from .models import Notification, Submission, User
+from .notifications import send_notifications
+from .stats import adjust_event_statistics
+
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}', re.UNICODE)
+
+STOP_WORDS = frozenset("""
+about above after again against all and any are because been before being below between both but can
+did does doing down during each few for from further had has have having her here hers him his how
+into its itself just more most nor not now off once only other our ours out over own same she should
+some such than that the their theirs them then there these they this those through too under until
+very was were what when where which while who whom why will with you your study results using used
+based new des les une pour dans sur par avec est sont aux ces
+""".split())
+
+# keywords are the author's own summary of the topic, so they count more
+KEYWORD_WEIGHT = 3
+# largest dense block of submission term weights affinity_matrix() builds at once
+CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').casefold()) if token not in STOP_WORDS]
+
+
+def submission_document(title, abstract, keywords):
+    return tokenize(title) + tokenize(abstract) + tokenize(keywords) * KEYWORD_WEIGHT
+
+
+def reviewer_document(research_domain, bio):
+    return tokenize(research_domain) * KEYWORD_WEIGHT + tokenize(bio)
+
+
+def _term_entries(documents, vocabulary):
+    """``(rows, columns, counts)`` of the in-vocabulary terms of ``documents``, ordered by row."""
+    width = len(vocabulary)
+    keys = [
+        row * width + vocabulary[token]
+        for row, tokens in enumerate(documents)
+        for token in tokens if token in vocabulary
+    ]
+    keys, counts = np.unique(np.asarray(keys, dtype=np.int64), return_counts=True)
+    return keys // width, keys % width, counts
+
+
+def _weights(rows, columns, counts, idf, n_rows):
+    # sublinear tf-idf of each entry, scaled so every row has unit length
+    weights = (np.log1p(counts) * idf[columns]).astype(np.float32)
+    norms = np.sqrt(np.bincount(rows, weights=weights.astype(np.float64) ** 2, minlength=n_rows))
+    norms[norms == 0] = 1.0
+    return weights / norms[rows].astype(np.float32)
+
+
+def _dense(rows, columns, weights, shape):
+    matrix = np.zeros(shape, dtype=np.float32)
+    matrix[rows, columns] = weights
+    return matrix
+
+
+def affinity_matrix(submission_docs, reviewer_docs):
+    """
+    Cosine similarity of TF-IDF vectors, shape (len(submission_docs), len(reviewer_docs)).
+
+    The term counts stay sparse; only the terms both sides use are laid out
+    densely, one chunk of at most ``CHUNK_BYTES`` of submissions at a time.
+    """
+    affinity = np.zeros((len(submission_docs), len(reviewer_docs)), dtype=np.float32)
+    vocabulary = {}
+    for tokens in reviewer_docs:
+        for token in tokens:
+            vocabulary.setdefault(token, len(vocabulary))
+    if not vocabulary:
+        return affinity
+
+    submission_rows, submission_columns, submission_counts = _term_entries(submission_docs, vocabulary)
+    reviewer_rows, reviewer_columns, reviewer_counts = _term_entries(reviewer_docs, vocabulary)
+
+    # smoothed idf over both corpora
+    submission_frequency = np.bincount(submission_columns, minlength=len(vocabulary))
+    document_frequency = submission_frequency + np.bincount(reviewer_columns, minlength=len(vocabulary))
+    n_documents = len(submission_docs) + len(reviewer_docs)
+    idf = np.log((1 + n_documents) / (1 + document_frequency)) + 1
+
+    submission_weights = _weights(submission_rows, submission_columns, submission_counts, idf, len(submission_docs))
+    reviewer_weights = _weights(reviewer_rows, reviewer_columns, reviewer_counts, idf, len(reviewer_docs))
+
+    # a term only one side uses adds nothing to a dot product (it is still in the norms above)
+    shared = np.flatnonzero((submission_frequency > 0) & (document_frequency > submission_frequency))
+    if not shared.size:
+        return affinity
+    position = np.full(len(vocabulary), -1, dtype=np.int64)
+    position[shared] = np.arange(shared.size)
+    keep = position[reviewer_columns] >= 0
+    reviewers = _dense(
+        reviewer_rows[keep], position[reviewer_columns[keep]], reviewer_weights[keep], (len(reviewer_docs), shared.size)
+    )
+
+    keep = position[submission_columns] >= 0
+    rows, columns, weights = submission_rows[keep], position[submission_columns[keep]], submission_weights[keep]
+    step = max(1, CHUNK_BYTES // (4 * shared.size))
+    for first in range(0, len(submission_docs), step):
+        last = min(first + step, len(submission_docs))
+        low, high = np.searchsorted(rows, [first, last])
+        chunk = _dense(rows[low:high] - first, columns[low:high], weights[low:high], (last - first, shared.size))
+        affinity[first:last] = chunk @ reviewers.T
+    return affinity
+
+
+def solve(affinity, k, max_load, assigned=None, blocked=None, load=None):
+    """
+    Balanced assignment of ``k`` reviewers per submission.
+
+    ``assigned`` (bool, same shape as ``affinity``) holds existing assignments,
+    which count towards both ``k`` and the reviewers' load; ``blocked`` marks
+    conflicts of interest; ``load`` is the reviewers' current load from other
+    submissions. Every round gives each unfinished submission one more
+    reviewer: submissions propose to their best remaining reviewer, and a
+    reviewer with less capacity than proposals keeps the highest-affinity ones
+    (the rest propose again). Returns the boolean matrix of *new* assignments.
+    """
+    n_submissions, n_reviewers = affinity.shape
+    assigned = np.zeros(affinity.shape, dtype=bool) if assigned is None else assigned.copy()
+    blocked = np.zeros(affinity.shape, dtype=bool) if blocked is None else blocked
+    load = np.zeros(n_reviewers, dtype=np.int64) if load is None else np.asarray(load, dtype=np.int64)
+    capacity = np.maximum(max_load - load - assigned.sum(axis=0), 0)
+    new = np.zeros(affinity.shape, dtype=bool)
+
+    for _ in range(k):
+        pending = np.flatnonzero(assigned.sum(axis=1) < k)
+        while pending.size:
+            scores = affinity[pending].astype(np.float64)
+            scores[assigned[pending] | blocked[pending]] = -np.inf
+            scores[:, capacity == 0] = -np.inf
+            choice = scores.argmax(axis=1)
+            best = scores[np.arange(pending.size), choice]
+
+            possible = np.isfinite(best)
+            pending, choice, best = pending[possible], choice[possible], best[possible]
+            if not pending.size:
+                break
+
+            # group proposals by reviewer, best first, and keep as many as capacity allows
+            order = np.lexsort((-best, choice))
+            choice_sorted = choice[order]
+            group_start = np.searchsorted(choice_sorted, choice_sorted, side='left')
+            rank = np.arange(order.size) - group_start
+            accepted = order[rank < capacity[choice_sorted]]
+
+            papers, reviewers = pending[accepted], choice[accepted]
+            assigned[papers, reviewers] = True
+            new[papers, reviewers] = True
+            np.subtract.at(capacity, reviewers, 1)
+
+            pending = np.setdiff1d(pending, papers, assume_unique=True)
+    return new
+
+
+def bulk_assign(event, pairs, notify=True):
+    """
+    Write (submission_id, reviewer_id) pairs back through ``assigned_reviewers``.
+
+    Through rows are inserted in one statement (existing pairs are ignored),
+    submissions that gained a reviewer move to ``under_review`` in one
+    UPDATE, and one ``review_assigned`` notification per new pair is inserted
+    in one batch. Returns the pairs that were actually new.
+    """
+    Link = Submission.assigned_reviewers.through
+    pairs = set(pairs)
+    if not pairs:
+        return []
+
+    with transaction.atomic():
+        submission_ids = {submission_id for submission_id, _ in pairs}
+        existing = set(
+            Link.objects.filter(submission_id__in=submission_ids).values_list('submission_id', 'user_id')
+        )
+        new_pairs = sorted(pairs - existing)
+        Link.objects.bulk_create(
+            [Link(submission_id=submission_id, user_id=reviewer_id) for submission_id, reviewer_id in new_pairs],
+            ignore_conflicts=True,
+        )
+        touched = {submission_id for submission_id, _ in new_pairs}
+        # same rule as assign_reviewers: a submission with reviewers is under review
+        moved = Submission.objects.filter(id__in=touched).exclude(status='under_review')
+        by_status = dict(moved.order_by().values_list('status').annotate(n=Count('id')))
+        moved.update(status='under_review')
+
+        if notify and new_pairs:
+            titles = dict(Submission.objects.filter(id__in=touched).values_list('id', 'title'))
+            send_notifications(
+                Notification(
+                    user_id=reviewer_id,
+                    notification_type='review_assigned',
+                    title='New Review Assigned',
+                    message=f'You have been assigned to review: {titles[submission_id]}',
+                    related_event=event,
+                )
+                for submission_id, reviewer_id in new_pairs
+            )
+
+        # bulk writes bypass the model signals
+        if by_status:
+            by_status = {status: -n for status, n in by_status.items()}
+            by_status['under_review'] = -sum(by_status.values())
+            adjust_event_statistics(event.id, {'submissions_by_status': by_status})
+        reviewer_ids = {reviewer_id for _, reviewer_id in new_pairs}
+        author_ids = set(Submission.objects.filter(id__in=touched).values_list('author_id', flat=True))
+        transaction.on_commit(lambda: invalidate_users(reviewer_ids | author_ids))
+    return new_pairs
+
+
+def parse_assignment_mapping(event, mapping):
+    """
+    Validate a {submission_id: [reviewer_id, ...]} mapping for ``event`` in two
+    queries. Returns ``(pairs, errors)``; ``errors`` is empty when every
+    submission belongs to the event and every id is a reviewer.
+    """
+    if not isinstance(mapping, dict) or not mapping:
+        return [], {'assignments': 'Expected a non-empty object mapping submission ids to lists of reviewer ids.'}
+
+    requested, malformed = {}, []
+    for submission_id, reviewer_ids in mapping.items():
+        try:
+            if isinstance(reviewer_ids, (str, bytes)) or not reviewer_ids:
+                raise TypeError
+            requested[int(submission_id)] = {int(reviewer_id) for reviewer_id in reviewer_ids}
+        except (TypeError, ValueError):
+            malformed.append(submission_id)
+    if malformed:
+        return [], {'malformed_submission_ids': malformed}
+
+    all_reviewer_ids = set().union(*requested.values())
+    found_submissions = set(
+        Submission.objects.filter(event=event, id__in=requested).values_list('id', flat=True)
+    )
+    found_reviewers = set(
+        User.objects.filter(role='reviewer', id__in=all_reviewer_ids).values_list('id', flat=True)
+    )
+    errors = {}
+    if requested.keys() - found_submissions:
+        errors['unknown_submission_ids'] = sorted(requested.keys() - found_submissions)
+    if all_reviewer_ids - found_reviewers:
+        errors['invalid_reviewer_ids'] = sorted(all_reviewer_ids - found_reviewers)
+    if errors:
+        return [], errors
+    return [(submission_id, reviewer_id) for submission_id, reviewer_ids in requested.items() for reviewer_id in reviewer_ids], {}
+
+
+def candidate_reviewers(event):
+    #the scientific committee when there is one, every reviewer otherwise
+    reviewers = User.objects.filter(role='reviewer')
+    if event.scientific_committee.exists():
+        reviewers = reviewers.filter(committee_memberships=event)
+    return reviewers
+
+
+def auto_assign(event, k=3, max_load=10, avoid_same_institution=True, dry_run=False):
+    """Assign reviewers to every open submission of ``event``; returns a summary dict."""
+    submissions = list(
+        Submission.objects.filter(event=event, status__in=['pending', 'under_review'])
+        .order_by('id')
+        .values('id', 'title', 'abstract', 'keywords', 'author_id', 'author__institution')
+    )
+    reviewers = list(
+        candidate_reviewers(event)
+        .annotate(load=Count('assigned_submissions'))
+        .order_by('id')
+        .values('id', 'research_domain', 'bio', 'institution', 'load')
+    )
+    if not submissions or not reviewers:
+        return {'assigned': [], 'unfilled_submission_ids': [s['id'] for s in submissions]}
+
+    submission_index = {s['id']: i for i, s in enumerate(submissions)}
+    reviewer_index = {r['id']: j for j, r in enumerate(reviewers)}
+
+    affinity = affinity_matrix(
+        [submission_document(s['title'], s['abstract'], s['keywords']) for s in submissions],
+        [reviewer_document(r['research_domain'], r['bio']) for r in reviewers],
+    )
+
+    assigned = np.zeros(affinity.shape, dtype=bool)
+    Link = Submission.assigned_reviewers.through
+    for submission_id, reviewer_id in Link.objects.filter(
+        submission_id__in=submission_index, user_id__in=reviewer_index
+    ).values_list('submission_id', 'user_id'):
+        assigned[submission_index[submission_id], reviewer_index[reviewer_id]] = True
+
+    # load on other events/submissions; this event's existing pairs are counted by solve()
+    load = np.array([r['load'] for r in reviewers], dtype=np.int64) - assigned.sum(axis=0)
+
+    reviewer_ids = np.array([r['id'] for r in reviewers])
+    blocked = np.array([s['author_id'] for s in submissions])[:, None] == reviewer_ids[None, :]
+    if avoid_same_institution:
+        # institutions as integer codes; blank institutions never match
+        codes = {}
+        reviewer_codes = np.array([codes.setdefault(r['institution'].casefold(), len(codes)) if r['institution'] else -1 for r in reviewers])
+        author_codes = np.array([codes.get(s['author__institution'].casefold(), -2) if s['author__institution'] else -2 for s in submissions])
+        blocked |= author_codes[:, None] == reviewer_codes[None, :]
+
+    new = solve(affinity, k, max_load, assigned=assigned, blocked=blocked, load=load)
+    rows, cols = np.nonzero(new)
+    pairs = [(submissions[i]['id'], reviewers[j]['id']) for i, j in zip(rows.tolist(), cols.tolist())]
+    if not dry_run:
+        pairs = bulk_assign(event, pairs)
+
+    filled = (assigned | new).sum(axis=1)
+    return {
+        'assigned': [
+            {'submission_id': submission_id, 'reviewer_id': reviewer_id,
+             'affinity': round(float(affinity[submission_index[submission_id], reviewer_index[reviewer_id]]), 4)}
+            for submission_id, reviewer_id in pairs
+        ],
+        'unfilled_submission_ids': [submissions[i]['id'] for i in np.flatnonzero(filled < k).tolist()],
+    }
@@ -0,0 +1,285 @@
+"""
+Endpoint benchmark.
+
+Every route of ``api/urls.py`` is called in-process, with no HTTP server:
+the views, serializers and database run exactly as in production. GET
+routes are called as the sample user who sees the most data (see
+``api/endpoints.py``). Routes without GET take their request body (and
+method, POST unless ``WRITE_METHODS`` says otherwise) from
+``WRITE_REQUESTS``; ``EXTRA_WRITES`` adds a POST run to GET routes that also
+create. Each write is rolled back, so every iteration writes the same thing,
+and uploads go to a scratch ``MEDIA_ROOT`` that is removed afterwards. The
+whole run happens in one transaction that is rolled back at the end, which
+leaves the database as it was.
+
+Every route must end up in the report: the ones that could not be called
+(no request body, no sample row, or no sample user gets a 2xx) are listed
+under ``missing``, and ``benchmark_api`` fails when there are any.
+
+For each route the report has the p50/p95/p99 latency, the queries per
+request and the sequential throughput. ``compare()`` lines up two reports,
+e.g. from two commits on the same seeded data.
+"""
+import asyncio
+import contextlib
+import datetime
+import math
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+import django
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .endpoints import Samples, call, representative_call, routes
+from .models import Event, Message, Notification, Question, Registration, Submission, SurveyQuestion, User
+from .seeding import PLACEHOLDER_PDF, SEED_PASSWORD
+
+
+def survey_answers(samples, user):
+    answers = []
+    for question in SurveyQuestion.objects.filter(survey_id=samples.survey_id).order_by('order', 'id'):
+        if question.question_type == 'rating':
+            answers.append({'question': question.id, 'response_rating': 4})
+        elif question.question_type == 'choice':
+            answers.append({'question': question.id, 'response_text': question.choices.split(',')[0]})
+        else:
+            answers.append({'question': question.id, 'response_text': 'Benchmark answer'})
+    return {'answers': answers}
+
+
+def spare_reviewer(samples):
+    reviewer = (
+        User.objects.filter(role='reviewer').exclude(assigned_submissions=samples.submission).order_by('id').first()
+    )
+    return reviewer.id
+
+
+def text_answer(samples, user):
+    question = SurveyQuestion.objects.filter(survey_id=samples.survey_id, question_type='text').order_by('id').first()
+    return {'survey': samples.survey_id, 'question': question.id, 'response_text': 'Benchmark answer'}
+
+
+def new_submission(samples, user):
+    return {
+        'event': samples.event.id, 'title': 'Benchmark submission', 'abstract': 'Benchmark abstract',
+        'keywords': 'benchmark', 'co_authors': 'A. Benali', 'submission_type': 'oral',
+        'abstract_file': SimpleUploadedFile('benchmark.pdf', PLACEHOLDER_PDF, content_type='application/pdf'),
+    }
+
+
+# route name -> request body for routes that have no GET
+WRITE_REQUESTS = {
+    'register': lambda samples, user: {
+        'username': 'benchmark', 'email': 'benchmark@example.com', 'password': SEED_PASSWORD,
+    },
+    'login': lambda samples, user: {'email': user.email, 'password': SEED_PASSWORD},
+    'token_refresh': lambda samples, user: {'refresh': str(RefreshToken.for_user(user))},
+    'assign_reviewers': lambda samples, user: {'reviewer_ids': [spare_reviewer(samples)]},
+    'bulk_assign_reviewers': lambda samples, user: {
+        'assignments': {str(samples.submission.id): [spare_reviewer(samples)]},
+    },
+    'auto_assign_reviewers': lambda samples, user: {},
+    'payment-status-update': lambda samples, user: {'payment_status': 'paid_online'},
+    'question_answer': lambda samples, user: {'answer': 'Benchmark answer'},
+    'survey_response': text_answer,
+    'render_certs': lambda samples, user: {},
+    'question_like': lambda samples, user: {},
+    'workshop_register': lambda samples, user: {},
+    'workshop_cancel': lambda samples, user: {},
+    'survey_submit': survey_answers,
+    'generate_certs': lambda samples, user: {},
+    'event_broadcast': lambda samples, user: {'title': 'Benchmark', 'message': 'Benchmark broadcast'},
+    'notification_read': lambda samples, user: {},
+    'notifications_read_all': lambda samples, user: {},
+    'conversation_read': lambda samples, user: {},
+}
+# routes of WRITE_REQUESTS that are not called with POST
+WRITE_METHODS = {
+    'payment-status-update': 'patch',
+}
+# GET routes that also get a POST run
+EXTRA_WRITES = {
+    'submissions': new_submission,
+    'registrations': lambda samples, user: {'registration_type': 'participant'},
+    'messages': lambda samples, user: {
+        'recipient': samples.event.organizer_id, 'subject': 'Benchmark', 'content': 'Benchmark message',
+    },
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def has_get(route):
+    # the live stream is an async function view: GET only
+    return asyncio.iscoroutinefunction(route.callback) or callable(getattr(route.view_class, 'get', None))
+
+
+def plan_requests(route_list):
+    """``[(route, method, body factory)]`` to run and ``{label: reason}`` for the routes that cannot be."""
+    planned, missing = [], {}
+    for route in route_list:
+        if has_get(route):
+            planned.append((route, 'get', None))
+            if route.name in EXTRA_WRITES:
+                planned.append((route, 'post', EXTRA_WRITES[route.name]))
+        elif route.name in WRITE_REQUESTS:
+            planned.append((route, WRITE_METHODS.get(route.name, 'post'), WRITE_REQUESTS[route.name]))
+        else:
+            missing[route.name] = 'no GET and no request body in WRITE_REQUESTS'
+    return planned, missing
+
+
+@contextlib.contextmanager
+def scratch_media(body):
+    """Send the files a request uploads to a temporary ``MEDIA_ROOT``; rolling back does not remove them."""
+    if not any(hasattr(value, 'read') for value in body.values()):
+        yield
+        return
+    directory = tempfile.mkdtemp()
+    try:
+        with override_settings(MEDIA_ROOT=directory):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def label_for(route, method):
+    return route.name if method == 'get' else f'{route.name} [{method.upper()}]'
+
+
+def choose_call(route, samples, method, body):
+    if body is None:
+        return representative_call(route, samples)
+    # the body may depend on the user, so try them one by one
+    kwargs = samples.kwargs_for(route)
+    if kwargs is None:
+        return None
+    url = samples.url_for(route, kwargs)
+    for user in samples.users():
+        with transaction.atomic():
+            data = body(samples, user)
+            with scratch_media(data):
+                result = call(route, url, kwargs, user, method=method, data=data)
+            transaction.set_rollback(True)
+        if 200 <= result.response.status_code < 300:
+            return result
+    return None
+
+
+def measure(chosen, method, body, samples, iterations, warmup):
+    latencies, queries = [], []
+    for index in range(warmup + iterations):
+        with transaction.atomic():
+            # built afresh: an uploaded file can only be read once
+            data = body(samples, chosen.user) if body else {}
+            with scratch_media(data):
+                started = time.perf_counter()
+                result = call(chosen.route, chosen.url, chosen.kwargs, chosen.user, method=method, data=data)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+        if index >= warmup:
+            latencies.append(elapsed)
+            queries.append(len(result.queries))
+    total = sum(latencies)
+    return {
+        'method': method.upper(),
+        'url': chosen.url,
+        'user_role': chosen.user.role,
+        'status': result.response.status_code,
+        'iterations': iterations,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(total / len(latencies) * 1000, 3),
+        'queries': round(statistics.median(queries), 1),
+        'queries_max': max(queries),
+        'throughput_rps': round(len(latencies) / total, 1) if total else None,
+    }, total
+
+
+def dataset_size():
+    return {
+        model._meta.label: model.objects.count()
+        for model in (User, Event, Submission, Registration, Question, Notification, Message)
+    }
+
+
+def run_benchmark(iterations=50, warmup=3, names=None, progress=None):
+    """Benchmark every route (or the ``names`` given); returns the report as a dict."""
+    route_list = [route for route in routes() if not names or route.name in names]
+    planned, missing = plan_requests(route_list)
+    results = {}
+    started = time.perf_counter()
+    busy = 0.0
+    with transaction.atomic():
+        samples = Samples()
+        for route, method, body in planned:
+            label = label_for(route, method)
+            try:
+                chosen = choose_call(route, samples, method, body)
+            except Exception as exc:
+                missing[label] = f'error: {exc.__class__.__name__}: {exc}'
+                continue
+            if chosen is None:
+                missing[label] = 'no sample row, or no sample user gets a 2xx'
+                continue
+            results[label], spent = measure(chosen, method, body, samples, iterations, warmup)
+            busy += spent
+            if progress:
+                progress(label, results[label])
+        size = dataset_size()
+        transaction.set_rollback(True)
+    requests = sum(result['iterations'] for result in results.values())
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'dataset': size,
+        },
+        'summary': {
+            'routes': len(results),
+            'requests': requests,
+            'throughput_rps': round(requests / busy, 1) if busy else None,
+            'wall_seconds': round(time.perf_counter() - started, 2),
+        },
+        'routes': results,
+        'missing': missing,
+    }
+
+
+def compare(baseline, current):
+    """``[(label, metric, before, after, change %)]`` for the routes in both reports."""
+    rows = []
+    for label, after in current['routes'].items():
+        before = baseline['routes'].get(label)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'queries'):
+            old, new = before[metric], after[metric]
+            change = round((new - old) / old * 100, 1) if old else None
+            rows.append((label, metric, old, new, change))
+    return rows
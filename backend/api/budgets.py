@@ -0,0 +1,76 @@
+"""
+Per-endpoint SQL query budgets.
+
+A budget is the most queries one GET of the endpoint may run, whatever the
+number of rows behind it, not counting authentication. Class-based views
+declare it as a class attribute::
+
+    class SessionListCreateView(generics.ListCreateAPIView):
+        query_budget = 2
+
+Function views are wrapped with ``@query_budget(n)`` above ``@api_view``.
+
+``QueryBudgetTests`` (api/tests.py) calls every GET route at two data
+sizes. It fails when a route runs more queries with more rows, which is a
+per-row lookup, or more queries than its budget. ``query_diff()`` shows
+which statements were added.
+"""
+import re
+from collections import Counter
+
+# page sizes, prefetch id lists and savepoint names change from call to call
+LIMITS = re.compile(r'\b(LIMIT|OFFSET) \d+')
+PLACEHOLDERS = re.compile(r'\(%s(?:, %s)+\)')
+SAVEPOINTS = re.compile(r'SAVEPOINT "\w+"')
+
+
+def query_budget(limit):
+    def decorate(view):
+        view.query_budget = limit
+        return view
+    return decorate
+
+
+def budget_for(callback):
+    """The budget declared for a URL callback (function or class-based view), or None."""
+    budget = getattr(callback, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(callback, 'view_class', None), 'query_budget', None)
+    return budget
+
+
+def shorten(sql):
+    # the column list hides what the statement is looking up: cut it at the outer FROM
+    if sql.startswith('SELECT '):
+        depth = 0
+        for index, char in enumerate(sql):
+            depth += {'(': 1, ')': -1}.get(char, 0)
+            if depth == 0 and sql.startswith(' FROM ', index):
+                if index > 60:
+                    sql = 'SELECT ...' + sql[index:]
+                break
+    sql = LIMITS.sub(r'\1 n', sql)
+    sql = PLACEHOLDERS.sub('(%s, ...)', sql)
+    sql = SAVEPOINTS.sub('SAVEPOINT', sql)
+    return ' '.join(sql.split())
+
+
+def query_summary(queries):
+    """One ``<times>x <sql>`` line per distinct statement of ``[(sql, params), ...]``."""
+    counts = Counter(shorten(sql) for sql, _ in queries)
+    return [f'{times:>4}x {sql}' for sql, times in counts.items()]
+
+
+def query_diff(before, after):
+    """
+    ``+n <sql>`` for the statements ``after`` runs more often than
+    ``before`` and ``-n <sql>`` for those it runs less often.
+    """
+    old = Counter(shorten(sql) for sql, _ in before)
+    new = Counter(shorten(sql) for sql, _ in after)
+    lines = []
+    for sql in new | old:
+        change = new[sql] - old[sql]
+        if change:
+            lines.append(f'{change:+4d} {sql}')
+    return lines
@@ -0,0 +1,82 @@
+"""
+Per-user dashboard cache.
+
+The dashboard payload is split in two entries: the upcoming events block,
+which is the same for everybody, and the per-user block keyed by user id and
+role. Entries live in the Django cache named by ``DASHBOARD_CACHE_ALIAS``, so
+the backend is picked in settings (local memory by default, file or database
+cache when several worker processes must share entries). ``api/signals.py``
+invalidates the entries of the users affected by each write.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import User
+
+SHARED_KEY = 'dashboard:upcoming_events'
+HITS_KEY = 'dashboard:stats:hits'
+MISSES_KEY = 'dashboard:stats:misses'
+
+
+def dashboard_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def dashboard_timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def user_key(user_id, role):
+    return f'dashboard:user:{user_id}:{role}'
+
+
+def _bump(key):
+    cache = dashboard_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def get_or_build(key, build):
+    cache = dashboard_cache()
+    value = cache.get(key)
+    if value is not None:
+        _bump(HITS_KEY)
+        return value
+    _bump(MISSES_KEY)
+    value = build()
+    cache.set(key, value, timeout=dashboard_timeout())
+    return value
+
+
+def invalidate_users(user_ids):
+    keys = [
+        user_key(user_id, role)
+        for user_id in set(user_ids) if user_id is not None
+        for role, _ in User.ROLE_CHOICES
+    ]
+    if keys:
+        dashboard_cache().delete_many(keys)
+
+
+def invalidate_shared():
+    dashboard_cache().delete(SHARED_KEY)
+
+
+def cache_stats():
+    cache = dashboard_cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total * 100, 2) if total else 0,
+    }
+
+
+def reset_cache_stats():
+    dashboard_cache().delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,49 @@
+"""
+Certificate generation.
+
+Creates the certificate records of an event: one per registration
+(participation, or presentation for speakers), one per scientific committee
+member and one for the organizer. The desired (user, certificate_type) set is
+computed in one UNION query and only the missing rows are inserted, relying
+on the (event, user, certificate_type) unique constraint.
+"""
+from django.db import transaction
+from django.db.models import Case, CharField, Value, When
+
+from .models import Certificate, Event, Registration
+
+
+def desired_certificates(event_id):
+    #(user_id, certificate_type) pairs the event should have, as one query
+    registrations = Registration.objects.filter(event_id=event_id).annotate(
+        cert_type=Case(
+            When(registration_type='speaker', then=Value('presentation')),
+            default=Value('participation'),
+            output_field=CharField(),
+        )
+    ).values_list('user_id', 'cert_type')
+    committee = Event.scientific_committee.through.objects.filter(event_id=event_id).annotate(
+        cert_type=Value('committee', output_field=CharField())
+    ).values_list('user_id', 'cert_type')
+    organizer = Event.objects.filter(pk=event_id).annotate(
+        cert_type=Value('organization', output_field=CharField())
+    ).values_list('organizer_id', 'cert_type')
+    return registrations.order_by().union(committee.order_by(), organizer.order_by())
+
+
+def create_certificate_records(event_id, batch_size=1000):
+    if not Event.objects.filter(pk=event_id).exists():
+        raise Event.DoesNotExist
+    certificates = Certificate.objects.filter(event_id=event_id)
+    with transaction.atomic():
+        before = certificates.count()
+        Certificate.objects.bulk_create(
+            [
+                Certificate(event_id=event_id, user_id=user_id, certificate_type=cert_type)
+                for user_id, cert_type in desired_certificates(event_id)
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        total = certificates.count()
+    return {'created': total - before, 'total_certificates': total}
@@ -0,0 +1,117 @@
+"""
+Conversation threads.
+
+A ``Conversation`` is keyed by the ordered participant pair plus an optional
+``related_event``. It is found or created when a message is about to be
+saved (``api/signals.py``), and the insert then refreshes its
+``last_message`` and ``last_activity``. Deleting the latest message points
+them back at the newest remaining one.
+
+Each participant has a ``ConversationParticipant`` row that holds that
+user's unread count and a copy of ``last_activity``. The inbox is therefore
+one index range scan on ``(user, -last_activity, -id)`` with no OR across
+sender/recipient. Unread counts move together with ``UnreadCounter``
+(``api/counters.py``).
+
+Deleting an event keeps its messages (``Message.related_event`` is set to
+NULL): ``fold_event_conversations`` first moves each of the event's threads,
+with its unread counts, into the pair's conversation without an event, or
+makes the thread that conversation when the pair has none yet.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from .models import Conversation, ConversationParticipant, Message
+
+
+def pair_key(sender_id, recipient_id):
+    return min(sender_id, recipient_id), max(sender_id, recipient_id)
+
+
+def conversation_for(sender_id, recipient_id, related_event_id=None):
+    """Find or create the conversation (and its participant rows) for a message."""
+    low, high = pair_key(sender_id, recipient_id)
+    with transaction.atomic():
+        conversation, created = Conversation.objects.get_or_create(
+            user_low_id=low, user_high_id=high, related_event_id=related_event_id
+        )
+        if created:
+            ConversationParticipant.objects.bulk_create([
+                ConversationParticipant(conversation=conversation, user_id=user_id, other_user_id=other_id,
+                                        last_activity=conversation.last_activity)
+                for user_id, other_id in {(low, high), (high, low)}
+            ], ignore_conflicts=True)
+    return conversation
+
+
+def message_sent(message):
+    Conversation.objects.filter(pk=message.conversation_id).update(
+        last_message=message, last_activity=message.sent_at
+    )
+    ConversationParticipant.objects.filter(conversation_id=message.conversation_id).update(
+        last_activity=message.sent_at
+    )
+
+
+def message_deleted(message):
+    """Point the thread at its newest remaining message once ``message`` is gone."""
+    # SET_NULL has already cleared last_message if it was this one; an older message changes nothing
+    conversation = Conversation.objects.filter(pk=message.conversation_id, last_message__isnull=True).first()
+    if conversation is None:
+        return
+    latest = Message.objects.filter(conversation=conversation).order_by('-sent_at', '-id').first()
+    if latest is not None:
+        message_sent(latest)
+        return
+    Conversation.objects.filter(pk=conversation.pk).update(last_activity=conversation.created_at)
+    ConversationParticipant.objects.filter(conversation_id=conversation.pk).update(
+        last_activity=conversation.created_at
+    )
+
+
+def fold_event_conversations(event_id):
+    """Move the threads about ``event_id`` into their pair-only conversations."""
+    with transaction.atomic():
+        for conversation in Conversation.objects.filter(related_event_id=event_id):
+            target = Conversation.objects.filter(
+                user_low_id=conversation.user_low_id, user_high_id=conversation.user_high_id, related_event__isnull=True
+            ).first()
+            if target is None:
+                # no row is created here: a deletion cascading from a user has already collected its conversations
+                conversation.related_event = None
+                conversation.save(update_fields=['related_event'])
+                continue
+            Message.objects.filter(conversation=conversation).update(conversation=target)
+            for user_id, unread in conversation.participants.values_list('user_id', 'unread_count'):
+                adjust_conversation_unread(target.id, user_id, unread)
+            latest = Message.objects.filter(conversation=target).order_by('-sent_at', '-id').first()
+            if latest is not None:
+                message_sent(latest)
+            conversation.delete()
+
+
+def adjust_conversation_unread(conversation_id, user_id, delta):
+    if delta and conversation_id is not None:
+        ConversationParticipant.objects.filter(conversation_id=conversation_id, user_id=user_id).update(
+            unread_count=F('unread_count') + delta
+        )
+
+
+def unread_per_conversation(messages):
+    """``[(conversation_id, recipient_id, unread), ...]`` for the unread rows of ``messages``."""
+    return list(
+        messages.filter(is_read=False, conversation__isnull=False).order_by()
+        .values('conversation_id', 'recipient_id').annotate(n=Count('pk'))
+        .values_list('conversation_id', 'recipient_id', 'n')
+    )
+
+
+def thread_messages(conversation_id):
+    return Message.objects.filter(conversation_id=conversation_id).select_related('sender', 'recipient')
+
+
+def inbox(user):
+    return (
+        ConversationParticipant.objects.filter(user=user)
+        .select_related('other_user', 'conversation__last_message', 'conversation__related_event')
+    )
@@ -0,0 +1,124 @@
+"""
+Per-user unread counters for notifications and messages.
+
+``UnreadCounter`` rows are adjusted with F() expressions whenever a
+notification or message is created, read or deleted (``api/signals.py`` for
+single-row saves, the helpers below for conditional and bulk updates).
+Message deltas are applied to the conversation participant's unread count
+as well.
+
+Every user gets a row when the account is created, so reading the counts is
+one primary-key lookup. A row that is still missing (users bulk-created
+without signals) is built on first read; the ``repair_unread_counters``
+command reconciles any drift.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+
+from .cache import invalidate_users
+from .conversations import adjust_conversation_unread, unread_per_conversation
+from .models import Message, Notification, UnreadCounter, User
+
+FIELDS = {
+    Notification: ('unread_notifications', 'user_id'),
+    Message: ('unread_messages', 'recipient_id'),
+}
+
+
+def count_unread(user_id):
+    return {
+        'unread_notifications': Notification.objects.filter(user_id=user_id, is_read=False).count(),
+        'unread_messages': Message.objects.filter(recipient_id=user_id, is_read=False).count(),
+    }
+
+
+def adjust_unread(user_id, field, delta):
+    #rows that were never built are left alone: they are counted on first read
+    if not delta or user_id is None:
+        return
+    UnreadCounter.objects.filter(user_id=user_id).update(**{field: F(field) + delta})
+    transaction.on_commit(lambda: invalidate_users([user_id]))
+
+
+def adjust_unread_many(field, deltas):
+    #{user_id: delta}; one UPDATE per distinct delta instead of one per user
+    by_delta = {}
+    for user_id, delta in deltas.items():
+        if delta and user_id is not None:
+            by_delta.setdefault(delta, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        UnreadCounter.objects.filter(user_id__in=user_ids).update(**{field: F(field) + delta})
+    if by_delta:
+        transaction.on_commit(lambda: invalidate_users(deltas))
+
+
+def adjust_for(instance, delta):
+    field, owner = FIELDS[type(instance)]
+    adjust_unread(getattr(instance, owner), field, delta)
+    if isinstance(instance, Message):
+        adjust_conversation_unread(instance.conversation_id, instance.recipient_id, delta)
+
+
+def get_unread_counts(user_id):
+    counter = UnreadCounter.objects.filter(user_id=user_id).values('unread_notifications', 'unread_messages').first()
+    if counter is None:
+        counter = build_unread_counter(user_id)
+    return counter
+
+
+def build_unread_counter(user_id):
+    # created before counting, so that concurrent writers already adjust it
+    UnreadCounter.objects.get_or_create(user_id=user_id)
+    with transaction.atomic():
+        # a writer holding the row is counted once it commits; later ones apply on top of the recount
+        UnreadCounter.objects.select_for_update().filter(user_id=user_id).first()
+        counter = count_unread(user_id)
+        UnreadCounter.objects.filter(user_id=user_id).update(**counter)
+    return counter
+
+
+def mark_read(queryset):
+    """Flip ``is_read`` on the unread rows of ``queryset`` and decrement the owners' counters."""
+    model = queryset.model
+    field, owner = FIELDS[model]
+    with transaction.atomic():
+        unread = queryset.filter(is_read=False)
+        per_user = list(unread.order_by().values(owner).annotate(n=Count('pk')).values_list(owner, 'n'))
+        per_conversation = unread_per_conversation(unread) if model is Message else []
+        updated = unread.update(is_read=True)
+        if len(per_user) == 1:
+            # the common case: the count returned by UPDATE is authoritative
+            per_user = [(per_user[0][0], updated)]
+        for user_id, n in per_user:
+            adjust_unread(user_id, field, -n)
+        for conversation_id, user_id, n in per_conversation:
+            adjust_conversation_unread(conversation_id, user_id, -n)
+    return updated
+
+
+def reconcile_unread_counters():
+    """
+    Rewrite every counter that differs from the real counts and create the
+    missing ones; returns the number fixed.
+    """
+    notifications = dict(
+        Notification.objects.filter(is_read=False).order_by().values('user_id').annotate(n=Count('pk')).values_list('user_id', 'n')
+    )
+    messages = dict(
+        Message.objects.filter(is_read=False).order_by().values('recipient_id').annotate(n=Count('pk')).values_list('recipient_id', 'n')
+    )
+    fixed = []
+    for counter in UnreadCounter.objects.all().iterator(chunk_size=2000):
+        expected = (notifications.get(counter.user_id, 0), messages.get(counter.user_id, 0))
+        if (counter.unread_notifications, counter.unread_messages) != expected:
+            counter.unread_notifications, counter.unread_messages = expected
+            fixed.append(counter)
+    UnreadCounter.objects.bulk_update(fixed, ['unread_notifications', 'unread_messages'], batch_size=2000)
+    missing = [
+        UnreadCounter(user_id=user_id, unread_notifications=notifications.get(user_id, 0), unread_messages=messages.get(user_id, 0))
+        for user_id in User.objects.filter(unread_counter__isnull=True).values_list('id', flat=True).iterator(chunk_size=2000)
+    ]
+    UnreadCounter.objects.bulk_create(missing, batch_size=2000)
+    fixed.extend(missing)
+    invalidate_users([counter.user_id for counter in fixed])
+    return len(fixed)
@@ -0,0 +1,256 @@
+"""
+Catalogue of the API routes for the maintenance commands.
+
+``routes()`` walks ``api/urls.py``. ``Samples`` picks real rows to fill the
+URL arguments and a set of users to call them as: the organizer of the
+busiest event, one of its authors, and so on. A route is called as each
+candidate user in turn, and the first one that gets a 2xx answer is kept.
+That way every view runs its real queryset, serializer and permission
+checks against whatever data is loaded.
+
+The live Q&A stream (an async view) is opened with a token, replays the
+session's questions and is closed at its first keepalive.
+"""
+import asyncio
+from dataclasses import dataclass, field
+
+from asgiref.sync import async_to_sync
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver
+from rest_framework.mixins import ListModelMixin
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import (
+    Certificate, Conversation, Event, Job, Message, Notification, Question, Registration, Review, Session,
+    Submission, Survey, SurveyQuestion, User, Workshop,
+)
+
+
+@dataclass
+class Route:
+    name: str
+    pattern: str
+    callback: object
+    kwarg_names: list
+    default_kwargs: dict = field(default_factory=dict)
+
+    @property
+    def view_class(self):
+        return getattr(self.callback, 'view_class', None)
+
+    @property
+    def is_list(self):
+        view_class = self.view_class
+        return isinstance(view_class, type) and issubclass(view_class, ListModelMixin)
+
+    @property
+    def model(self):
+        queryset = getattr(self.view_class, 'queryset', None)
+        if queryset is not None:
+            return queryset.model
+        serializer_class = getattr(self.view_class, 'serializer_class', None)
+        meta = getattr(serializer_class, 'Meta', None)
+        return getattr(meta, 'model', None)
+
+
+def routes(patterns=None, prefix='/api/'):
+    if patterns is None:
+        from . import urls
+        patterns = urls.urlpatterns
+    found = []
+    for entry in patterns:
+        if isinstance(entry, URLResolver):
+            found.extend(routes(entry.url_patterns, prefix + str(entry.pattern)))
+        elif isinstance(entry, URLPattern):
+            found.append(Route(
+                name=entry.name,
+                pattern=prefix + str(entry.pattern),
+                callback=entry.callback,
+                kwarg_names=list(entry.pattern.converters),
+                default_kwargs=dict(entry.default_args),
+            ))
+    return found
+
+
+def list_routes():
+    return [route for route in routes() if route.is_list]
+
+
+def first_id(queryset):
+    return queryset.values_list('id', flat=True).first()
+
+
+class Samples:
+    """Ids of representative rows and the users allowed to read them."""
+
+    def __init__(self):
+        self.event = (
+            Event.objects.annotate(n=Count('submissions')).order_by('-n', 'id').select_related('organizer').first()
+        )
+        if self.event is None:
+            raise LookupError('no events in the database')
+        event_id = self.event.id
+        self.session_id = first_id(Session.objects.filter(event_id=event_id).annotate(n=Count('questions')).order_by('-n', 'id'))
+        self.submission = (
+            Submission.objects.filter(event_id=event_id).annotate(n=Count('reviews')).order_by('-n', 'id')
+            .select_related('author').first()
+        )
+        self.survey_id = first_id(Survey.objects.filter(event_id=event_id).order_by('-respondents_count', 'id'))
+        self.conversation = Conversation.objects.order_by('-last_activity', '-id').select_related('user_low').first()
+        self.question = (
+            Question.objects.filter(session_id=self.session_id).order_by('-likes_count', 'id').select_related('user').first()
+        )
+        # users only read their own certificates, so the owner is one of the sample users
+        self.certificate = (
+            Certificate.objects.filter(event_id=event_id).exclude(certificate_file='').order_by('id')
+            .select_related('user').first()
+        )
+        self.ids = {
+            'event_id': event_id,
+            'session_id': self.session_id,
+            'submission_id': self.submission and self.submission.id,
+            'survey_id': self.survey_id,
+            'workshop_id': first_id(Workshop.objects.filter(event_id=event_id).order_by('-seats_taken', 'id')),
+            'question_id': self.question and self.question.id,
+            'conversation_id': self.conversation and self.conversation.id,
+            'certificate_id': self.certificate and self.certificate.id,
+            'notification_id': first_id(Notification.objects.filter(user_id=self.event.organizer_id).order_by('-id')),
+        }
+        self.pks = {
+            Event: event_id,
+            Session: self.session_id,
+            Submission: self.ids['submission_id'],
+            Survey: self.survey_id,
+            Workshop: self.ids['workshop_id'],
+            Certificate: self.ids['certificate_id'],
+            Review: first_id(Review.objects.filter(submission__event_id=event_id).order_by('id')),
+            Registration: first_id(Registration.objects.filter(event_id=event_id).order_by('id')),
+            Message: self.conversation and self.conversation.last_message_id,
+            Job: first_id(Job.objects.order_by('-id')),
+        }
+
+    def users(self):
+        candidates = [
+            self.event.organizer,
+            User.objects.filter(role='super_admin').order_by('id').first(),
+            self.submission and self.submission.author,
+            self.conversation and self.conversation.user_low,
+            self.question and self.question.user,
+            self.certificate and self.certificate.user,
+            User.objects.filter(role='reviewer', assigned_submissions__event_id=self.event.id).order_by('id').first(),
+            User.objects.filter(registrations__event_id=self.event.id).order_by('id').first(),
+        ]
+        seen, users = set(), []
+        for user in candidates:
+            if user is not None and user.id not in seen:
+                seen.add(user.id)
+                users.append(user)
+        return users
+
+    def kwargs_for(self, route):
+        """URL kwargs for ``route``, or None when a required row is missing."""
+        values = {}
+        for name in route.kwarg_names:
+            if name == 'pk':
+                value = self.pks.get(route.model)
+            elif name == 'question_id' and 'survey_id' in route.kwarg_names:
+                value = first_id(SurveyQuestion.objects.filter(survey_id=self.survey_id, question_type='text').order_by('id'))
+            else:
+                value = self.ids.get(name)
+            if value is None:
+                return None
+            values[name] = value
+        return values
+
+    def url_for(self, route, kwargs):
+        url = route.pattern
+        for name, value in kwargs.items():
+            url = url.replace(f'<int:{name}>', str(value))
+        return url
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` that keeps the SQL and parameters of every statement."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+@dataclass
+class Call:
+    route: Route
+    url: str
+    kwargs: dict
+    user: object
+    response: object
+    queries: list
+
+
+def call(route, url, kwargs, user, query=None, method='get', data=None):
+    """Run ``route``'s view for ``user``; returns a ``Call`` with the rendered response and its SQL."""
+    factory = APIRequestFactory()
+    streams = asyncio.iscoroutinefunction(route.callback)
+    if streams:
+        # EventSource authenticates with ?token=; last_id=0 replays the whole session
+        query = {'token': str(AccessToken.for_user(user)), 'last_id': 0, **(query or {})}
+    if method == 'get':
+        request = factory.get(url, query or {}, SERVER_NAME='localhost')
+    else:
+        data = data or {}
+        body_format = 'multipart' if any(hasattr(value, 'read') for value in data.values()) else 'json'
+        request = getattr(factory, method)(url, data, format=body_format, SERVER_NAME='localhost')
+    force_authenticate(request, user=user)
+    recorder = QueryRecorder()
+    # pagination links call build_absolute_uri(), which checks the host
+    with override_settings(ALLOWED_HOSTS=['localhost'], LIVE_KEEPALIVE=0), connection.execute_wrapper(recorder):
+        if streams:
+            return Call(route, url, kwargs, user, async_to_sync(open_stream)(route, request, kwargs), recorder.queries)
+        response = route.callback(request, **route.default_kwargs, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if getattr(response, 'streaming', False):
+            for _ in response.streaming_content:
+                pass
+    return Call(route, url, kwargs, user, response, recorder.queries)
+
+
+async def open_stream(route, request, kwargs):
+    """Await the async view and read its event stream up to the first keepalive, i.e. through the backlog."""
+    response = await route.callback(request, **route.default_kwargs, **kwargs)
+    if getattr(response, 'streaming', False):
+        # the view's own generator, so that closing it unsubscribes at once
+        stream = response._iterator
+        try:
+            async for chunk in stream:
+                if chunk.startswith(':'):
+                    break
+        finally:
+            await stream.aclose()
+    return response
+
+
+def representative_call(route, samples, query=None, method='get', data=None):
+    """
+    The 2xx ``Call`` of ``route`` that ran the most queries over the sample
+    users (the one who sees the most data), or None. Each attempt is rolled
+    back.
+    """
+    kwargs = samples.kwargs_for(route)
+    if kwargs is None:
+        return None
+    url = samples.url_for(route, kwargs)
+    best = None
+    for user in samples.users():
+        with transaction.atomic():
+            result = call(route, url, kwargs, user, query, method, data)
+            transaction.set_rollback(True)
+        if 200 <= result.response.status_code < 300 and (best is None or len(result.queries) > len(best.queries)):
+            best = result
+    return best
@@ -0,0 +1,122 @@
+"""
+Streaming exports.
+
+CSV exports format one row at a time from a chunked ``.iterator()``.
+Archives are written through ``zipfile`` into a small write-only buffer that
+is drained after every chunk, so a response of any size is produced without
+a temporary file and with memory bounded by ``CHUNK_SIZE``. Certificates are
+already-compressed PDFs, so entries are stored rather than deflated.
+"""
+import csv
+import logging
+import zipfile
+
+from django.core.files.storage import default_storage
+
+from .models import Certificate, SurveyResponse
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamBuffer:
+    """Unseekable file object that hands everything written to it back to the caller."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+def stream_zip(entries, chunk_size=CHUNK_SIZE):
+    """
+    Yield a ZIP archive built from ``entries``: an iterable of
+    ``(archive_name, storage_name)`` pairs read from ``default_storage``.
+    Files missing from storage are skipped.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for archive_name, storage_name in entries:
+            try:
+                source = default_storage.open(storage_name, 'rb')
+            except FileNotFoundError:
+                logger.warning('Skipping %s: %s is missing from storage', archive_name, storage_name)
+                continue
+            with source:
+                info = zipfile.ZipInfo(archive_name)
+                info.compress_type = zipfile.ZIP_STORED
+                info.file_size = source.size
+                with archive.open(info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as target:
+                    for chunk in iter(lambda: source.read(chunk_size), b''):
+                        target.write(chunk)
+                        yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def certificate_entries(event_id, certificate_type=None, chunk_size=500):
+    certificates = (
+        Certificate.objects.filter(event_id=event_id)
+        .exclude(certificate_file='').exclude(certificate_file__isnull=True)
+        .order_by('id')
+    )
+    if certificate_type:
+        certificates = certificates.filter(certificate_type=certificate_type)
+    rows = certificates.values_list('id', 'certificate_type', 'user__username', 'certificate_file')
+    for certificate_id, kind, username, storage_name in rows.iterator(chunk_size=chunk_size):
+        yield f'{kind}/{username}_{certificate_id}.pdf', storage_name
+
+
+class Echo:
+    """csv.writer target that returns each formatted line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+SURVEY_RESPONSE_COLUMNS = [
+    ('response_id', 'id'),
+    ('question_id', 'question_id'),
+    ('question', 'question__question_text'),
+    ('question_type', 'question__question_type'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('rating', 'response_rating'),
+    ('text', 'response_text'),
+    ('created_at', 'created_at'),
+]
+
+
+def survey_response_rows(survey_id, chunk_size=2000):
+    rows = (
+        SurveyResponse.objects.filter(survey_id=survey_id)
+        .order_by('id')
+        .values_list(*[field for _, field in SURVEY_RESPONSE_COLUMNS])
+    )
+    return rows.iterator(chunk_size=chunk_size)
+
+
+def stream_survey_responses(survey_id, chunk_size=2000):
+    return stream_csv([name for name, _ in SURVEY_RESPONSE_COLUMNS], survey_response_rows(survey_id, chunk_size))
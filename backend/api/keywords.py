@@ -0,0 +1,84 @@
+"""
+Keyword index for submissions.
+
+``Submission.keywords`` stays the free-text field authors fill in; its
+comma-separated values are normalized (whitespace collapsed, case-folded,
+deduplicated) into ``Keyword`` rows linked to the submission on every save.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Keyword, Submission
+
+
+def normalize_keyword(value):
+    return ' '.join(value.split()).casefold()
+
+
+def split_keywords(value):
+    names = []
+    for part in (value or '').split(','):
+        name = normalize_keyword(part)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def get_or_create_keywords(names):
+    #{name: id} for every name, inserting the missing ones in one statement
+    if not names:
+        return {}
+    Keyword.objects.bulk_create([Keyword(name=name) for name in names], ignore_conflicts=True)
+    return dict(Keyword.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+def sync_submission_keywords(submission):
+    ids = get_or_create_keywords(split_keywords(submission.keywords))
+    submission.keyword_index.set(ids.values())
+
+
+def backfill_keywords(batch_size=1000):
+    """Rebuild the keyword links of every submission; returns the number of submissions processed."""
+    Link = Keyword.submissions.through
+    processed = 0
+    queryset = Submission.objects.order_by('pk').values_list('pk', 'keywords')
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return processed
+        with transaction.atomic():
+            per_submission = {pk: split_keywords(keywords) for pk, keywords in batch}
+            ids = get_or_create_keywords(sorted({name for names in per_submission.values() for name in names}))
+            Link.objects.filter(submission_id__in=per_submission).delete()
+            Link.objects.bulk_create([
+                Link(submission_id=pk, keyword_id=ids[name])
+                for pk, names in per_submission.items()
+                for name in names
+            ])
+        processed += len(batch)
+        last_pk = batch[-1][0]
+
+
+def keyword_facets(event_id, author=None, limit=None):
+    #one grouped query; the filter and the count share the same join
+    lookups = {'submissions__event_id': event_id}
+    if author is not None:
+        lookups['submissions__author'] = author
+    facets = (
+        Keyword.objects.filter(**lookups)
+        .annotate(count=Count('submissions'))
+        .order_by('-count', 'name')
+        .values('name', 'count')
+    )
+    if limit:
+        facets = facets[:limit]
+    return list(facets)
+
+
+def filter_by_keywords(queryset, values):
+    #every requested keyword must be present
+    for value in values:
+        for name in split_keywords(value):
+            queryset = queryset.filter(keyword_index__name=name)
+    return queryset
@@ -0,0 +1,283 @@
+"""
+Live session Q&A.
+
+Every ``Session`` has a group ``session.<id>`` on the channel layer. Writes
+publish to it after commit (``api/signals.py``). ``session_live`` streams
+the group to clients as Server-Sent Events. It is an async view, so it needs
+an ASGI server (``backend/asgi.py``, e.g. ``uvicorn backend.asgi:application``).
+
+Events:
+
+* ``question.created``: a new question; its SSE ``id`` is the question id.
+  A client reconnecting with ``Last-Event-ID`` (or ``?last_id=``) first gets
+  the questions it missed, then a ``question.sync`` with the current likes
+  and answers of the questions it already had.
+* ``question.answered``: the question with its answer.
+* ``question.likes``: ``{question_id: delta}``. Likes are coalesced per
+  session and flushed every ``LIVE_LIKE_FLUSH_INTERVAL`` seconds, so a burst
+  of votes becomes one event.
+
+The layer is chosen with ``LIVE_CHANNEL_LAYER``. The default
+``InProcessChannelLayer`` only reaches clients connected to the same process.
+A broker-backed layer needs the same two methods: a thread-safe
+``publish(group, event)`` and ``subscribe(group)``, which returns an async
+iterator with ``close()``.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponseForbidden, HttpResponseNotFound, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .budgets import query_budget
+from .models import Question, Session
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+OVERFLOW = object()
+
+
+def session_group(session_id):
+    return f'session.{session_id}'
+
+
+class Subscription:
+
+    def __init__(self, layer, group):
+        self.layer = layer
+        self.group = group
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # runs on the subscriber's loop
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # a client this far behind reconnects and resumes from its last id
+            self.overflowed = True
+            self.layer.unsubscribe(self)
+            self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.queue.get()
+        if event is OVERFLOW:
+            raise StopAsyncIteration
+        return event
+
+    def close(self):
+        self.layer.unsubscribe(self)
+
+
+class InProcessChannelLayer:
+    """Fan-out to the subscribers of this process; safe to publish from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.groups = defaultdict(set)
+
+    def publish(self, group, event):
+        with self.lock:
+            subscribers = list(self.groups.get(group, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.deliver, event)
+            except RuntimeError:
+                # the subscriber's loop is gone
+                self.unsubscribe(subscriber)
+
+    def subscribe(self, group):
+        subscription = Subscription(self, group)
+        with self.lock:
+            self.groups[group].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            members = self.groups.get(subscription.group)
+            if members is not None:
+                members.discard(subscription)
+                if not members:
+                    del self.groups[subscription.group]
+
+    def subscriber_count(self, group):
+        with self.lock:
+            return len(self.groups.get(group, ()))
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_channel_layer():
+    global _layer
+    with _layer_lock:
+        if _layer is None:
+            _layer = import_string(getattr(settings, 'LIVE_CHANNEL_LAYER', 'api.live.InProcessChannelLayer'))()
+        return _layer
+
+
+def question_payload(question):
+    return {
+        'id': question.id,
+        'content': question.content,
+        'user': question.user.username,
+        'is_answered': question.is_answered,
+        'answer': question.answer,
+        'created_at': question.created_at.isoformat(),
+    }
+
+
+def publish_question(question, event_type):
+    get_channel_layer().publish(session_group(question.session_id), {
+        'type': event_type,
+        'id': question.id if event_type == 'question.created' else None,
+        'data': question_payload(question),
+    })
+
+
+class LikeCoalescer:
+    """Sums like deltas per session and publishes them at most once per interval."""
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.pending = defaultdict(lambda: defaultdict(int))
+        self.timer = None
+
+    def get_interval(self):
+        if self.interval is not None:
+            return self.interval
+        return getattr(settings, 'LIVE_LIKE_FLUSH_INTERVAL', 1.0)
+
+    def add(self, session_id, question_id, delta=1):
+        with self.lock:
+            self.pending[session_id][question_id] += delta
+            if self.timer is None:
+                self.timer = threading.Timer(self.get_interval(), self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, defaultdict(lambda: defaultdict(int))
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = None
+        layer = get_channel_layer()
+        for session_id, deltas in pending.items():
+            deltas = {question_id: delta for question_id, delta in deltas.items() if delta}
+            if deltas:
+                layer.publish(session_group(session_id), {'type': 'question.likes', 'id': None, 'data': deltas})
+
+
+like_coalescer = LikeCoalescer()
+
+
+# Server-Sent Events
+
+def format_event(event):
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event['data'], separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def parse_last_id(request):
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def authenticate(request):
+    # EventSource cannot set headers, so the access token may come as ?token=
+    header = request.headers.get('Authorization', '')
+    raw = header.split(' ', 1)[1] if header.startswith('Bearer ') else request.GET.get('token')
+    if not raw:
+        return None
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def missed_events(session_id, last_id):
+    """Questions created after ``last_id`` and the current state of the older ones."""
+    questions = Question.objects.filter(session_id=session_id).select_related('user').order_by('id')
+    events = [
+        {'type': 'question.created', 'id': question.id, 'data': question_payload(question)}
+        for question in questions.filter(id__gt=last_id)
+    ]
+    likes = dict(questions.filter(id__lte=last_id, likes_count__gt=0).values_list('id', 'likes_count'))
+    answered = {
+        question_id: answer
+        for question_id, answer in questions.filter(id__lte=last_id, is_answered=True).values_list('id', 'answer')
+    }
+    events.append({'type': 'question.sync', 'id': None, 'data': {'likes': likes, 'answers': answered}})
+    return events
+
+
+async def event_stream(subscription, backlog, keepalive):
+    try:
+        yield 'retry: 3000\n\n'
+        replayed = 0
+        for event in backlog:
+            replayed = max(replayed, event['id'] or 0)
+            yield format_event(event)
+        while True:
+            try:
+                event = await asyncio.wait_for(anext(subscription), keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            except StopAsyncIteration:
+                return
+            if event['type'] == 'question.created' and event['id'] <= replayed:
+                continue
+            yield format_event(event)
+    finally:
+        subscription.close()
+
+
+# one more than the backlog: the view looks up the token's user itself
+@query_budget(5)
+async def session_live(request, session_id):
+    """
+    GET /api/sessions/<id>/live/ — event stream of the session's Q&A
+    """
+    user = await sync_to_async(authenticate)(request)
+    if user is None:
+        return HttpResponseForbidden('Authentication credentials were not provided.')
+    if not await Session.objects.filter(id=session_id).aexists():
+        return HttpResponseNotFound('Session not found')
+
+    # subscribe before reading the backlog so nothing falls in between
+    subscription = get_channel_layer().subscribe(session_group(session_id))
+    last_id = parse_last_id(request)
+    backlog = await sync_to_async(missed_events)(session_id, last_id) if last_id is not None else []
+
+    response = StreamingHttpResponse(
+        event_stream(subscription, backlog, getattr(settings, 'LIVE_KEEPALIVE', 15)),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
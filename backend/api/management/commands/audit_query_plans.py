@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.plans import audit_list_routes
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries of every list endpoint against the loaded data and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('routes', nargs='*', help='route names from api/urls.py (default: every list route)')
+
+    def handle(self, *args, **options):
+        try:
+            audits = audit_list_routes(options['routes'])
+        except LookupError as exc:
+            raise CommandError(f'Nothing to audit ({exc}); load or seed data first.')
+        except NotImplementedError as exc:
+            raise CommandError(str(exc))
+
+        failures = 0
+        for audit in audits:
+            if audit.skipped:
+                self.stdout.write(self.style.WARNING(f'skip  {audit.name}: {audit.skipped}'))
+                continue
+            unexpected = audit.unexpected_scans
+            failures += bool(unexpected)
+            if unexpected:
+                label = self.style.ERROR('SCAN ')
+            else:
+                label = self.style.SUCCESS('ok   ')
+            notes = [f'{len(audit.queries)} queries']
+            if audit.scans:
+                notes.append('full scan: ' + ', '.join(
+                    table if table in unexpected else f'{table} (expected)' for table in audit.scans
+                ))
+            sorts = sum(query.sorts for query in audit.queries)
+            if sorts:
+                notes.append(f'{sorts} sorted without an index')
+            self.stdout.write(f"{label}{audit.name} {audit.url} ({'; '.join(notes)})")
+            for query in audit.queries:
+                if set(query.scans) & set(unexpected) or options['verbosity'] >= 2:
+                    self.stdout.write(f'      {query.sql}')
+                    for step in query.plan:
+                        self.stdout.write(f'        {step}')
+
+        if failures:
+            raise CommandError(f'{failures} list endpoint(s) read a table in full')
+        self.stdout.write(self.style.SUCCESS(f'{len(audits)} list endpoint(s) audited, no unexpected full scans'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.keywords import backfill_keywords
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized keyword index from Submission.keywords'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        processed = backfill_keywords(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Keywords indexed for {processed} submission(s)'))
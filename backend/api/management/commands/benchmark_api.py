@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import compare, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API route on the loaded data (see seed_data) and write the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('routes', nargs='*', help='route names from api/urls.py (default: all)')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--compare', metavar='BASELINE', help='an earlier JSON report to compare with')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as handle:
+                baseline = json.load(handle)
+
+        def progress(label, result):
+            self.stdout.write(
+                f"{label:<40} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+                f"p99 {result['p99_ms']:>8.2f}ms  {result['queries']:>5} queries  {result['throughput_rps']} req/s"
+            )
+
+        try:
+            report = run_benchmark(options['iterations'], options['warmup'], options['routes'], progress)
+        except LookupError as exc:
+            raise CommandError(f'Nothing to benchmark ({exc}); run seed_data first.')
+
+        with open(options['output'], 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+        summary = report['summary']
+        self.stdout.write(self.style.SUCCESS(
+            f"{summary['routes']} route(s), {summary['requests']} requests, {summary['throughput_rps']} req/s; "
+            f"written to {options['output']}"
+        ))
+
+        if baseline:
+            self.stdout.write(f"\nCompared with {options['compare']} ({baseline['meta'].get('revision')}):")
+            for label, metric, before, after, change in compare(baseline, report):
+                if before == after or (change is not None and abs(change) < 10):
+                    continue
+                style = self.style.SUCCESS if change is not None and change < 0 else self.style.ERROR
+                suffix = f' ({change:+}%)' if change is not None else ''
+                self.stdout.write(style(f'  {label:<40} {metric:<8} {before} -> {after}{suffix}'))
+
+        if report['missing']:
+            for label, reason in report['missing'].items():
+                self.stderr.write(self.style.ERROR(f'not benchmarked: {label}: {reason}'))
+            raise CommandError(f"{len(report['missing'])} route(s) missing from the report (see above)")
@@ -0,0 +1,79 @@
+import itertools
+import random
+import resource
+import string
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from api.assignment import affinity_matrix, reviewer_document, solve, submission_document
+
+TOPICS = [
+    'cardiology heart failure arrhythmia echocardiography hypertension',
+    'oncology tumor chemotherapy immunotherapy metastasis biopsy',
+    'neurology stroke epilepsy dementia neuroimaging migraine',
+    'infectious disease malaria tuberculosis vaccine antibiotic resistance',
+    'endocrinology diabetes insulin thyroid obesity metabolism',
+    'pediatrics neonatal growth vaccination child nutrition',
+    'pharmacy drug interaction dosage pharmacokinetics adherence',
+    'public health epidemiology surveillance prevention cohort',
+    'radiology imaging tomography ultrasound resonance contrast',
+    'surgery laparoscopy anesthesia postoperative complications',
+]
+
+
+class Command(BaseCommand):
+    help = 'Time the reviewer assignment engine on synthetic data (no database access)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submissions', type=int, default=5000)
+        parser.add_argument('--reviewers', type=int, default=500)
+        parser.add_argument('--per-submission', type=int, default=3)
+        parser.add_argument('--max-load', type=int, default=40)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--vocabulary', type=int, default=28000,
+                            help='distinct words across all topics, like a real call for papers')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [topic.split() for topic in TOPICS]
+        # pad every topic with made-up words up to the requested vocabulary size
+        per_topic = max(options['vocabulary'] // len(TOPICS), max(len(words) for words in vocabulary))
+        for words in vocabulary:
+            words.extend(
+                ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 11)))
+                for _ in range(per_topic - len(words))
+            )
+        # word frequencies fall off like in real text (Zipf), the topic words come first
+        cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary[0]) + 1)))
+
+        def text(topic, words):
+            chosen = []
+            for _ in range(words):
+                own = vocabulary[topic if rng.random() < 0.8 else rng.randrange(len(vocabulary))]
+                chosen.append(rng.choices(own, cum_weights=cum_weights)[0])
+            return ' '.join(chosen)
+
+        submission_topics = [rng.randrange(len(TOPICS)) for _ in range(options['submissions'])]
+        reviewer_topics = [rng.randrange(len(TOPICS)) for _ in range(options['reviewers'])]
+        submissions = [submission_document(text(t, 12), text(t, 200), text(t, 5)) for t in submission_topics]
+        reviewers = [reviewer_document(text(t, 6), text(t, 60)) for t in reviewer_topics]
+
+        started = time.perf_counter()
+        affinity = affinity_matrix(submissions, reviewers)
+        vectorized = time.perf_counter()
+        new = solve(affinity, options['per_submission'], options['max_load'])
+        solved = time.perf_counter()
+
+        per_submission = new.sum(axis=1)
+        load = new.sum(axis=0)
+        matched = np.array(submission_topics)[:, None] == np.array(reviewer_topics)[None, :]
+        self.stdout.write(f"{options['submissions']} submissions x {options['reviewers']} reviewers")
+        self.stdout.write(f'  affinity matrix: {vectorized - started:.2f}s')
+        self.stdout.write(f'  assignment:      {solved - vectorized:.2f}s')
+        self.stdout.write(f'  assignments:     {int(new.sum())} (unfilled submissions: {int((per_submission < options["per_submission"]).sum())})')
+        self.stdout.write(f'  reviewer load:   max {int(load.max())}, mean {load.mean():.1f}')
+        self.stdout.write(f'  same-topic rate: {matched[new].mean() * 100:.1f}%')
+        # kilobytes on Linux
+        self.stdout.write(f'  peak RSS:        {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB')
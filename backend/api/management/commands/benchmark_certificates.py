@@ -0,0 +1,58 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.certificates import create_certificate_records
+from api.models import Event, Registration, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time certificate generation on a throwaway event (everything is rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--registrations', type=int, default=10000)
+        parser.add_argument('--committee', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['registrations'], options['committee'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, n_registrations, n_committee):
+        users = User.objects.bulk_create([
+            User(username=f'bench_cert_{i}', email=f'bench_cert_{i}@example.com')
+            for i in range(n_registrations + n_committee + 1)
+        ], batch_size=1000)
+        users = list(User.objects.filter(username__startswith='bench_cert_').order_by('id'))
+        organizer, committee, attendees = users[0], users[1:n_committee + 1], users[n_committee + 1:]
+        today = datetime.date.today()
+        event = Event.objects.create(
+            organizer=organizer, title='Benchmark congress', description='-', event_type='congress', theme='-',
+            start_date=today, end_date=today, submission_deadline=datetime.datetime.now(datetime.timezone.utc),
+            notification_date=today, venue='-', city='-', country='-', contact_email='bench@example.com',
+        )
+        event.scientific_committee.set(committee)
+        Registration.objects.bulk_create([
+            Registration(event=event, user=user, registration_type='speaker' if i % 10 == 0 else 'participant')
+            for i, user in enumerate(attendees)
+        ], batch_size=1000)
+
+        for label in ('first run', 'second run'):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                result = create_certificate_records(event.id)
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'{label}: {elapsed:.2f}s, {len(queries)} queries, '
+                f"{result['created']} created, {result['total_certificates']} total"
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from api.models import EventStatistics
+from api.stats import rebuild_event_statistics
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized statistics of every event that has them (see api/stats.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', help='Only this event (repeatable)')
+
+    def handle(self, *args, **options):
+        event_ids = options['event'] or list(EventStatistics.objects.values_list('event_id', flat=True))
+        for event_id in event_ids:
+            rebuild_event_statistics(event_id)
+        self.stdout.write(self.style.SUCCESS(f'{len(event_ids)} event statistics rebuilt'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.search import get_backend, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over submissions'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if backend is None:
+            self.stdout.write(self.style.WARNING('No full-text backend for this database; search uses icontains'))
+            return
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Search index {backend.table} rebuilt'))
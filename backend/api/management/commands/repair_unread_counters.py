@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import reconcile_unread_counters
+
+
+class Command(BaseCommand):
+    help = 'Reconcile the denormalized unread notification/message counters with the real counts'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_unread_counters()
+        self.stdout.write(self.style.SUCCESS(f'{fixed} unread counter(s) repaired'))
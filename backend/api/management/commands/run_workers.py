@@ -0,0 +1,61 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.tasks import run_worker
+
+
+def work(burst, poll_interval):
+    # each process opens its own database connection
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    run_worker(burst=burst, poll_interval=poll_interval)
+
+
+def start_workers(processes, burst, poll_interval):
+    # not daemonic: a render job starts its own process pool (api/rendering.py),
+    # which daemonic processes may not do; stop_workers() ends them instead
+    workers = [multiprocessing.Process(target=work, args=(burst, poll_interval)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def stop_workers(workers):
+    for worker in workers:
+        if worker.is_alive():
+            worker.terminate()
+    for worker in workers:
+        worker.join()
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers (see api/tasks.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds between polls when idle')
+
+    def handle(self, *args, **options):
+        processes = max(options['processes'], 1)
+        if processes == 1:
+            processed = run_worker(burst=options['burst'], poll_interval=options['poll_interval'])
+            self.stdout.write(self.style.SUCCESS(f'{processed} job(s) processed'))
+            return
+
+        # forked children must not share the parent's connection
+        connections.close_all()
+        workers = start_workers(processes, options['burst'], options['poll_interval'])
+        self.stdout.write(f'Started {processes} worker processes')
+
+        def terminate(signum, frame):
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, terminate)
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop_workers(workers)
@@ -0,0 +1,36 @@
+import time
+from dataclasses import fields
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.seeding import SEED_PASSWORD, SeedPlan, seed, seeded_users, unseed
+
+
+class Command(BaseCommand):
+    help = 'Seed a large synthetic conference, the same rows for the same --seed'
+
+    def add_arguments(self, parser):
+        defaults = SeedPlan()
+        for f in fields(SeedPlan):
+            parser.add_argument(f"--{f.name.replace('_', '-')}", type=int, default=getattr(defaults, f.name))
+        parser.add_argument('--scale', type=float, default=1.0, help='multiply every volume, e.g. 0.01 for a quick run')
+        parser.add_argument('--reset', action='store_true', help='delete previously seeded data first')
+
+    def handle(self, *args, **options):
+        if seeded_users().exists():
+            if not options['reset']:
+                raise CommandError('The database already holds seeded data; use --reset to replace it.')
+            deleted = unseed()
+            self.stdout.write(f'{deleted} seeded row(s) deleted')
+
+        plan = SeedPlan(**{f.name: options[f.name] for f in fields(SeedPlan)})
+        if options['scale'] != 1.0:
+            plan = plan.scaled(options['scale'])
+        started = time.perf_counter()
+        counts = seed(plan)
+        for label, count in counts.items():
+            self.stdout.write(f'  {label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded in {time.perf_counter() - started:.1f}s (seed {plan.seed}); '
+            f'users log in with password "{SEED_PASSWORD}"'
+        ))
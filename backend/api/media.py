@@ -0,0 +1,135 @@
+"""
+Protected media delivery.
+
+Views check permissions and then call ``serve_file``, which
+
+* answers ``If-None-Match`` / ``If-Modified-Since`` with 304 from the
+  storage metadata alone, without opening the file;
+* with ``PROTECTED_MEDIA_SERVER = 'nginx'`` or ``'apache'`` returns an empty
+  response carrying ``X-Accel-Redirect`` / ``X-Sendfile`` so the front server
+  sends the bytes (and handles ``Range`` itself);
+* otherwise streams the file from Python, honouring a single ``Range``
+  (with ``If-Range``) with a 206 response.
+"""
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_validators(field_file):
+    storage, name = field_file.storage, field_file.name
+    size = storage.size(name)
+    try:
+        modified = storage.get_modified_time(name).timestamp()
+    except NotImplementedError:
+        modified = None
+    etag = f'"{size:x}-{int((modified or 0) * 1000000):x}"'
+    return size, modified, etag
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single satisfiable byte range,
+    ``None`` when the header should be ignored (absent, malformed or multiple
+    ranges) and ``False`` when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        start, end = max(size - int(last), 0), size - 1
+        if int(last) == 0:
+            return False
+    if start >= size:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, modified):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith('"') or value.startswith('W/'):
+        return value == etag
+    since = parse_http_date_safe(value)
+    return since is not None and modified is not None and int(modified) <= since
+
+
+def read_range(handle, start, length):
+    with handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def offloaded_response(field_file, server):
+    response = HttpResponse()
+    if server == 'nginx':
+        response['X-Accel-Redirect'] = settings.PROTECTED_MEDIA_INTERNAL_URL.rstrip('/') + '/' + quote(field_file.name)
+    else:
+        response['X-Sendfile'] = field_file.path
+    # let the front server fill in the type from the file it sends
+    del response['Content-Type']
+    return response
+
+
+def serve_file(request, field_file, filename=None, as_attachment=True):
+    """Deliver ``field_file`` after the caller has checked permissions."""
+    try:
+        size, modified, etag = file_validators(field_file)
+    except FileNotFoundError:
+        # the row points at a file that is gone from storage
+        raise Http404('File not found')
+    last_modified = int(modified) if modified is not None else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    filename = filename or field_file.name.rsplit('/', 1)[-1]
+    server = getattr(settings, 'PROTECTED_MEDIA_SERVER', None)
+    if server in ('nginx', 'apache'):
+        response = offloaded_response(field_file, server)
+    else:
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range and if_range_matches(request, etag, modified):
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(field_file.open('rb'), start, end - start + 1),
+                status=206,
+                content_type=mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            response = FileResponse(field_file.open('rb'), filename=filename)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventStatistics',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='statistics', serialize=False, to='api.event')),
+                ('total_submissions', models.IntegerField(default=0)),
+                ('submissions_by_status', models.JSONField(default=dict)),
+                ('submissions_by_institution', models.JSONField(default=list)),
+                ('submissions_by_country', models.JSONField(default=list)),
+                ('total_registrations', models.IntegerField(default=0)),
+                ('registrations_by_type', models.JSONField(default=dict)),
+                ('registrations_by_country', models.JSONField(default=list)),
+                ('total_sessions', models.IntegerField(default=0)),
+                ('total_workshops', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from api.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend:
+        with schema_editor.connection.cursor() as cursor:
+            backend.create(cursor)
+            backend.rebuild(cursor)
+
+
+def drop_search_index(apps, schema_editor):
+    from api.search import get_backend
+
+    backend = get_backend(schema_editor.connection)
+    if backend:
+        with schema_editor.connection.cursor() as cursor:
+            backend.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_unreadcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_submission_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Keyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+                ('submissions', models.ManyToManyField(blank=True, related_name='keyword_index', to='api.submission')),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_respondents(apps, schema_editor):
+    Survey = apps.get_model('api', 'Survey')
+    SurveyResponse = apps.get_model('api', 'SurveyResponse')
+    respondents = (
+        SurveyResponse.objects.filter(survey=OuterRef('pk')).order_by()
+        .values('survey').annotate(total=Count('user', distinct=True)).values('total')
+    )
+    Survey.objects.update(respondents_count=Coalesce(Subquery(respondents), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='survey',
+            name='respondents_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='surveyresponse',
+            constraint=models.UniqueConstraint(fields=('question', 'user'), name='survey_response_unique_answer'),
+        ),
+        migrations.RunPython(backfill_respondents, migrations.RunPython.noop),
+    ]
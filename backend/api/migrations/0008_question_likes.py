@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_likes_count(apps, schema_editor):
+    Question = apps.get_model('api', 'Question')
+    QuestionLikes = apps.get_model('api', 'QuestionLikes')
+    likes = (
+        QuestionLikes.objects.filter(question=OuterRef('pk')).order_by()
+        .values('question').annotate(total=Count('id')).values('total')
+    )
+    Question.objects.update(likes_count=Coalesce(Subquery(likes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_survey_respondents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['session', '-likes_count'], name='question_session_likes_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='questionlikes',
+            constraint=models.UniqueConstraint(fields=('question', 'user'), name='question_like_unique'),
+        ),
+        migrations.RunPython(backfill_likes_count, migrations.RunPython.noop),
+    ]
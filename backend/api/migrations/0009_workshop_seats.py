@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_seats_taken(apps, schema_editor):
+    Workshop = apps.get_model('api', 'Workshop')
+    through = Workshop.participants.through
+    taken = (
+        through.objects.filter(workshop=OuterRef('pk')).order_by()
+        .values('workshop').annotate(total=Count('id')).values('total')
+    )
+    Workshop.objects.update(seats_taken=Coalesce(Subquery(taken), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_question_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workshop',
+            name='seats_taken',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='WorkshopWaitlist',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workshop_waitlists', to=settings.AUTH_USER_MODEL)),
+                ('workshop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='api.workshop')),
+            ],
+            options={
+                'ordering': ['id'],
+                'constraints': [models.UniqueConstraint(fields=('workshop', 'user'), name='workshop_waitlist_unique_user')],
+            },
+        ),
+        migrations.RunPython(backfill_seats_taken, migrations.RunPython.noop),
+    ]
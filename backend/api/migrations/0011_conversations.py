@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_conversations(apps, schema_editor):
+    Message = apps.get_model('api', 'Message')
+    Conversation = apps.get_model('api', 'Conversation')
+    ConversationParticipant = apps.get_model('api', 'ConversationParticipant')
+    conversations = {}
+    participants = {}
+    pending = []
+
+    def flush():
+        Message.objects.bulk_update(pending, ['conversation'])
+        pending.clear()
+
+    messages = Message.objects.order_by('sent_at', 'id').only(
+        'id', 'sender_id', 'recipient_id', 'related_event_id', 'is_read', 'sent_at'
+    )
+    for message in messages.iterator(chunk_size=2000):
+        low, high = sorted((message.sender_id, message.recipient_id))
+        key = (low, high, message.related_event_id)
+        conversation = conversations.get(key)
+        if conversation is None:
+            conversation = conversations[key] = Conversation.objects.create(
+                user_low_id=low, user_high_id=high, related_event_id=message.related_event_id,
+                last_activity=message.sent_at,
+            )
+            for user_id, other_id in {(low, high), (high, low)}:
+                participants[conversation.id, user_id] = ConversationParticipant(
+                    conversation=conversation, user_id=user_id, other_user_id=other_id,
+                )
+        conversation.last_message_id = message.id
+        conversation.last_activity = message.sent_at
+        if not message.is_read:
+            participants[conversation.id, message.recipient_id].unread_count += 1
+        message.conversation_id = conversation.id
+        pending.append(message)
+        if len(pending) >= 2000:
+            flush()
+    flush()
+
+    Conversation.objects.bulk_update(conversations.values(), ['last_message', 'last_activity'], batch_size=2000)
+    for participant in participants.values():
+        participant.last_activity = participant.conversation.last_activity
+    ConversationParticipant.objects.bulk_create(participants.values(), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.message')),
+                ('related_event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='conversations', to='api.event')),
+                ('user_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='api.conversation'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', '-sent_at', '-id'], name='message_conversation_sent_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='api.conversation'),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='other_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('related_event__isnull', True)), fields=('user_low', 'user_high'), name='conversation_unique_pair'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(condition=models.Q(('related_event__isnull', False)), fields=('user_low', 'user_high', 'related_event'), name='conversation_unique_pair_event'),
+        ),
+        migrations.AddIndex(
+            model_name='conversationparticipant',
+            index=models.Index(fields=['user', '-last_activity', '-id'], name='inbox_user_activity_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationparticipant',
+            constraint=models.UniqueConstraint(fields=('conversation', 'user'), name='conversation_participant_unique'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:21
+
+from django.db import migrations, models
+
+
+def drop_materialized_rows(apps, schema_editor):
+    #the rows held top-10 lists, which cannot be turned into full breakdowns;
+    #each row is rebuilt on the next read of its event's statistics
+    apps.get_model('api', 'EventStatistics').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_materialized_rows, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='eventstatistics',
+            name='registrations_by_country',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name='eventstatistics',
+            name='submissions_by_country',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name='eventstatistics',
+            name='submissions_by_institution',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:40
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def seed_unread_counters(apps, schema_editor):
+    #every user gets a row, so no read ever has to build one under concurrent writes
+    User = apps.get_model('api', 'User')
+    UnreadCounter = apps.get_model('api', 'UnreadCounter')
+    Notification = apps.get_model('api', 'Notification')
+    Message = apps.get_model('api', 'Message')
+    notifications = dict(
+        Notification.objects.filter(is_read=False).order_by().values('user_id').annotate(n=Count('pk')).values_list('user_id', 'n')
+    )
+    messages = dict(
+        Message.objects.filter(is_read=False).order_by().values('recipient_id').annotate(n=Count('pk')).values_list('recipient_id', 'n')
+    )
+    missing = User.objects.filter(unread_counter__isnull=True).values_list('id', flat=True)
+    UnreadCounter.objects.bulk_create(
+        (
+            UnreadCounter(user_id=user_id, unread_notifications=notifications.get(user_id, 0), unread_messages=messages.get(user_id, 0))
+            for user_id in missing.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_event_statistics_breakdowns'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_unread_counters, migrations.RunPython.noop),
+    ]
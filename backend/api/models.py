@@ -2,6 +2,79 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from django.db.models import Avg, Count, F, FloatField, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    #correlated COUNT(*) of `model` rows pointing at the outer row through `field`
+    #(avoids the row fan-out of joining several reverse relations in one query)
+    counts = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class EventQuerySet(models.QuerySet):
+
+    def with_counts(self):
+        #annotations read by EventListSerializer / EventDetailSerializer
+        return self.select_related('organizer').annotate(
+            sessions_count=count_subquery(Session, 'event'),
+            registrations_count=count_subquery(Registration, 'event'),
+            submissions_count=count_subquery(Submission, 'event'),
+        )
+
+    def for_detail(self):
+        return self.with_counts().prefetch_related(
+            Prefetch('sessions', queryset=Session.objects.select_related('chair').with_counts()),
+            'scientific_committee',
+        )
+
+
+class SessionQuerySet(models.QuerySet):
+
+    def with_counts(self):
+        return self.annotate(submissions_count=count_subquery(Submission, 'session'))
+
+
+class SubmissionQuerySet(models.QuerySet):
+
+    def with_scores(self):
+        #mean of the per-review (relevance + quality + originality) / 3, computed in SQL
+        scores = (
+            Review.objects.filter(submission=OuterRef('pk'))
+            .order_by()
+            .values('submission')
+            .annotate(avg=Avg(F('relevance_score') + F('quality_score') + F('originality_score'), output_field=FloatField()) / 3.0)
+            .values('avg')
+        )
+        return self.annotate(
+            average_score=Subquery(scores, output_field=FloatField()),
+            reviews_count=count_subquery(Review, 'submission'),
+        )
+
+    def for_listing(self):
+        #everything SubmissionSerializer touches, in a fixed number of queries
+        return self.with_scores().select_related('author').prefetch_related(
+            Prefetch('session', queryset=Session.objects.select_related('chair').with_counts()),
+            Prefetch('reviews', queryset=Review.objects.select_related('reviewer')),
+            'assigned_reviewers',
+        )
+
+
+class WorkshopQuerySet(models.QuerySet):
+
+    def for_listing(self):
+        #WorkshopSerializer lists the participant ids, only fetch those
+        return self.select_related('leader').prefetch_related(
+            Prefetch('participants', queryset=User.objects.only('id')),
+        )
+
 
 #custom User model for all the users
 class User(AbstractUser):
@@ -90,8 +163,15 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = EventQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['-start_date', '-id'], name='event_start_date_idx'),
+            models.Index(fields=['status', 'start_date'], name='event_status_start_idx'),
+            models.Index(fields=['organizer', '-created_at'], name='event_organizer_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.start_date.year})"
@@ -121,8 +201,13 @@ class Session(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = SessionQuerySet.as_manager()
+    
     class Meta:
         ordering = ['date', 'start_time']
+        indexes = [
+            models.Index(fields=['event', 'date', 'start_time'], name='session_event_schedule_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.date}"
@@ -167,8 +252,15 @@ class Submission(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = SubmissionQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['event', '-submitted_at'], name='submission_event_submitted_idx'),
+            models.Index(fields=['event', 'status', '-submitted_at'], name='submission_event_status_idx'),
+            models.Index(fields=['author', '-submitted_at'], name='submission_author_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.author.email}"
@@ -231,6 +323,9 @@ class Registration(models.Model):
     
     class Meta:
         unique_together = ['event', 'user']
+        indexes = [
+            models.Index(fields=['user', '-registered_at'], name='registration_user_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} - {self.event.title}"
@@ -249,6 +344,8 @@ class Workshop(models.Model):
     end_time = models.TimeField()
     room = models.CharField(max_length=100)
     max_participants = models.IntegerField()
+    #seats held by participants, only changed by api/workshops.py with conditional updates
+    seats_taken = models.PositiveIntegerField(default=0)
     
     # Materials
     materials = models.FileField(upload_to='workshops/materials/', null=True, blank=True)
@@ -257,11 +354,31 @@ class Workshop(models.Model):
     participants = models.ManyToManyField(User, related_name='attended_workshops', blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = WorkshopQuerySet.as_manager()
     
     def __str__(self):
         return f"{self.title} - {self.date}"
     
 
+#People waiting for a seat in a full workshop, served first come first served
+class WorkshopWaitlist(models.Model):
+
+
+    workshop = models.ForeignKey(Workshop, on_delete=models.CASCADE, related_name='waitlist')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workshop_waitlists')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['workshop', 'user'], name='workshop_waitlist_unique_user'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} waiting for {self.workshop.title}"
+
+
 #Questions asked during sessions
 class Question(models.Model):
     
@@ -271,11 +388,17 @@ class Question(models.Model):
     content = models.TextField()
     is_answered = models.BooleanField(default=False)
     answer = models.TextField(blank=True)
+    #kept in step with QuestionLikes by signals (api/signals.py)
+    likes_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['session', '-likes_count'], name='question_session_likes_idx'),
+            models.Index(fields=['session', '-created_at', '-id'], name='question_session_created_idx'),
+        ]
     
     def __str__(self):
         return f"Question by {self.user.email} in {self.session.title}"
@@ -285,6 +408,11 @@ class QuestionLikes(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'user'], name='question_like_unique'),
+        ]
+
 #postsession surveys
 class Survey(models.Model):
     
@@ -294,6 +422,8 @@ class Survey(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
+    #distinct users who answered, maintained on submission (api/surveys.py)
+    respondents_count = models.PositiveIntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -336,6 +466,11 @@ class SurveyResponse(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'user'], name='survey_response_unique_answer'),
+        ]
+    
     def __str__(self):
         return f"Response by {self.user.email}"
 
@@ -372,15 +507,74 @@ class Message(models.Model):
     content = models.TextField()
     is_read = models.BooleanField(default=False)
     related_event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True)
+    #set on send from the participant pair (api/conversations.py)
+    conversation = models.ForeignKey('Conversation', on_delete=models.CASCADE, null=True, blank=True, related_name='messages')
     
     sent_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['sender', '-sent_at', '-id'], name='message_sender_sent_idx'),
+            models.Index(fields=['recipient', '-sent_at', '-id'], name='message_recipient_sent_idx'),
+            models.Index(fields=['conversation', '-sent_at', '-id'], name='message_conversation_sent_idx'),
+            #only unread rows: what the counters and mark_read() look up
+            models.Index(fields=['recipient'], condition=models.Q(is_read=False), name='message_recipient_unread_idx'),
+        ]
     
     def __str__(self):
         return f"From {self.sender.email} to {self.recipient.email}"
 
+#Message thread between two users, optionally about one event
+class Conversation(models.Model):
+
+
+    #the pair is stored ordered (user_low.id <= user_high.id) so it has a single key
+    user_low = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    user_high = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    #an event's threads are folded into the pair-only one before it is deleted (api/conversations.py)
+    related_event = models.ForeignKey(Event, on_delete=models.SET_NULL, null=True, blank=True, related_name='conversations')
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(default=timezone.now)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user_low', 'user_high'], condition=models.Q(related_event__isnull=True),
+                name='conversation_unique_pair',
+            ),
+            models.UniqueConstraint(
+                fields=['user_low', 'user_high', 'related_event'], condition=models.Q(related_event__isnull=False),
+                name='conversation_unique_pair_event',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Conversation {self.user_low_id} / {self.user_high_id}"
+
+#One row per user and conversation: the inbox is a scan of these
+class ConversationParticipant(models.Model):
+
+
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations')
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_activity = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='conversation_participant_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_activity', '-id'], name='inbox_user_activity_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in conversation {self.conversation_id}"
+
 #System notifications
 class Notification(models.Model):
     
@@ -406,6 +600,105 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_user_created_idx'),
+            models.Index(fields=['user'], condition=models.Q(is_read=False), name='notification_user_unread_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} for {self.user.email}"
+
+#Materialized per-event statistics, kept up to date by api/signals.py
+class EventStatistics(models.Model):
+    
+    
+    event = models.OneToOneField(Event, on_delete=models.CASCADE, primary_key=True, related_name='statistics')
+    
+    # Submissions
+    total_submissions = models.IntegerField(default=0)
+    submissions_by_status = models.JSONField(default=dict)
+    #full {value: count} breakdowns, maintained by deltas (api/stats.py)
+    submissions_by_institution = models.JSONField(default=dict)
+    submissions_by_country = models.JSONField(default=dict)
+    
+    # Registrations
+    total_registrations = models.IntegerField(default=0)
+    registrations_by_type = models.JSONField(default=dict)
+    registrations_by_country = models.JSONField(default=dict)
+    
+    # Program
+    total_sessions = models.IntegerField(default=0)
+    total_workshops = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Statistics for {self.event.title}"
+
+
+#Denormalized unread badges, maintained by api/counters.py
+class UnreadCounter(models.Model):
+    
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='unread_counter')
+    unread_notifications = models.IntegerField(default=0)
+    unread_messages = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"Unread counters for {self.user.email}"
+
+
+#Normalized (case-folded, deduplicated) submission keywords, see api/keywords.py
+class Keyword(models.Model):
+    
+    
+    name = models.CharField(max_length=200, unique=True)
+    submissions = models.ManyToManyField(Submission, related_name='keyword_index', blank=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+#Background jobs, run by `python manage.py run_workers` (see api/tasks.py)
+class Job(models.Model):
+    
+    
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    
+    # Retries
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    
+    # Visibility timeout: a running job whose lock expired is picked up again
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.title} for {self.user.email}"
\ No newline at end of file
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,72 @@
+"""
+Batched notification delivery.
+
+``send_notifications`` inserts many ``Notification`` rows in batches and does
+the bookkeeping the per-row signals would otherwise do (unread counters,
+dashboard cache). Used directly by bulk operations and by the background
+tasks in ``api/tasks.py``.
+"""
+from collections import Counter
+
+from django.db import transaction
+
+from .counters import adjust_unread_many
+from .models import Notification, Registration
+
+BROADCAST_BATCH_SIZE = 500
+
+
+def send_notifications(notifications, batch_size=500):
+    notifications = list(notifications)
+    if not notifications:
+        return 0
+    with transaction.atomic():
+        Notification.objects.bulk_create(notifications, batch_size=batch_size)
+        unread = Counter(n.user_id for n in notifications if not n.is_read)
+        adjust_unread_many('unread_notifications', unread)
+    return len(notifications)
+
+
+def notify_users(user_ids, notification_type, title, message, related_event_id=None, batch_size=500):
+    return send_notifications((
+        Notification(
+            user_id=user_id,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            related_event_id=related_event_id,
+        )
+        for user_id in user_ids
+    ), batch_size=batch_size)
+
+
+def notify_registrants(event_id, notification_type, title, message, since=None, batch_size=None):
+    """
+    Fan out to every registrant, one committed batch at a time, so a large
+    event never holds the write lock for the whole broadcast. A retried
+    broadcast passes ``since`` (when it was queued) and skips the users an
+    earlier attempt already reached.
+    """
+    batch_size = batch_size or BROADCAST_BATCH_SIZE
+    user_ids = Registration.objects.filter(event_id=event_id).order_by('user_id').values_list('user_id', flat=True)
+    sent, batch = 0, []
+    for user_id in user_ids.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            sent += _notify_batch(batch, notification_type, title, message, event_id, since)
+            batch = []
+    if batch:
+        sent += _notify_batch(batch, notification_type, title, message, event_id, since)
+    return sent
+
+
+def _notify_batch(user_ids, notification_type, title, message, event_id, since):
+    if since is not None:
+        reached = set(
+            Notification.objects.filter(
+                user_id__in=user_ids, related_event_id=event_id, notification_type=notification_type,
+                title=title, created_at__gte=since,
+            ).values_list('user_id', flat=True)
+        )
+        user_ids = [user_id for user_id in user_ids if user_id not in reached]
+    return notify_users(user_ids, notification_type, title, message, event_id)
@@ -0,0 +1,135 @@
+"""
+Opt-in keyset (cursor) pagination for time-ordered feeds.
+
+``PageNumberPagination`` stays the default. A request that sends
+``?cursor=<token>`` (or ``?pagination=cursor`` for the first page) is
+paginated by ``(timestamp, id)`` instead:
+
+* the page is ``WHERE (ts, id) < (cursor_ts, cursor_id) ORDER BY ts DESC,
+  id DESC LIMIT n + 1``, which a composite index on
+  ``(owner, -ts, -id)`` answers without scanning the skipped rows;
+* no ``COUNT(*)`` is run and the response only carries ``next``;
+* rows inserted while a client pages appear at the top of the feed and
+  never shift or duplicate the rows on later pages.
+
+Cursor mode always orders newest first; ``?ordering=`` only applies to
+page-number pagination.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    timestamp_field = 'created_at'
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, timestamp_field=None):
+        if timestamp_field:
+            self.timestamp_field = timestamp_field
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, ''))
+        except ValueError:
+            size = api_settings.PAGE_SIZE or 20
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, timestamp, pk):
+        raw = f'{timestamp.isoformat()}|{pk}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+            timestamp, pk = raw.rsplit('|', 1)
+            return datetime.fromisoformat(timestamp), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        field = self.timestamp_field
+        queryset = queryset.order_by(f'-{field}', '-id')
+
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            timestamp, pk = self.decode_cursor(token)
+            queryset = queryset.filter(Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk}))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        page = rows[:self.page_size]
+        self.next_cursor = self.encode_cursor(getattr(page[-1], field), page[-1].pk) if self.has_next else None
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'pagination')
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class OptInCursorPagination(BasePagination):
+    """Page numbers by default, keyset pagination on ``timestamp_field`` when asked for."""
+    timestamp_field = 'created_at'
+
+    def __init__(self):
+        self.active = PageNumberPagination()
+
+    @staticmethod
+    def wants_cursor(request):
+        return 'cursor' in request.query_params or request.query_params.get('pagination') == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_cursor(request):
+            self.active = KeysetPagination(self.timestamp_field)
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return PageNumberPagination().get_paginated_response_schema(schema)
+
+
+class SentAtCursorPagination(OptInCursorPagination):
+    timestamp_field = 'sent_at'
+
+
+class CreatedAtCursorPagination(OptInCursorPagination):
+    timestamp_field = 'created_at'
+
+
+class LastActivityCursorPagination(OptInCursorPagination):
+    timestamp_field = 'last_activity'
+
+
+class ThreadPagination(KeysetPagination):
+    """Conversation threads are always paginated by cursor."""
+    timestamp_field = 'sent_at'
@@ -0,0 +1,145 @@
+"""
+Query plan audit.
+
+Each list route of ``api/urls.py`` is called against the loaded data (see
+``api/endpoints.py``). Every SELECT it runs is then explained:
+
+* SQLite: ``EXPLAIN QUERY PLAN``. A ``SCAN <table>`` step that uses no
+  index, or a ``USING AUTOMATIC ... INDEX`` step (SQLite building a
+  throwaway index because no real one fits), is a full scan.
+* PostgreSQL: ``EXPLAIN (FORMAT JSON)`` with ``enable_seqscan`` off for the
+  transaction. On small tables the planner picks a sequential scan even
+  when an index exists. With sequential scans discouraged, a ``Seq Scan``
+  that is still in the plan means no index can serve the query, whatever
+  the table size.
+
+Scans listed in ``EXPECTED_SCANS`` are reported but not counted as
+failures.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+
+from .endpoints import Samples, representative_call, list_routes
+
+# route name -> tables that route reads in full by design
+EXPECTED_SCANS = {
+    # the user directory pages over every account
+    'users': {'api_user'},
+}
+
+SQLITE_ALIAS = re.compile(r'"(\w+)" (?:AS )?"?([A-Z]\d+)"?')
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?"?(\w+)"?(?: AS (\w+))?(.*)$')
+
+
+@dataclass
+class ExplainedQuery:
+    sql: str
+    plan: list
+    scans: list
+    sorts: bool = False
+
+
+@dataclass
+class RouteAudit:
+    name: str
+    url: str = ''
+    skipped: str = ''
+    queries: list = field(default_factory=list)
+
+    @property
+    def scans(self):
+        return sorted({table for query in self.queries for table in query.scans})
+
+    @property
+    def unexpected_scans(self):
+        return [table for table in self.scans if table not in EXPECTED_SCANS.get(self.name, ())]
+
+
+def is_select(sql):
+    return sql.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+
+def explain_sqlite(sql, params):
+    aliases = {alias: table for table, alias in SQLITE_ALIAS.findall(sql)}
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        plan = [row[-1] for row in cursor.fetchall()]
+    scans = []
+    for step in plan:
+        match = SQLITE_SCAN.match(step)
+        if match:
+            name, rest = match.group(1), match.group(3)
+            if name == 'CONSTANT' or ('INDEX' in rest and 'AUTOMATIC' not in rest):
+                continue
+            scans.append(aliases.get(name, name))
+        elif 'AUTOMATIC' in step and step.startswith('SEARCH '):
+            name = step.split()[1]
+            scans.append(aliases.get(name, name))
+    sorts = any(step.startswith('USE TEMP B-TREE FOR ORDER BY') for step in plan)
+    return plan, scans, sorts
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def explain_postgresql(sql, params):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        document = cursor.fetchone()[0]
+    if isinstance(document, str):
+        document = json.loads(document)
+    root = document[0]['Plan']
+    plan, scans, sorts = [], [], False
+    for node in plan_nodes(root):
+        relation = node.get('Relation Name')
+        plan.append(f"{node['Node Type']}{' on ' + relation if relation else ''}")
+        if node['Node Type'] == 'Seq Scan':
+            scans.append(relation)
+        if node['Node Type'] == 'Sort':
+            sorts = True
+    return plan, scans, sorts
+
+
+EXPLAINERS = {
+    'sqlite': explain_sqlite,
+    'postgresql': explain_postgresql,
+}
+
+
+def explain(sql, params):
+    explainer = EXPLAINERS.get(connection.vendor)
+    if explainer is None:
+        raise NotImplementedError(f'no query plan support for {connection.vendor}')
+    return ExplainedQuery(sql, *explainer(sql, params))
+
+
+def audit_route(route, samples):
+    result = representative_call(route, samples)
+    if result is None:
+        return RouteAudit(route.name, skipped='no sample data or no sample user may read it')
+    audit = RouteAudit(route.name, url=result.url)
+    seen = set()
+    for sql, params in result.queries:
+        if is_select(sql) and sql not in seen:
+            seen.add(sql)
+            audit.queries.append(explain(sql, params))
+    return audit
+
+
+def audit_list_routes(names=None):
+    """Explain the queries of every list route; runs in a transaction that is rolled back."""
+    with transaction.atomic():
+        samples = Samples()
+        audits = [
+            audit_route(route, samples) for route in list_routes()
+            if not names or route.name in names
+        ]
+        transaction.set_rollback(True)
+    return audits
@@ -0,0 +1,47 @@
+"""
+Session Q&A likes.
+
+``QuestionLikes`` has a unique (question, user) constraint, so a double click
+or a retried request can never double-like: ``add_like`` inserts inside a
+savepoint and treats the IntegrityError as "already liked".
+``Question.likes_count`` is kept in step by the QuestionLikes post_save
+(created) and post_delete receivers in api/signals.py, whichever way a like
+is added or removed (API, admin, shell). Listing and ranking questions
+therefore never count likes.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework.filters import OrderingFilter
+
+from .models import Question, QuestionLikes
+
+
+def add_like(question, user):
+    """Like ``question`` once per user; returns ``(created, likes_count)``."""
+    try:
+        with transaction.atomic():
+            QuestionLikes.objects.create(question=question, user=user)
+        created = True
+    except IntegrityError:
+        created = False
+    likes_count = Question.objects.filter(pk=question.pk).values_list('likes_count', flat=True).first()
+    return created, likes_count
+
+
+class QuestionOrderingFilter(OrderingFilter):
+    """``?ordering=-likes`` ranks by the stored counter (session, likes_count index)."""
+    ordering_fields = ['created_at', 'likes_count']
+    aliases = {'likes': 'likes_count'}
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if params:
+            terms = []
+            for term in params.split(','):
+                term = term.strip()
+                prefix = '-' if term.startswith('-') else ''
+                terms.append(prefix + self.aliases.get(term.lstrip('-'), term.lstrip('-')))
+            ordering = self.remove_invalid_fields(queryset, terms, view, request)
+            if ordering:
+                # newest first among questions with the same number of likes
+                return ordering + ['-id']
+        return self.get_default_ordering(view)
@@ -0,0 +1,189 @@
+"""
+Certificate PDF rendering.
+
+The static part of an event's certificate (border, event title, dates,
+venue, signature line) is drawn once per worker process; each certificate
+then only stamps the recipient's name and the certificate type onto a copy
+of that template and saves it as a one-page PDF under ``certificates/``.
+
+Certificates without a file are the work queue: rendering walks them in
+id-ordered batches, commits every batch, and can therefore be interrupted
+and resumed at any point. Batches are rendered by a process pool.
+"""
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from .models import Certificate, Event
+
+PAGE_SIZE = (1754, 1240)  # A4 landscape at 150 dpi
+RESOLUTION = 150
+INK = (30, 41, 59)
+ACCENT = (37, 99, 235)
+
+TYPE_LINES = {
+    'participation': 'for participating in',
+    'presentation': 'for presenting a communication at',
+    'committee': 'for serving on the scientific committee of',
+    'organization': 'for organizing',
+}
+
+_template_cache = {}
+
+
+def template_spec(event):
+    return {
+        'event_id': event.id,
+        'version': event.updated_at.isoformat(),
+        'title': event.title,
+        'dates': f'{event.start_date:%d %B %Y} - {event.end_date:%d %B %Y}',
+        'place': ', '.join(part for part in (event.venue, event.city, event.country) if part),
+        'organizer': event.organizer.get_full_name() or event.organizer.username,
+    }
+
+
+def _font(size):
+    from PIL import ImageFont
+    return ImageFont.load_default(size=size)
+
+
+def _centered(draw, y, text, size, fill=INK):
+    font = _font(size)
+    width = draw.textlength(text, font=font)
+    draw.text(((PAGE_SIZE[0] - width) / 2, y), text, font=font, fill=fill)
+
+
+def build_template(spec):
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', PAGE_SIZE, 'white')
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([40, 40, PAGE_SIZE[0] - 40, PAGE_SIZE[1] - 40], outline=ACCENT, width=12)
+    draw.rectangle([70, 70, PAGE_SIZE[0] - 70, PAGE_SIZE[1] - 70], outline=INK, width=2)
+    _centered(draw, 170, 'CERTIFICATE', 96, fill=ACCENT)
+    _centered(draw, 300, 'This certifies that', 40)
+    _centered(draw, 680, spec['title'], 60)
+    _centered(draw, 780, spec['dates'], 36)
+    _centered(draw, 830, spec['place'], 36)
+    draw.line([1100, 1040, 1550, 1040], fill=INK, width=2)
+    draw.text((1100, 1055), spec['organizer'], font=_font(30), fill=INK)
+    return image
+
+
+def get_template(spec):
+    key = (spec['event_id'], spec['version'])
+    template = _template_cache.get(key)
+    if template is None:
+        _template_cache.clear()
+        template = _template_cache[key] = build_template(spec)
+    return template
+
+
+def render_pdf(spec, name, certificate_type):
+    from PIL import ImageDraw
+
+    image = get_template(spec).copy()
+    draw = ImageDraw.Draw(image)
+    _centered(draw, 400, name, 84)
+    _centered(draw, 560, TYPE_LINES.get(certificate_type, ''), 40)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PDF', resolution=RESOLUTION)
+    return buffer.getvalue()
+
+
+def file_name(event_id, certificate_id):
+    return f'certificates/event_{event_id}/certificate_{certificate_id}.pdf'
+
+
+def render_batch(spec, rows):
+    """Render and store one batch; returns [(certificate_id, stored_name), ...]."""
+    stored = []
+    for certificate_id, name, certificate_type in rows:
+        path = file_name(spec['event_id'], certificate_id)
+        if default_storage.exists(path):
+            default_storage.delete(path)
+        stored.append((certificate_id, default_storage.save(path, ContentFile(render_pdf(spec, name, certificate_type)))))
+    return stored
+
+
+def _init_worker(spec):
+    # workers never touch the database, they only render and store files
+    get_template(spec)
+
+
+def pending_certificates(event_id):
+    return Certificate.objects.filter(event_id=event_id).filter(Q(certificate_file='') | Q(certificate_file__isnull=True))
+
+
+def render_progress(event_id):
+    total = Certificate.objects.filter(event_id=event_id).count()
+    pending = pending_certificates(event_id).count()
+    return {'total': total, 'rendered': total - pending, 'pending': pending}
+
+
+def _batches(event_id, batch_size):
+    #keyset walk over the pending certificates, one batch of rows at a time
+    last_id = 0
+    while True:
+        rows = list(
+            pending_certificates(event_id)
+            .filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'user__first_name', 'user__last_name', 'user__username', 'certificate_type')[:batch_size]
+        )
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield [
+            (certificate_id, f'{first} {last}'.strip() or username, certificate_type)
+            for certificate_id, first, last, username, certificate_type in rows
+        ]
+
+
+def _save(stored):
+    certificates = [Certificate(id=certificate_id, certificate_file=name) for certificate_id, name in stored]
+    Certificate.objects.bulk_update(certificates, ['certificate_file'])
+
+
+def render_certificates(event_id, processes=None, batch_size=200, on_batch=None):
+    """
+    Render every certificate of ``event_id`` that has no file yet.
+
+    ``processes=0`` renders in-process, and so does a daemonic process, which
+    may not start children; otherwise a pool of ``processes`` workers
+    (default: one per CPU) renders batches while this process walks the
+    pending rows and records finished files batch by batch. ``on_batch``
+    is called after each recorded batch (the job queue's heartbeat). Returns
+    the final progress counts.
+    """
+    event = Event.objects.select_related('organizer').get(id=event_id)
+    spec = template_spec(event)
+
+    def save(stored):
+        _save(stored)
+        if on_batch is not None:
+            on_batch()
+
+    if processes == 0 or multiprocessing.current_process().daemon:
+        for rows in _batches(event_id, batch_size):
+            save(render_batch(spec, rows))
+        return render_progress(event_id)
+
+    processes = processes or os.cpu_count() or 1
+    # forked workers inherit the configured Django settings and storage
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context, initializer=_init_worker, initargs=(spec,)) as pool:
+        in_flight = []
+        for rows in _batches(event_id, batch_size):
+            in_flight.append(pool.submit(render_batch, spec, rows))
+            # keep a bounded number of batches queued so memory stays flat
+            while len(in_flight) >= processes * 2:
+                save(in_flight.pop(0).result())
+        for future in in_flight:
+            save(future.result())
+    return render_progress(event_id)
@@ -0,0 +1,224 @@
+"""
+Full-text search over submissions.
+
+The index lives next to ``api_submission`` in a side table maintained on
+``Submission`` save/delete (``api/signals.py``):
+
+* SQLite: an FTS5 virtual table ``api_submission_fts`` whose rowid is the
+  submission id, ranked with ``bm25()`` and highlighted with ``snippet()``.
+* PostgreSQL: ``api_submission_search`` holding a weighted ``tsvector`` with
+  a GIN index, ranked with ``ts_rank_cd()`` and highlighted with
+  ``ts_headline()``.
+
+Other databases fall back to ``icontains`` lookups.
+"""
+import re
+
+from django.db import connection
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SQLiteBackend:
+    table = 'api_submission_fts'
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+            "title, abstract, keywords, co_authors, tokenize='porter unicode61 remove_diacritics 2')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def rebuild(self, cursor):
+        cursor.execute(f'DELETE FROM {self.table}')
+        cursor.execute(
+            f'INSERT INTO {self.table} (rowid, title, abstract, keywords, co_authors) '
+            'SELECT id, title, abstract, keywords, co_authors FROM api_submission'
+        )
+
+    def index(self, cursor, submission_id):
+        self.remove(cursor, submission_id)
+        cursor.execute(
+            f'INSERT INTO {self.table} (rowid, title, abstract, keywords, co_authors) '
+            'SELECT id, title, abstract, keywords, co_authors FROM api_submission WHERE id = %s',
+            [submission_id],
+        )
+
+    def remove(self, cursor, submission_id):
+        cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [submission_id])
+
+    def match_expression(self, query):
+        # quote every token so user input can never be parsed as FTS5 syntax
+        return ' '.join('"%s"' % token for token in TOKEN_RE.findall(query))
+
+    def matching_ids(self, query):
+        return RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [self.match_expression(query)])
+
+    def rank(self, query):
+        # bm25() is lower-is-better; title and keywords weigh more than the abstract
+        return RawSQL(
+            f'SELECT -bm25({self.table}, 10.0, 1.0, 5.0, 2.0) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = api_submission.id',
+            [self.match_expression(query)],
+            output_field=FloatField(),
+        )
+
+    def snippets(self, cursor, query, ids):
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(
+            f"SELECT rowid, snippet({self.table}, -1, %s, %s, '…', 24) FROM {self.table} "
+            f'WHERE {self.table} MATCH %s AND rowid IN ({placeholders})',
+            [HIGHLIGHT_START, HIGHLIGHT_END, self.match_expression(query), *ids],
+        )
+        return dict(cursor.fetchall())
+
+
+class PostgreSQLBackend:
+    table = 'api_submission_search'
+    config = 'english'
+
+    def document(self):
+        return (
+            f"setweight(to_tsvector('{self.config}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(keywords, '')), 'B') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(abstract, '')), 'C') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(co_authors, '')), 'D')"
+        )
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.table} ('
+            'submission_id bigint PRIMARY KEY REFERENCES api_submission (id) ON DELETE CASCADE, '
+            'document tsvector NOT NULL)'
+        )
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin ON {self.table} USING GIN (document)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def rebuild(self, cursor):
+        cursor.execute(f'TRUNCATE {self.table}')
+        cursor.execute(f'INSERT INTO {self.table} (submission_id, document) SELECT id, {self.document()} FROM api_submission')
+
+    def index(self, cursor, submission_id):
+        cursor.execute(
+            f'INSERT INTO {self.table} (submission_id, document) '
+            f'SELECT id, {self.document()} FROM api_submission WHERE id = %s '
+            'ON CONFLICT (submission_id) DO UPDATE SET document = EXCLUDED.document',
+            [submission_id],
+        )
+
+    def remove(self, cursor, submission_id):
+        cursor.execute(f'DELETE FROM {self.table} WHERE submission_id = %s', [submission_id])
+
+    def tsquery(self):
+        return f"websearch_to_tsquery('{self.config}', %s)"
+
+    def matching_ids(self, query):
+        return RawSQL(f'SELECT submission_id FROM {self.table} WHERE document @@ {self.tsquery()}', [query])
+
+    def rank(self, query):
+        return RawSQL(
+            f'SELECT ts_rank_cd(document, {self.tsquery()}) FROM {self.table} '
+            'WHERE submission_id = api_submission.id',
+            [query],
+            output_field=FloatField(),
+        )
+
+    def snippets(self, cursor, query, ids):
+        cursor.execute(
+            f"SELECT id, ts_headline('{self.config}', abstract, {self.tsquery()}, %s) "
+            'FROM api_submission WHERE id = ANY(%s)',
+            [query, f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=2', list(ids)],
+        )
+        return dict(cursor.fetchall())
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgresql': PostgreSQLBackend,
+}
+
+
+def get_backend(conn=connection):
+    backend = BACKENDS.get(conn.vendor)
+    return backend() if backend else None
+
+
+def index_submission(submission_id):
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.index(cursor, submission_id)
+
+
+def remove_submission(submission_id):
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.remove(cursor, submission_id)
+
+
+def rebuild_index():
+    backend = get_backend()
+    if backend:
+        with connection.cursor() as cursor:
+            backend.create(cursor)
+            backend.rebuild(cursor)
+
+
+def search_submissions(queryset, query):
+    """Restrict ``queryset`` to submissions matching ``query``, annotated with ``search_rank``."""
+    backend = get_backend()
+    if backend is None:
+        condition = Q()
+        for field in ('title', 'abstract', 'keywords', 'co_authors'):
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+    if isinstance(backend, SQLiteBackend) and not backend.match_expression(query):
+        return queryset.none()
+    return queryset.filter(id__in=backend.matching_ids(query)).annotate(search_rank=backend.rank(query))
+
+
+def attach_snippets(submissions, query):
+    """Set ``search_snippet`` on each submission of an already paginated page (one query)."""
+    backend = get_backend()
+    ids = [submission.id for submission in submissions]
+    snippets = {}
+    if backend and ids:
+        with connection.cursor() as cursor:
+            snippets = backend.snippets(cursor, query, ids)
+    for submission in submissions:
+        submission.search_snippet = snippets.get(submission.id)
+    return submissions
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Drop-in replacement for ``SearchFilter`` backed by the full-text index.
+
+    Results are ordered by relevance unless the request asks for an explicit
+    ``ordering``.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def get_search_query(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        query = self.get_search_query(request)
+        if not query:
+            return queryset
+        view.search_query = query
+        queryset = search_submissions(queryset, query)
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by(F('search_rank').desc(nulls_last=True), '-submitted_at')
+        return queryset
@@ -0,0 +1,401 @@
+"""
+Synthetic conference data.
+
+``seed(plan)`` fills the database with a large, plausible conference:
+events with sessions and workshops, users of every role, submissions with
+keywords, reviewer assignments and reviews, registrations, live questions
+with likes, survey answers, notifications and messages. The earliest events
+are completed and have their certificates, with the job that generated them.
+
+Every choice comes from one ``random.Random(plan.seed)``, so the same plan
+always gives the same rows: usernames, relations, texts and statuses.
+``auto_now_add`` timestamps are the only exception; they record insertion
+time. Rows are written with ``bulk_create``, which skips the post_save
+receivers. The denormalized data is therefore set directly (likes_count,
+seats_taken, respondents_count) or rebuilt at the end (keyword index,
+search index, event statistics, certificates, unread counters).
+
+Every abstract, paper, workshop handout and certificate gets a small
+placeholder PDF in the default storage, so the download routes have a file
+to serve. Files already there are kept: a reset run writes the same names.
+
+Seeded users have a ``seed_`` username and share ``SEED_PASSWORD``.
+"""
+import datetime
+import random
+from dataclasses import dataclass, fields
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .certificates import create_certificate_records
+from .counters import reconcile_unread_counters
+from .keywords import backfill_keywords
+from .models import (
+    Certificate, Event, Job, Message, Notification, Question, QuestionLikes, Registration, Review, Session,
+    Submission, Survey, SurveyQuestion, SurveyResponse, User, Workshop,
+)
+from .rendering import file_name
+from .search import rebuild_index
+from .stats import rebuild_event_statistics
+
+SEED_PREFIX = 'seed_'
+SEED_PASSWORD = 'seed-password'
+BATCH_SIZE = 2000
+PLACEHOLDER_PDF = (
+    b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+    b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+    b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 595 842]>>endobj\n'
+    b'trailer<</Root 1 0 R>>\n%%EOF\n'
+)
+
+TOPICS = {
+    'cardiology': ['heart failure', 'arrhythmia', 'echocardiography', 'hypertension', 'atherosclerosis'],
+    'oncology': ['tumor', 'chemotherapy', 'immunotherapy', 'metastasis', 'biopsy'],
+    'neurology': ['stroke', 'epilepsy', 'dementia', 'neuroimaging', 'migraine'],
+    'infectious disease': ['malaria', 'tuberculosis', 'vaccine', 'antibiotic resistance', 'sepsis'],
+    'endocrinology': ['diabetes', 'insulin', 'thyroid', 'obesity', 'metabolism'],
+    'pediatrics': ['neonatal care', 'growth', 'vaccination', 'child nutrition', 'asthma'],
+    'public health': ['epidemiology', 'surveillance', 'prevention', 'cohort study', 'screening'],
+    'radiology': ['tomography', 'ultrasound', 'magnetic resonance', 'contrast agents', 'radiation dose'],
+}
+CITIES = [('Algiers', 'Algeria'), ('Oran', 'Algeria'), ('Tunis', 'Tunisia'), ('Paris', 'France'), ('Cairo', 'Egypt')]
+# share of the users per role; the organizers needed by the events come first
+ROLE_WEIGHTS = {
+    'participant': 55, 'author': 22, 'reviewer': 8, 'invited_speaker': 5, 'workshop_leader': 5,
+    'organizer': 4, 'super_admin': 1,
+}
+# in date order: the first events are over
+EVENT_STATUSES = ['completed', 'ongoing', 'program_ready', 'reviewing', 'open_call']
+SURVEY_QUESTIONS = [
+    ('Overall rating', 'rating', ''),
+    ('Quality of the talks', 'rating', ''),
+    ('Which format did you prefer?', 'choice', 'Oral,Poster,Workshop'),
+    ('How did you hear about the event?', 'choice', 'Email,Colleague,Website,Social media'),
+    ('Comments', 'text', ''),
+]
+
+
+@dataclass
+class SeedPlan:
+    seed: int = 42
+    events: int = 20
+    users: int = 50000
+    submissions: int = 10000
+    reviews_per_submission: int = 3
+    registrations: int = 40000
+    workshops_per_event: int = 5
+    sessions_per_event: int = 12
+    questions: int = 20000
+    likes: int = 60000
+    respondents: int = 5000
+    notifications: int = 100000
+    messages: int = 2000
+
+    def scaled(self, factor):
+        """The same plan with every total multiplied by ``factor`` (at least one of each); per-event shapes stay."""
+        values = {
+            f.name: getattr(self, f.name) if f.name in ('seed', 'reviews_per_submission', 'sessions_per_event', 'workshops_per_event')
+            else max(1, round(getattr(self, f.name) * factor))
+            for f in fields(self)
+        }
+        return SeedPlan(**values)
+
+
+def seeded_users():
+    return User.objects.filter(username__startswith=SEED_PREFIX)
+
+
+def unseed():
+    """Delete every seeded user; their events and everything else cascade."""
+    with transaction.atomic():
+        Event.objects.filter(organizer__in=seeded_users()).delete()
+        Job.objects.filter(created_by__in=seeded_users()).delete()
+        return seeded_users().delete()[0]
+
+
+class Seeder:
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.rng = random.Random(plan.seed)
+        self.counts = {}
+
+    def bulk(self, model, objects):
+        created = model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + len(created)
+        return created
+
+    def sentence(self, topic, words):
+        terms = TOPICS[topic]
+        return ' '.join(self.rng.choice(terms) for _ in range(words))
+
+    def run(self):
+        with transaction.atomic():
+            self.create_users()
+            self.create_events()
+            self.create_program()
+            self.create_submissions()
+            self.create_registrations()
+            self.create_questions()
+            self.create_surveys()
+            self.create_notifications()
+            self.create_messages()
+            self.rebuild_derived_data()
+            self.store_files()
+        return self.counts
+
+    def create_users(self):
+        password = make_password(SEED_PASSWORD)
+        roles = list(ROLE_WEIGHTS)
+        assigned = ['organizer'] * self.plan.events + self.rng.choices(
+            roles, weights=list(ROLE_WEIGHTS.values()), k=max(0, self.plan.users - self.plan.events)
+        )
+        topics = list(TOPICS)
+        users = self.bulk(User, [
+            User(
+                username=f'{SEED_PREFIX}{index}', email=f'{SEED_PREFIX}{index}@example.com', password=password,
+                role=role, first_name=f'User{index}', last_name=self.rng.choice(['Benali', 'Haddad', 'Martin', 'Saidi', 'Khelifi']),
+                institution=f'University {self.rng.randrange(1, 60)}',
+                research_domain=self.rng.choice(topics), country=self.rng.choice(CITIES)[1],
+            )
+            for index, role in enumerate(assigned)
+        ])
+        self.by_role = {role: [user for user in users if user.role == role] for role in roles}
+        self.users = users
+
+    def create_events(self):
+        base = datetime.date(2030, 1, 15)
+        events = []
+        for index in range(self.plan.events):
+            topic = self.rng.choice(list(TOPICS))
+            city, country = self.rng.choice(CITIES)
+            start = base + datetime.timedelta(days=18 * index)
+            events.append(Event(
+                organizer=self.by_role['organizer'][index],
+                title=f'{topic.title()} Congress {index + 1}', description=self.sentence(topic, 40),
+                event_type=self.rng.choice(['congress', 'seminar', 'scientific_day', 'colloquium']),
+                theme=topic, status=EVENT_STATUSES[index % len(EVENT_STATUSES)],
+                start_date=start, end_date=start + datetime.timedelta(days=2),
+                submission_deadline=datetime.datetime.combine(start - datetime.timedelta(days=60), datetime.time(23, 59), tzinfo=datetime.timezone.utc),
+                notification_date=start - datetime.timedelta(days=30),
+                venue=f'{city} Convention Center', city=city, country=country,
+                contact_email=f'contact{index}@example.com', registration_fee=self.rng.choice([0, 50, 100, 150]),
+            ))
+        self.events = self.bulk(Event, events)
+        committee = Event.scientific_committee.through
+        reviewers = self.by_role['reviewer'] or self.users
+        self.committees = {event.id: self.rng.sample(reviewers, min(len(reviewers), 30)) for event in self.events}
+        self.bulk(committee, [
+            committee(event_id=event_id, user_id=user.id)
+            for event_id, members in self.committees.items() for user in members
+        ])
+
+    def create_program(self):
+        chairs = self.by_role['invited_speaker'] or self.users
+        leaders = self.by_role['workshop_leader'] or self.users
+        sessions, workshops = [], []
+        for event in self.events:
+            for index in range(self.plan.sessions_per_event):
+                day = event.start_date + datetime.timedelta(days=index % 3)
+                hour = 8 + (index // 3) % 9
+                sessions.append(Session(
+                    event=event, title=f'{event.theme.title()} session {index + 1}',
+                    session_type=self.rng.choice(['plenary', 'parallel', 'poster', 'workshop']),
+                    room=f'Room {index % 6 + 1}', date=day, start_time=datetime.time(hour), end_time=datetime.time(hour + 1),
+                    chair=self.rng.choice(chairs), description=self.sentence(event.theme, 12),
+                ))
+            for index in range(self.plan.workshops_per_event):
+                workshops.append(Workshop(
+                    event=event, leader=self.rng.choice(leaders), title=f'{event.theme.title()} workshop {index + 1}',
+                    description=self.sentence(event.theme, 20), date=event.start_date + datetime.timedelta(days=index % 3),
+                    start_time=datetime.time(14), end_time=datetime.time(16), room=f'Lab {index + 1}',
+                    max_participants=self.rng.choice([20, 30, 50]),
+                    materials=f'workshops/materials/{SEED_PREFIX}{len(workshops)}.pdf',
+                ))
+        self.sessions = self.bulk(Session, sessions)
+        self.sessions_by_event = {}
+        for session in self.sessions:
+            self.sessions_by_event.setdefault(session.event_id, []).append(session)
+        self.workshops = workshops
+
+    def create_submissions(self):
+        authors = self.by_role['author'] or self.users
+        submissions = []
+        for index in range(self.plan.submissions):
+            event = self.events[index % len(self.events)]
+            status = self.rng.choice(['pending', 'under_review', 'accepted', 'rejected', 'revision_requested'])
+            session = self.rng.choice(self.sessions_by_event[event.id]) if status == 'accepted' else None
+            keywords = self.rng.sample(TOPICS[event.theme], 3)
+            submissions.append(Submission(
+                event=event, author=self.rng.choice(authors), co_authors='A. Benali, S. Haddad',
+                title=f'{keywords[0].title()} and {keywords[1]} in practice ({index})',
+                abstract=self.sentence(event.theme, 120), keywords=', '.join(keywords),
+                submission_type=self.rng.choice(['oral', 'poster', 'display']), status=status, session=session,
+                abstract_file=f'submissions/abstracts/{SEED_PREFIX}{index}.pdf',
+                full_paper=f'submissions/papers/{SEED_PREFIX}{index}.pdf' if status != 'pending' else None,
+            ))
+        self.submissions = self.bulk(Submission, submissions)
+
+        assigned = Submission.assigned_reviewers.through
+        links, reviews = [], []
+        for submission in self.submissions:
+            committee = self.committees[submission.event_id]
+            reviewers = self.rng.sample(committee, min(len(committee), self.plan.reviews_per_submission))
+            for reviewer in reviewers:
+                links.append(assigned(submission_id=submission.id, user_id=reviewer.id))
+                if submission.status != 'pending':
+                    reviews.append(Review(
+                        submission=submission, reviewer=reviewer,
+                        relevance_score=self.rng.randint(1, 5), quality_score=self.rng.randint(1, 5),
+                        originality_score=self.rng.randint(1, 5), comments=self.sentence(submission.event.theme, 15),
+                        decision=self.rng.choice(['accept', 'reject', 'revision']),
+                    ))
+        self.bulk(assigned, links)
+        self.bulk(Review, reviews)
+
+    def create_registrations(self):
+        attendees = self.by_role['participant'] + self.by_role['author'] + self.by_role['invited_speaker']
+        per_event = max(1, self.plan.registrations // len(self.events))
+        registrations = []
+        self.attendees_by_event = {}
+        for event in self.events:
+            chosen = self.rng.sample(attendees, min(len(attendees), per_event))
+            self.attendees_by_event[event.id] = chosen
+            registrations.extend(
+                Registration(
+                    event=event, user=user,
+                    registration_type='speaker' if user.role in ('author', 'invited_speaker') else 'participant',
+                    payment_status=self.rng.choice(['pending', 'paid_onsite', 'paid_online']),
+                )
+                for user in chosen
+            )
+        self.bulk(Registration, registrations)
+
+        participants = Workshop.participants.through
+        seats = []
+        for workshop in self.workshops:
+            pool = self.attendees_by_event[workshop.event.id]
+            taken = self.rng.sample(pool, min(len(pool), self.rng.randint(0, workshop.max_participants)))
+            workshop.seats_taken = len(taken)
+            seats.append((workshop, taken))
+        self.bulk(Workshop, self.workshops)
+        self.bulk(participants, [
+            participants(workshop_id=workshop.id, user_id=user.id) for workshop, taken in seats for user in taken
+        ])
+
+    def create_questions(self):
+        questions, likers = [], []
+        per_question = self.plan.likes / max(1, self.plan.questions)
+        for index in range(self.plan.questions):
+            event = self.events[index % len(self.events)]
+            pool = self.attendees_by_event[event.id]
+            # a few popular questions collect most of the likes
+            wanted = min(len(pool), int(self.rng.expovariate(1 / per_question)) if per_question else 0)
+            chosen = self.rng.sample(pool, wanted)
+            answered = self.rng.random() < 0.3
+            questions.append(Question(
+                session=self.rng.choice(self.sessions_by_event[event.id]), user=self.rng.choice(pool),
+                content=f'What about {self.sentence(event.theme, 6)}?', is_answered=answered,
+                answer=self.sentence(event.theme, 20) if answered else '', likes_count=len(chosen),
+            ))
+            likers.append(chosen)
+        questions = self.bulk(Question, questions)
+        self.bulk(QuestionLikes, [
+            QuestionLikes(question_id=question.id, user_id=user.id)
+            for question, users in zip(questions, likers) for user in users
+        ])
+
+    def create_surveys(self):
+        surveys = self.bulk(Survey, [
+            Survey(event=event, title=f'{event.title} feedback', description='Tell us what you thought')
+            for event in self.events
+        ])
+        questions = self.bulk(SurveyQuestion, [
+            SurveyQuestion(survey=survey, question_text=text, question_type=kind, choices=choices, order=order)
+            for survey in surveys for order, (text, kind, choices) in enumerate(SURVEY_QUESTIONS)
+        ])
+        by_survey = {}
+        for question in questions:
+            by_survey.setdefault(question.survey_id, []).append(question)
+
+        per_survey = max(1, self.plan.respondents // len(surveys))
+        responses = []
+        for survey in surveys:
+            pool = self.attendees_by_event[survey.event_id]
+            respondents = self.rng.sample(pool, min(len(pool), per_survey))
+            survey.respondents_count = len(respondents)
+            for user in respondents:
+                for question in by_survey[survey.id]:
+                    answer = SurveyResponse(survey=survey, question=question, user=user)
+                    if question.question_type == 'rating':
+                        answer.response_rating = self.rng.choices([1, 2, 3, 4, 5], weights=[1, 2, 5, 8, 6])[0]
+                    elif question.question_type == 'choice':
+                        answer.response_text = self.rng.choice(question.choices.split(','))
+                    elif self.rng.random() < 0.4:
+                        answer.response_text = self.sentence(survey.event.theme, 10)
+                    else:
+                        continue
+                    responses.append(answer)
+        Survey.objects.bulk_update(surveys, ['respondents_count'], batch_size=BATCH_SIZE)
+        self.bulk(SurveyResponse, responses)
+
+    def create_notifications(self):
+        kinds = [choice for choice, _ in Notification.NOTIFICATION_TYPE_CHOICES]
+        self.bulk(Notification, [
+            Notification(
+                user=self.rng.choice(self.users), notification_type=kind,
+                title=kind.replace('_', ' ').capitalize(), message=f'Notification {index}',
+                is_read=self.rng.random() < 0.6, related_event=self.rng.choice(self.events),
+            )
+            for index, kind in enumerate(self.rng.choice(kinds) for _ in range(self.plan.notifications))
+        ])
+
+    def create_messages(self):
+        # one by one through the regular save path, which threads them into conversations
+        for index in range(self.plan.messages):
+            event = self.rng.choice(self.events)
+            sender = self.rng.choice(self.attendees_by_event[event.id])
+            Message.objects.create(
+                sender=sender, recipient=event.organizer, related_event=event if index % 2 else None,
+                subject=f'Question about {event.title}', content=self.sentence(event.theme, 25),
+                is_read=self.rng.random() < 0.5,
+            )
+        self.counts[Message._meta.label] = self.plan.messages
+
+    def rebuild_derived_data(self):
+        backfill_keywords()
+        rebuild_index()
+        jobs = []
+        for event in self.events:
+            if event.status == 'completed':
+                jobs.append(Job(
+                    task='certificates.generate', payload={'event_id': event.id}, status='succeeded', attempts=1,
+                    result=create_certificate_records(event.id), created_by=event.organizer,
+                ))
+            rebuild_event_statistics(event.id)
+        self.bulk(Job, jobs)
+        reconcile_unread_counters()
+
+    def store_files(self):
+        certificates = list(Certificate.objects.filter(event__in=self.events))
+        for certificate in certificates:
+            certificate.certificate_file = file_name(certificate.event_id, certificate.id)
+        Certificate.objects.bulk_update(certificates, ['certificate_file'], batch_size=BATCH_SIZE)
+        names = [certificate.certificate_file.name for certificate in certificates]
+        names += [workshop.materials.name for workshop in self.workshops]
+        for submission in self.submissions:
+            names.append(submission.abstract_file.name)
+            if submission.full_paper:
+                names.append(submission.full_paper.name)
+        for name in names:
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(PLACEHOLDER_PDF))
+        self.counts['files'] = len(names)
+
+
+def seed(plan=None):
+    """Seed ``plan`` (default ``SeedPlan()``); returns the number of rows written per model."""
+    return Seeder(plan or SeedPlan()).run()
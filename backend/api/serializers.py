@@ -34,7 +34,11 @@ class SessionSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'event']
 
     def get_submissions_count(self, obj):
-        return obj.submissions.count()
+        # Prefer the annotation from Session.objects.with_counts()
+        count = getattr(obj, 'submissions_count', None)
+        if count is None:
+            return obj.submissions.count()
+        return count
 
 
 class EventListSerializer(serializers.ModelSerializer):
@@ -48,10 +52,17 @@ class EventListSerializer(serializers.ModelSerializer):
                   'end_date', 'city', 'country', 'organizer_name', 'sessions_count', 'registrations_count']
     
     def get_sessions_count(self, obj):
-        return obj.sessions.count()
+        # Prefer the annotation from Event.objects.with_counts()
+        count = getattr(obj, 'sessions_count', None)
+        if count is None:
+            return obj.sessions.count()
+        return count
 
     def get_registrations_count(self, obj):
-        return obj.registrations.count()
+        count = getattr(obj, 'registrations_count', None)
+        if count is None:
+            return obj.registrations.count()
+        return count
 
 
 class EventDetailSerializer(serializers.ModelSerializer):
@@ -67,10 +78,17 @@ class EventDetailSerializer(serializers.ModelSerializer):
         read_only_fields = ['organizer', 'created_at', 'updated_at']
     
     def get_submissions_count(self, obj):
-        return obj.submissions.count()
+        # Prefer the annotation from Event.objects.with_counts()
+        count = getattr(obj, 'submissions_count', None)
+        if count is None:
+            return obj.submissions.count()
+        return count
     
     def get_registrations_count(self, obj):
-        return obj.registrations.count()
+        count = getattr(obj, 'registrations_count', None)
+        if count is None:
+            return obj.registrations.count()
+        return count
     
 
 class EventStatusSerializer(serializers.ModelSerializer):
@@ -115,13 +133,31 @@ class SubmissionSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     reviews = ReviewSerializer(many=True, read_only=True)
     average_score = serializers.SerializerMethodField()
+    reviews_count = serializers.SerializerMethodField()
     session_details = SessionSerializer(source='session', read_only=True)
+    # Only set when the list is filtered with ?search= (see api/search.py)
+    search_rank = serializers.FloatField(read_only=True, default=None)
+    search_snippet = serializers.CharField(read_only=True, default=None)
     
     class Meta:
         model = Submission
         fields = '__all__'
         read_only_fields = ['author', 'submitted_at', 'updated_at', 'status']
+
+    def get_reviews_count(self, obj):
+        # Prefer the annotation from Submission.objects.with_scores()
+        count = getattr(obj, 'reviews_count', None)
+        if count is None:
+            return obj.reviews.count()
+        return count
+
     def get_average_score(self, obj):
+        # Prefer the annotation from Submission.objects.with_scores()
+        if isinstance(obj, Submission) and 'average_score' in obj.__dict__:
+            if obj.average_score is None:
+                return None
+            return round(obj.average_score, 2)
+
         # Handle QuerySet of Review instances or a list of dicts
         try:
             reviews = getattr(obj, 'reviews', None)
@@ -187,13 +223,20 @@ class WorkshopSerializer(serializers.ModelSerializer):
     class Meta:
         model = Workshop
         fields = '__all__'
-        read_only_fields = ['leader', 'created_at', 'event']
+        read_only_fields = ['leader', 'created_at', 'event', 'participants', 'seats_taken']
     
     def get_participants_count(self, obj):
-        return obj.participants.count()
+        return obj.seats_taken
     
     def get_available_seats(self, obj):
-        return obj.max_participants - obj.participants.count()
+        return max(obj.max_participants - obj.seats_taken, 0)
+
+    def update(self, instance, validated_data):
+        # never write back a stale seats_taken read before the update
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
 
 
 class QuestionSerializer(serializers.ModelSerializer):
@@ -202,7 +245,7 @@ class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
         fields = '__all__'
-        read_only_fields = ['user', 'created_at', 'session']
+        read_only_fields = ['user', 'created_at', 'session', 'likes_count']
 
 
 class SurveyQuestionSerializer(serializers.ModelSerializer):
@@ -221,7 +264,7 @@ class SurveySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
     
     def get_responses_count(self, obj):
-        return obj.responses.values('user').distinct().count()
+        return obj.respondents_count
 
 
 class SurveyResponseSerializer(serializers.ModelSerializer):
@@ -233,6 +276,51 @@ class SurveyResponseSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at']
 
 
+class SurveyAnswerInputSerializer(serializers.Serializer):
+    question = serializers.IntegerField()
+    response_rating = serializers.IntegerField(required=False, allow_null=True)
+    response_text = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class SurveySubmissionSerializer(serializers.Serializer):
+    #all answers of one respondent, validated against the survey in one query
+    answers = SurveyAnswerInputSerializer(many=True, allow_empty=False)
+
+    def validate_answers(self, answers):
+        survey = self.context['survey']
+        questions = {question.id: question for question in survey.questions.all()}
+        errors = {}
+        seen = set()
+        validated = []
+        for answer in answers:
+            question = questions.get(answer['question'])
+            rating = answer.get('response_rating')
+            text = answer.get('response_text', '')
+            if question is None:
+                errors[answer['question']] = 'Question does not belong to this survey.'
+            elif question.id in seen:
+                errors[question.id] = 'Question answered more than once.'
+            elif question.question_type == 'rating' and (rating is None or not 1 <= rating <= 5):
+                errors[question.id] = 'A rating between 1 and 5 is required.'
+            elif question.question_type == 'choice' and question.choices and \
+                    text not in [choice.strip() for choice in question.choices.split(',')]:
+                errors[question.id] = 'Not one of the available choices.'
+            elif question.question_type != 'rating' and rating is not None:
+                errors[question.id] = 'Only rating questions accept a rating.'
+            else:
+                seen.add(question.id)
+                validated.append((question, rating, text))
+        if errors:
+            raise serializers.ValidationError({str(key): value for key, value in errors.items()})
+        return validated
+
+
+class SurveyAnswerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SurveyResponse
+        fields = ['id', 'response_text', 'created_at']
+
+
 class CertificateSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     event_title = serializers.CharField(source='event.title', read_only=True)
@@ -250,11 +338,44 @@ class MessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = Message
         fields = '__all__'
-        read_only_fields = ['sender', 'sent_at']
+        read_only_fields = ['sender', 'sent_at', 'conversation']
+
+
+class LastMessageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Message
+        fields = ['id', 'sender', 'subject', 'content', 'is_read', 'sent_at']
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    #one inbox row: a ConversationParticipant seen from its user
+    id = serializers.IntegerField(source='conversation_id', read_only=True)
+    other_user = UserSerializer(read_only=True)
+    related_event = serializers.IntegerField(source='conversation.related_event_id', read_only=True)
+    related_event_title = serializers.CharField(source='conversation.related_event.title', read_only=True, default=None)
+    last_message = LastMessageSerializer(source='conversation.last_message', read_only=True)
+    
+    class Meta:
+        model = ConversationParticipant
+        fields = ['id', 'other_user', 'related_event', 'related_event_title', 'last_message', 'unread_count', 'last_activity']
 
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = '__all__'
-        read_only_fields = ['user', 'created_at']
\ No newline at end of file
+        read_only_fields = ['user', 'created_at']
+
+
+class JobSerializer(serializers.ModelSerializer):
+    error = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Job
+        fields = ['id', 'task', 'status', 'attempts', 'max_attempts', 'result', 'error',
+                  'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+    
+    def get_error(self, obj):
+        # last line of the traceback only
+        return obj.error.strip().splitlines()[-1] if obj.error else ''
@@ -0,0 +1,228 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_shared, invalidate_users
+from .conversations import conversation_for, fold_event_conversations, message_deleted, message_sent
+from .counters import adjust_for
+from .keywords import sync_submission_keywords
+from .live import like_coalescer, publish_question
+from .search import index_submission, remove_submission
+from .models import (
+    Event, Message, Notification, Question, QuestionLikes, Registration, Review, Session, Submission, UnreadCounter,
+    User, Workshop,
+)
+from .stats import current_state, stored_state, track_change
+
+
+def invalidate_dashboards(*user_ids, shared=False):
+    #drop cached dashboards once the write is committed, so a concurrent
+    #request cannot cache the pre-commit state again
+    def invalidate():
+        invalidate_users(user_ids)
+        if shared:
+            invalidate_shared()
+    transaction.on_commit(invalidate)
+
+
+def event_organizer_id(event_id):
+    return Event.objects.filter(pk=event_id).values_list('organizer_id', flat=True).first()
+
+
+# Event statistics
+
+@receiver(pre_save, sender=Submission)
+@receiver(pre_save, sender=Registration)
+@receiver(pre_save, sender=Session)
+@receiver(pre_save, sender=Workshop)
+def remember_statistics_state(sender, instance, update_fields=None, **kwargs):
+    instance._stored_statistics_state = stored_state(instance, update_fields)
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_save, sender=Registration)
+@receiver(post_save, sender=Session)
+@receiver(post_save, sender=Workshop)
+def statistics_saved(sender, instance, **kwargs):
+    track_change(instance, instance._stored_statistics_state, current_state(instance))
+
+
+@receiver(pre_delete, sender=Submission)
+@receiver(pre_delete, sender=Registration)
+@receiver(pre_delete, sender=Session)
+@receiver(pre_delete, sender=Workshop)
+def statistics_deleted(sender, instance, **kwargs):
+    # before the delete, while a cascading user delete still has the author's profile
+    track_change(instance, current_state(instance), None)
+
+
+# Dashboard cache
+
+@receiver([post_save, post_delete], sender=Notification)
+def notification_dashboard(sender, instance, **kwargs):
+    invalidate_dashboards(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Message)
+def message_dashboard(sender, instance, **kwargs):
+    invalidate_dashboards(instance.recipient_id)
+
+
+@receiver([post_save, post_delete], sender=Registration)
+def registration_dashboard(sender, instance, **kwargs):
+    # registrations_count shows up in the organizer's events and in upcoming events
+    invalidate_dashboards(instance.user_id, event_organizer_id(instance.event_id), shared=True)
+
+
+@receiver(post_save, sender=Submission)
+def submission_dashboard(sender, instance, **kwargs):
+    invalidate_dashboards(instance.author_id)
+
+
+@receiver(pre_delete, sender=Submission)
+def submission_deleted_dashboard(sender, instance, **kwargs):
+    # assigned reviewers have to be read before the through rows go away
+    invalidate_dashboards(instance.author_id, *instance.assigned_reviewers.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Submission.assigned_reviewers.through)
+def assigned_reviewers_dashboard(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # reviewer.assigned_submissions.add(...)
+        invalidate_dashboards(instance.pk)
+    elif action in ('post_add', 'post_remove'):
+        invalidate_dashboards(*pk_set)
+    elif action == 'pre_clear':
+        invalidate_dashboards(*instance.assigned_reviewers.values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_dashboard(sender, instance, **kwargs):
+    author_id = Submission.objects.filter(pk=instance.submission_id).values_list('author_id', flat=True).first()
+    invalidate_dashboards(instance.reviewer_id, author_id)
+
+
+@receiver(post_save, sender=Event)
+def event_dashboard(sender, instance, **kwargs):
+    # registrants see the event title in their my_registrations block
+    registrants = Registration.objects.filter(event_id=instance.pk).values_list('user_id', flat=True)
+    invalidate_dashboards(instance.organizer_id, *registrants, shared=True)
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted_dashboard(sender, instance, **kwargs):
+    # the cascaded registrations invalidate their own users
+    invalidate_dashboards(instance.organizer_id, shared=True)
+
+
+@receiver([post_save, post_delete], sender=Session)
+def session_dashboard(sender, instance, **kwargs):
+    # sessions_count
+    invalidate_dashboards(event_organizer_id(instance.event_id), shared=True)
+
+
+# Conversations
+
+@receiver(pre_save, sender=Message)
+def message_conversation(sender, instance, **kwargs):
+    # before the insert, so the unread receivers below already see the thread
+    if instance._state.adding and instance.conversation_id is None:
+        instance.conversation = conversation_for(instance.sender_id, instance.recipient_id, instance.related_event_id)
+
+
+@receiver(pre_delete, sender=Event)
+def event_conversations(sender, instance, **kwargs):
+    # the messages outlive the event, in the pair's conversation without one
+    fold_event_conversations(instance.pk)
+
+
+@receiver(post_save, sender=Message)
+def message_conversation_activity(sender, instance, created, **kwargs):
+    if created:
+        message_sent(instance)
+
+
+@receiver(post_delete, sender=Message)
+def message_conversation_removed(sender, instance, **kwargs):
+    message_deleted(instance)
+
+
+# Unread counters
+
+@receiver(post_save, sender=User)
+def user_counter(sender, instance, created, **kwargs):
+    # a new account has nothing unread; the row makes the badge a primary-key read from the start
+    if created:
+        UnreadCounter.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(pre_save, sender=Notification)
+@receiver(pre_save, sender=Message)
+def remember_read_state(sender, instance, **kwargs):
+    # read from the database: the in-memory instance may be stale after mark_read()
+    instance._stored_is_read = None
+    if not instance._state.adding:
+        instance._stored_is_read = sender.objects.filter(pk=instance.pk).values_list('is_read', flat=True).first()
+
+
+@receiver(post_save, sender=Notification)
+@receiver(post_save, sender=Message)
+def unread_saved(sender, instance, created, **kwargs):
+    if created:
+        delta = 0 if instance.is_read else 1
+    elif instance._stored_is_read is None:
+        delta = 0
+    else:
+        delta = int(instance._stored_is_read) - int(instance.is_read)
+    adjust_for(instance, delta)
+
+
+@receiver(post_delete, sender=Notification)
+@receiver(post_delete, sender=Message)
+def unread_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        adjust_for(instance, -1)
+
+
+# Full-text search index
+
+@receiver(post_save, sender=Submission)
+def submission_indexed(sender, instance, **kwargs):
+    index_submission(instance.pk)
+
+
+@receiver(post_delete, sender=Submission)
+def submission_unindexed(sender, instance, **kwargs):
+    remove_submission(instance.pk)
+
+
+# Keyword index
+
+@receiver(post_save, sender=Submission)
+def submission_keywords(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'keywords' in update_fields:
+        sync_submission_keywords(instance)
+
+
+# Live Q&A
+
+@receiver(post_save, sender=Question)
+def question_published(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: publish_question(instance, 'question.created'))
+    elif instance.is_answered:
+        transaction.on_commit(lambda: publish_question(instance, 'question.answered'))
+
+
+@receiver(post_save, sender=QuestionLikes)
+def question_liked(sender, instance, created, **kwargs):
+    if created:
+        Question.objects.filter(pk=instance.question_id).update(likes_count=F('likes_count') + 1)
+        session_id = instance.question.session_id
+        transaction.on_commit(lambda: like_coalescer.add(session_id, instance.question_id))
+
+
+@receiver(post_delete, sender=QuestionLikes)
+def question_unliked(sender, instance, **kwargs):
+    Question.objects.filter(pk=instance.question_id, likes_count__gt=0).update(likes_count=F('likes_count') - 1)
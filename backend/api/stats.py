@@ -0,0 +1,235 @@
+"""
+Event statistics engine.
+
+Statistics are stored per event in ``EventStatistics`` so the statistics
+endpoint is a single-row read. The row holds totals and full breakdowns
+(``{status: n}``, ``{institution: n}``, ...); the top-10 institutions are
+only sliced when the row is read.
+
+The row is built with one grouped query per section on first read. After
+that, every write applies a +/-1 delta (``track_change`` from the receivers
+in ``api/signals.py``, ``adjust_event_statistics`` after bulk writes), so a
+save never recounts the event. Breakdowns keep the author's institution and
+country as they were when the row was counted;
+``python manage.py rebuild_event_statistics`` recomputes every row.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Event, EventStatistics, Registration, Session, Submission, User, Workshop, count_subquery
+
+
+def _breakdown(counter, key, limit=None):
+    #[{key: value, 'count': n}, ...] ordered by count, matching the old .values().annotate() output
+    rows = sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+    if limit is not None:
+        rows = rows[:limit]
+    return [{key: value, 'count': count} for value, count in rows]
+
+
+def submission_stats(event_id):
+    by_status, by_institution, by_country = Counter(), Counter(), Counter()
+    rows = (
+        Submission.objects.filter(event_id=event_id)
+        .order_by()
+        .values_list('status', 'author__institution', 'author__country')
+        .annotate(count=Count('id'))
+    )
+    for status, institution, country, count in rows:
+        by_status[status] += count
+        by_institution[institution] += count
+        by_country[country] += count
+    return {
+        'total_submissions': sum(by_status.values()),
+        'submissions_by_status': dict(by_status),
+        'submissions_by_institution': dict(by_institution),
+        'submissions_by_country': dict(by_country),
+    }
+
+
+def registration_stats(event_id):
+    by_type, by_country = Counter(), Counter()
+    rows = (
+        Registration.objects.filter(event_id=event_id)
+        .order_by()
+        .values_list('registration_type', 'user__country')
+        .annotate(count=Count('id'))
+    )
+    for registration_type, country, count in rows:
+        by_type[registration_type] += count
+        by_country[country] += count
+    return {
+        'total_registrations': sum(by_type.values()),
+        'registrations_by_type': dict(by_type),
+        'registrations_by_country': dict(by_country),
+    }
+
+
+def program_stats(event_id):
+    return (
+        Event.objects.filter(pk=event_id)
+        .annotate(
+            total_sessions=count_subquery(Session, 'event'),
+            total_workshops=count_subquery(Workshop, 'event'),
+        )
+        .values('total_sessions', 'total_workshops')
+        .first()
+    ) or {}
+
+
+SECTIONS = {
+    'submissions': submission_stats,
+    'registrations': registration_stats,
+    'program': program_stats,
+}
+
+
+def rebuild_event_statistics(event_id):
+    """Recompute every section and store it, creating the row if needed."""
+    values = {}
+    for compute in SECTIONS.values():
+        values.update(compute(event_id))
+    stats, _ = EventStatistics.objects.update_or_create(event_id=event_id, defaults=values)
+    return stats
+
+
+def adjust_event_statistics(event_id, delta):
+    """
+    Add ``delta`` to an already materialized row: ``{total: n}`` for a total,
+    ``{breakdown: {key: n}}`` for a breakdown. ``delta`` may be a callable,
+    evaluated only when the row exists.
+
+    Events whose statistics were never requested have no row and are skipped;
+    the row is built on first read by ``get_event_statistics``.
+    """
+    if event_id is None:
+        return
+    with transaction.atomic():
+        stats = EventStatistics.objects.select_for_update().filter(event_id=event_id).first()
+        if stats is None:
+            return
+        if callable(delta):
+            delta = delta()
+        for field, change in delta.items():
+            if isinstance(change, dict):
+                counts = getattr(stats, field)
+                for key, n in change.items():
+                    counts[key] = counts.get(key, 0) + n
+                    if counts[key] <= 0:
+                        del counts[key]
+            else:
+                setattr(stats, field, getattr(stats, field) + change)
+        stats.save(update_fields=[*delta, 'updated_at'])
+
+
+#what a row is counted by; read before a save to tell what changed
+STATE_FIELDS = {
+    Submission: ('event_id', 'status'),
+    Registration: ('event_id', 'registration_type'),
+    Session: ('event_id',),
+    Workshop: ('event_id',),
+}
+BREAKDOWNS = {Submission: 'submissions_by_status', Registration: 'registrations_by_type'}
+
+
+def current_state(instance):
+    return tuple(getattr(instance, field) for field in STATE_FIELDS[type(instance)])
+
+
+def stored_state(instance, update_fields=None):
+    """The state ``instance`` is counted with before a save; None for a new row."""
+    fields = STATE_FIELDS[type(instance)]
+    if instance._state.adding:
+        return None
+    if update_fields is not None and not {f.removesuffix('_id') for f in update_fields} & {f.removesuffix('_id') for f in fields}:
+        # none of the counted fields is written (keyword edits, review-triggered saves)
+        return current_state(instance)
+    return type(instance).objects.filter(pk=instance.pk).values_list(*fields).first()
+
+
+def _profile(instance):
+    relation = 'author' if isinstance(instance, Submission) else 'user'
+    if getattr(type(instance), relation).is_cached(instance):
+        person = getattr(instance, relation)
+        return person.institution, person.country
+    user_id = getattr(instance, f'{relation}_id')
+    return User.objects.filter(pk=user_id).values_list('institution', 'country').first() or ('', '')
+
+
+def row_delta(instance, state, sign):
+    """What one row counted with ``state`` adds to (``sign=1``) or takes from (``-1``) its event."""
+    model = type(instance)
+    if model is Submission:
+        institution, country = _profile(instance)
+        return {
+            'total_submissions': sign,
+            'submissions_by_status': {state[1]: sign},
+            'submissions_by_institution': {institution: sign},
+            'submissions_by_country': {country: sign},
+        }
+    if model is Registration:
+        _, country = _profile(instance)
+        return {
+            'total_registrations': sign,
+            'registrations_by_type': {state[1]: sign},
+            'registrations_by_country': {country: sign},
+        }
+    return {'total_sessions' if model is Session else 'total_workshops': sign}
+
+
+def track_change(instance, before, after):
+    """Move ``instance`` from state ``before`` to ``after`` (None: absent) in the statistics."""
+    if before == after:
+        return
+    if before is not None and after is not None and before[0] == after[0]:
+        # same event, only the status or registration type moved
+        field = BREAKDOWNS[type(instance)]
+        adjust_event_statistics(after[0], {field: {before[1]: -1, after[1]: 1}})
+        return
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            adjust_event_statistics(state[0], lambda state=state, sign=sign: row_delta(instance, state, sign))
+
+
+def registrations_added(event_id, registrations):
+    """Delta of bulk-created ``registrations`` (with their users loaded)."""
+    by_type = Counter(registration.registration_type for registration in registrations)
+    by_country = Counter(registration.user.country for registration in registrations)
+    adjust_event_statistics(event_id, {
+        'total_registrations': len(registrations),
+        'registrations_by_type': dict(by_type),
+        'registrations_by_country': dict(by_country),
+    })
+
+
+def get_event_statistics(event_id):
+    stats = EventStatistics.objects.filter(event_id=event_id).first()
+    if stats is None:
+        if not Event.objects.filter(pk=event_id).exists():
+            raise Event.DoesNotExist
+        stats = rebuild_event_statistics(event_id)
+    return stats
+
+
+def serialize_event_statistics(stats):
+    by_status = stats.submissions_by_status
+    by_type = stats.registrations_by_type
+    accepted = by_status.get('accepted', 0)
+    return {
+        'total_submissions': stats.total_submissions,
+        'accepted_submissions': accepted,
+        'rejected_submissions': by_status.get('rejected', 0),
+        'pending_submissions': by_status.get('pending', 0),
+        'acceptance_rate': round(accepted / stats.total_submissions * 100, 2) if stats.total_submissions > 0 else 0,
+        'total_registrations': stats.total_registrations,
+        'participants': by_type.get('participant', 0),
+        'speakers': by_type.get('speaker', 0),
+        'invited': by_type.get('invited', 0),
+        'submissions_by_institution': _breakdown(stats.submissions_by_institution, 'author__institution', limit=10),
+        'submissions_by_country': _breakdown(stats.submissions_by_country, 'author__country'),
+        'registrations_by_country': _breakdown(stats.registrations_by_country, 'user__country'),
+        'total_sessions': stats.total_sessions,
+        'total_workshops': stats.total_workshops,
+    }
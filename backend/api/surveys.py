@@ -0,0 +1,92 @@
+"""
+Survey results from grouped aggregates.
+
+Whatever the number of questions or responses, results take a fixed
+number of queries: per-question counts and rating averages are computed
+in one GROUP BY. Choice histograms come from a second GROUP BY. A
+``ROW_NUMBER()`` window returns the first answers of every text question
+at once; the rest are paginated by ``SurveyTextAnswersView``.
+
+``Survey.respondents_count`` is kept up to date when answers are stored,
+so listing surveys never needs a ``DISTINCT`` count.
+"""
+from django.db import transaction
+from django.db.models import Avg, Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Survey, SurveyResponse
+
+TEXT_PREVIEW_SIZE = 20
+
+
+def parse_choices(question):
+    return [choice.strip() for choice in question.choices.split(',') if choice.strip()]
+
+
+def survey_results_data(survey, preview_size=TEXT_PREVIEW_SIZE):
+    questions = list(survey.questions.all())
+    responses = SurveyResponse.objects.filter(survey=survey)
+
+    totals = {
+        row['question_id']: row
+        for row in responses.order_by().values('question_id').annotate(total=Count('id'), average=Avg('response_rating'))
+    }
+
+    histograms = {}
+    choice_rows = (
+        responses.filter(question__question_type='choice')
+        .order_by().values('question_id', 'response_text').annotate(count=Count('id'))
+    )
+    for row in choice_rows:
+        histograms.setdefault(row['question_id'], {})[row['response_text']] = row['count']
+
+    previews = {}
+    if preview_size and any(question.question_type == 'text' for question in questions):
+        text_rows = (
+            responses.filter(question__question_type='text')
+            .annotate(position=Window(RowNumber(), partition_by=F('question_id'), order_by=F('id').asc()))
+            .filter(position__lte=preview_size)
+            .values_list('question_id', 'response_text')
+        )
+        for question_id, text in text_rows:
+            previews.setdefault(question_id, []).append(text)
+
+    results = []
+    for question in questions:
+        row = totals.get(question.id, {})
+        total = row.get('total', 0)
+        entry = {'question_id': question.id, 'question': question.question_text, 'type': question.question_type}
+        if question.question_type == 'rating':
+            average = row.get('average')
+            entry['average_rating'] = round(average, 2) if average else 0
+        elif question.question_type == 'choice':
+            counts = dict.fromkeys(parse_choices(question), 0)
+            counts.update(histograms.get(question.id, {}))
+            entry['choices'] = counts
+        else:
+            entry['responses'] = previews.get(question.id, [])
+            entry['has_more'] = total > len(entry['responses'])
+        entry['total_responses'] = total
+        results.append(entry)
+    return results
+
+
+def record_respondent(survey_id, user, had_answered):
+    #called inside the transaction that stored the user's answers
+    if not had_answered:
+        Survey.objects.filter(pk=survey_id).update(respondents_count=F('respondents_count') + 1)
+
+
+def submit_answers(survey, user, answers):
+    """
+    Store a respondent's validated answers (``[(question, rating, text), ...]``)
+    with one bulk INSERT; returns the created responses.
+    """
+    with transaction.atomic():
+        had_answered = SurveyResponse.objects.filter(survey=survey, user=user).exists()
+        created = SurveyResponse.objects.bulk_create([
+            SurveyResponse(survey=survey, question=question, user=user, response_rating=rating, response_text=text)
+            for question, rating, text in answers
+        ])
+        record_respondent(survey.id, user, had_answered)
+    return created
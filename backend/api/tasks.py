@@ -0,0 +1,197 @@
+"""
+Database-backed background job queue.
+
+Jobs are rows of ``Job``. ``enqueue`` inserts one; workers started with
+``python manage.py run_workers`` claim jobs with a conditional UPDATE (so no
+two workers run the same job), hold them for a visibility timeout, and either
+record the result or reschedule the job with exponential backoff until
+``max_attempts`` is reached. A worker that dies mid-job simply lets the lock
+expire and the job is picked up again.
+
+Task functions are registered with ``@task('name')`` and receive the job's
+JSON payload as keyword arguments; their return value must be JSON
+serializable. Long tasks registered with ``atomic=False`` call
+``heartbeat()`` between units of work to keep their lock: otherwise a job
+that outlives the visibility timeout is handed to a second worker while the
+first one is still running it.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .certificates import create_certificate_records
+from .models import Job
+from .notifications import notify_registrants, notify_users
+from .rendering import render_certificates
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = {}
+
+
+def task(name, atomic=True):
+    #atomic=False for long tasks that commit their own progress
+    def register(func):
+        REGISTRY[name] = func
+        func.task_name = name
+        func.atomic = atomic
+        return func
+    return register
+
+
+def visibility_timeout():
+    return timedelta(seconds=getattr(settings, 'JOB_VISIBILITY_TIMEOUT', 300))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=getattr(settings, 'JOB_RETRY_BASE_DELAY', 5) * 2 ** (attempts - 1))
+
+
+def enqueue(name, payload=None, user=None, max_attempts=3, delay=None):
+    if name not in REGISTRY:
+        raise KeyError(f'Unknown task {name!r}')
+    run_after = timezone.now() + delay if delay else timezone.now()
+    return Job.objects.create(
+        task=name, payload=payload or {}, created_by=user, max_attempts=max_attempts, run_after=run_after
+    )
+
+
+_running = threading.local()
+
+
+class LockLost(Exception):
+    """The job's lock expired and another worker may have claimed it."""
+
+
+def heartbeat():
+    """
+    Push back the lock of the job this thread is running. Raises ``LockLost``
+    when the lock is no longer ours, so the task stops instead of racing the
+    worker that reclaimed it. Only visible to other workers from tasks that
+    are not atomic.
+    """
+    job = getattr(_running, 'job', None)
+    if job is None:
+        return
+    held = Job.objects.filter(pk=job.pk, locked_by=_running.worker, status='running').update(
+        locked_until=timezone.now() + visibility_timeout()
+    )
+    if not held:
+        raise LockLost(f'Job {job.pk} is no longer held by {_running.worker}')
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claimable(now):
+    return (
+        Q(status='queued', run_after__lte=now)
+        | Q(status='running', locked_until__lt=now)
+    ) & Q(attempts__lt=F('max_attempts'))
+
+
+def claim(worker, candidates=10):
+    """Lock the next due job for ``worker``; returns it or None."""
+    now = timezone.now()
+    ids = list(Job.objects.filter(claimable(now)).order_by('run_after', 'id').values_list('id', flat=True)[:candidates])
+    for job_id in ids:
+        claimed = Job.objects.filter(claimable(now), pk=job_id).update(
+            status='running',
+            locked_by=worker,
+            locked_until=now + visibility_timeout(),
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def fail_abandoned():
+    #running jobs whose lock expired on their last attempt
+    return Job.objects.filter(
+        status='running', locked_until__lt=timezone.now(), attempts__gte=F('max_attempts')
+    ).update(status='failed', error='Visibility timeout expired on the last attempt', finished_at=timezone.now())
+
+
+def execute(job, worker):
+    """Run a claimed job and record the outcome (unless the lock was lost meanwhile)."""
+    func = REGISTRY.get(job.task)
+    mine = Job.objects.filter(pk=job.pk, locked_by=worker, status='running')
+    _running.job, _running.worker = job, worker
+    try:
+        if func is None:
+            raise KeyError(f'Unknown task {job.task!r}')
+        if func.atomic:
+            with transaction.atomic():
+                result = func(**job.payload)
+        else:
+            result = func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.task, job.attempts)
+        if job.attempts < job.max_attempts:
+            mine.update(status='queued', error=error, locked_by='', locked_until=None,
+                        run_after=timezone.now() + retry_delay(job.attempts))
+        else:
+            mine.update(status='failed', error=error, locked_until=None, finished_at=timezone.now())
+        return False
+    finally:
+        _running.job = None
+    mine.update(status='succeeded', result=result, error='', locked_until=None, finished_at=timezone.now())
+    return True
+
+
+def run_worker(burst=False, poll_interval=1.0, max_jobs=None, worker=None):
+    """
+    Process jobs until interrupted. With ``burst`` the worker exits as soon as
+    no job is due. Returns the number of jobs processed.
+    """
+    worker = worker or worker_name()
+    processed = 0
+    while max_jobs is None or processed < max_jobs:
+        fail_abandoned()
+        job = claim(worker)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        execute(job, worker)
+        processed += 1
+    return processed
+
+
+# Tasks
+
+@task('notifications.send')
+def send_notification_task(user_ids, notification_type, title, message, related_event_id=None):
+    return {'sent': notify_users(user_ids, notification_type, title, message, related_event_id)}
+
+
+@task('notifications.broadcast', atomic=False)
+def broadcast_task(event_id, notification_type, title, message, queued_at=None):
+    # commits per batch; a retry resumes after the users already notified
+    since = datetime.fromisoformat(queued_at) if queued_at else None
+    return {'sent': notify_registrants(event_id, notification_type, title, message, since=since)}
+
+
+@task('certificates.generate')
+def generate_certificates_task(event_id):
+    return create_certificate_records(event_id)
+
+
+@task('certificates.render', atomic=False)
+def render_certificates_task(event_id, processes=None):
+    # a large event can take longer than the visibility timeout
+    return render_certificates(event_id, processes=processes, on_batch=heartbeat)
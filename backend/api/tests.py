@@ -1,3 +1,1896 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .admission import AdmissionQueue, Saturated, registration_queue, submission_queue
+from .assignment import bulk_assign
+from . import benchmark
+from .benchmark import plan_requests
+from .budgets import budget_for, query_diff, query_summary
+from .cache import cache_stats, dashboard_cache
+from .certificates import create_certificate_records
+from .counters import get_unread_counts
+from .endpoints import Samples, representative_call, routes
+from .live import LikeCoalescer, get_channel_layer, session_group
+from .management.commands.run_workers import start_workers
+from .plans import explain
+from .models import *
+from .rendering import render_batch, render_certificates, render_progress
+from .seeding import SeedPlan, seed
+from .stats import get_event_statistics, rebuild_event_statistics
+from .tasks import claim, enqueue, heartbeat, run_worker, task
+from .views import ReviewListCreateView
+from .workshops import register_participant
+
+
+def make_user(username, role='participant', **extra):
+    return User.objects.create(username=username, email=f'{username}@example.com', role=role, **extra)
+
+
+def make_event(organizer, **extra):
+    fields = {
+        'title': 'Congress',
+        'description': 'Annual congress',
+        'event_type': 'congress',
+        'theme': 'Medicine',
+        'status': 'open_call',
+        'start_date': datetime.date(2030, 6, 1),
+        'end_date': datetime.date(2030, 6, 3),
+        'submission_deadline': datetime.datetime(2030, 3, 1, tzinfo=datetime.timezone.utc),
+        'notification_date': datetime.date(2030, 4, 1),
+        'venue': 'Main hall',
+        'city': 'Algiers',
+        'country': 'Algeria',
+        'contact_email': 'contact@example.com',
+    }
+    fields.update(extra)
+    return Event.objects.create(organizer=organizer, **fields)
+
+
+def make_session(event, **extra):
+    fields = {
+        'title': 'Session',
+        'session_type': 'parallel',
+        'room': 'A',
+        'date': datetime.date(2030, 6, 1),
+        'start_time': datetime.time(9, 0),
+        'end_time': datetime.time(10, 0),
+    }
+    fields.update(extra)
+    return Session.objects.create(event=event, **fields)
+
+
+def make_workshop(event, leader, **extra):
+    fields = {
+        'title': 'Workshop',
+        'description': 'Hands-on',
+        'date': datetime.date(2030, 6, 2),
+        'start_time': datetime.time(14, 0),
+        'end_time': datetime.time(16, 0),
+        'room': 'B',
+        'max_participants': 10,
+    }
+    fields.update(extra)
+    return Workshop.objects.create(event=event, leader=leader, **fields)
+
+
+def make_submission(event, author, **extra):
+    fields = {
+        'title': 'Paper',
+        'abstract': 'Abstract',
+        'keywords': 'cardiology, imaging',
+        'co_authors': 'A. Author',
+        'submission_type': 'oral',
+        'abstract_file': 'submissions/abstracts/paper.pdf',
+    }
+    fields.update(extra)
+    return Submission.objects.create(event=event, author=author, **fields)
+
+
+class SubmissionListQueryCountTests(TestCase):
+    """The submission list endpoints must not issue per-row queries."""
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.author = make_user('author', role='author')
+        self.reviewers = [make_user(f'reviewer{i}', role='reviewer') for i in range(3)]
+        self.event = make_event(self.organizer)
+        self.session = make_session(self.event, chair=self.organizer)
+        self.client = APIClient()
+        dashboard_cache().clear()
+        get_unread_counts(self.author.id)
+
+    def add_submissions(self, count):
+        for i in range(count):
+            submission = make_submission(self.event, self.author, title=f'Paper {i}', session=self.session)
+            submission.assigned_reviewers.set(self.reviewers)
+            for score, reviewer in enumerate(self.reviewers, start=1):
+                Review.objects.create(
+                    submission=submission, reviewer=reviewer, relevance_score=score,
+                    quality_score=score, originality_score=score, comments='ok', decision='accept',
+                )
+
+    def count_queries(self, url, user):
+        # measure the uncached dashboard
+        dashboard_cache().clear()
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def assertConstantQueries(self, url, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_submissions(2)
+        small, _ = self.count_queries(url, user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_submissions(15)
+        large, response = self.count_queries(url, user)
+        self.assertEqual(small, large)
+        return response
+
+    def test_event_submissions_list(self):
+        response = self.assertConstantQueries(f'/api/events/{self.event.id}/submissions/', self.organizer)
+        first = response.data['results'][0]
+        self.assertEqual(first['reviews_count'], 3)
+        self.assertEqual(first['average_score'], 2.0)
+        self.assertEqual(first['session_details']['submissions_count'], 17)
+        self.assertEqual(first['reviews'][0]['reviewer_name'], 'reviewer0')
+
+    def test_my_submissions_list(self):
+        self.assertConstantQueries('/api/submissions/my-submissions/', self.author)
+
+    def test_dashboard_my_submissions(self):
+        response = self.assertConstantQueries('/api/dashboard/', self.author)
+        self.assertEqual(len(response.data['my_submissions']), 5)
+
+    def test_average_score_without_reviews(self):
+        make_submission(self.event, self.author)
+        _, response = self.count_queries('/api/submissions/my-submissions/', self.author)
+        self.assertIsNone(response.data['results'][0]['average_score'])
+        self.assertEqual(response.data['results'][0]['reviews_count'], 0)
+
+
+class EventStatisticsTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+        self.url = f'/api/events/{self.event.id}/statistics/'
+
+    def test_statistics_follow_writes(self):
+        alice = make_user('alice', role='author', institution='USTHB', country='Algeria')
+        bob = make_user('bob', role='author', institution='CHU Oran', country='France')
+        make_submission(self.event, alice, status='accepted')
+        make_submission(self.event, alice)
+        pending = make_submission(self.event, bob)
+        Registration.objects.create(event=self.event, user=alice, registration_type='speaker')
+
+        data = self.client.get(self.url).data
+        self.assertEqual(data['total_submissions'], 3)
+        self.assertEqual(data['acceptance_rate'], 33.33)
+        self.assertEqual(data['submissions_by_institution'][0], {'author__institution': 'USTHB', 'count': 2})
+        self.assertEqual(data['speakers'], 1)
+
+        pending.status = 'accepted'
+        pending.save()
+        Registration.objects.create(event=self.event, user=bob, registration_type='participant')
+        make_session(self.event)
+        Workshop.objects.create(
+            event=self.event, leader=self.organizer, title='Workshop', description='Hands-on',
+            date=datetime.date(2030, 6, 2), start_time=datetime.time(9), end_time=datetime.time(12),
+            room='B', max_participants=20,
+        )
+
+        # served from the materialized row
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url).data
+        self.assertEqual(data['accepted_submissions'], 2)
+        self.assertEqual(data['pending_submissions'], 1)
+        self.assertEqual(data['participants'], 1)
+        self.assertEqual(data['registrations_by_country'], [
+            {'user__country': 'Algeria', 'count': 1},
+            {'user__country': 'France', 'count': 1},
+        ])
+        self.assertEqual(data['total_sessions'], 1)
+        self.assertEqual(data['total_workshops'], 1)
+
+        pending.delete()
+        self.assertEqual(self.client.get(self.url).data['total_submissions'], 2)
+
+    def stored(self):
+        return EventStatistics.objects.filter(event=self.event).values().get()
+
+    def test_writes_apply_deltas_that_match_a_rebuild(self):
+        other_event = make_event(self.organizer, title='Other')
+        authors = [
+            make_user(f'author{i}', role='author', institution=f'Institute {i % 12}', country=['Algeria', 'France'][i % 2])
+            for i in range(24)
+        ]
+        submissions = [make_submission(self.event, author) for author in authors]
+        self.client.get(self.url)
+        get_event_statistics(other_event.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            submissions[0].status = 'accepted'
+            submissions[0].save()
+            submissions[1].keywords = 'oncology'
+            submissions[1].save(update_fields=['keywords'])
+        self.assertFalse(any('GROUP BY' in query['sql'] for query in queries))
+
+        submissions[2].event = other_event
+        submissions[2].save()
+        submissions[3].delete()
+        authors[4].delete()
+        bulk_assign(self.event, {(submissions[5].id, make_user('reviewer', role='reviewer').id)})
+        registration = Registration.objects.create(event=self.event, user=authors[6], registration_type='participant')
+        registration.registration_type = 'speaker'
+        registration.save()
+        Registration.objects.create(event=other_event, user=authors[7], registration_type='participant').delete()
+        make_session(self.event).delete()
+        make_session(other_event)
+        self.client.force_authenticate(authors[8])
+        self.client.post(f'/api/events/{self.event.id}/registrations/', {'registration_type': 'participant'}, format='json')
+        self.client.force_authenticate(self.organizer)
+
+        for event in (self.event, other_event):
+            incremental = EventStatistics.objects.filter(event=event).values().get()
+            rebuild_event_statistics(event.id)
+            self.assertEqual(incremental | {'updated_at': None}, EventStatistics.objects.filter(event=event).values().get() | {'updated_at': None})
+
+        data = self.client.get(self.url).data
+        self.assertEqual(len(data['submissions_by_institution']), 10)
+        self.assertEqual(data['submissions_by_institution'][0], {'author__institution': 'Institute 0', 'count': 2})
+        self.assertEqual(self.stored()['submissions_by_status'], {'pending': 19, 'accepted': 1, 'under_review': 1})
+
+    def test_rebuild_command(self):
+        make_submission(self.event, make_user('author', role='author', institution='USTHB'))
+        self.client.get(self.url)
+        EventStatistics.objects.filter(event=self.event).update(total_submissions=0, submissions_by_institution={})
+        call_command('rebuild_event_statistics', stdout=StringIO())
+        self.assertEqual(self.stored()['total_submissions'], 1)
+        self.assertEqual(self.stored()['submissions_by_institution'], {'USTHB': 1})
+
+    def test_unknown_event(self):
+        self.assertEqual(self.client.get('/api/events/999/statistics/').status_code, 404)
+
+
+class DashboardCacheTests(TestCase):
+
+    def setUp(self):
+        dashboard_cache().clear()
+        self.organizer = make_user('organizer', role='organizer')
+        self.author = make_user('author', role='author')
+        self.other = make_user('other', role='author')
+        self.event = make_event(self.organizer)
+        self.client = APIClient()
+
+    def get_dashboard(self, user):
+        self.client.force_authenticate(user)
+        return self.client.get('/api/dashboard/').data
+
+    def notify(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=user, notification_type='event_reminder', title='Reminder', message='Soon')
+
+    def test_repeat_requests_are_served_from_cache(self):
+        self.get_dashboard(self.author)
+        with self.assertNumQueries(0):
+            data = self.get_dashboard(self.author)
+        self.assertEqual(data['unread_notifications'], 0)
+        self.assertEqual(data['my_submissions'], [])
+        self.assertEqual(cache_stats()['hits'], 2)
+        self.assertEqual(cache_stats()['misses'], 2)
+
+    def test_writes_invalidate_only_affected_users(self):
+        self.get_dashboard(self.author)
+        self.get_dashboard(self.other)
+        self.notify(self.author)
+        self.assertEqual(self.get_dashboard(self.author)['unread_notifications'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_dashboard(self.other)['unread_notifications'], 0)
+
+    def test_registration_refreshes_upcoming_events(self):
+        self.assertEqual(self.get_dashboard(self.other)['upcoming_events'][0]['registrations_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Registration.objects.create(event=self.event, user=self.author, registration_type='participant')
+        self.assertEqual(self.get_dashboard(self.other)['upcoming_events'][0]['registrations_count'], 1)
+        self.assertEqual(self.get_dashboard(self.organizer)['my_events'][0]['registrations_count'], 1)
+
+    def test_event_update_refreshes_registrants(self):
+        Registration.objects.create(event=self.event, user=self.other, registration_type='participant')
+        self.assertEqual(self.get_dashboard(self.other)['my_registrations'][0]['event_title'], 'Congress')
+        self.get_dashboard(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.event.title = 'Renamed congress'
+            self.event.save()
+        self.assertEqual(self.get_dashboard(self.other)['my_registrations'][0]['event_title'], 'Renamed congress')
+        # not registered: still served from the cache
+        with self.assertNumQueries(0):
+            self.get_dashboard(self.author)
+
+    def test_cache_stats_endpoint(self):
+        admin = make_user('admin', role='super_admin')
+        self.client.force_authenticate(admin)
+        self.assertEqual(self.client.get('/api/dashboard/cache-stats/').data['misses'], 0)
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.client.get('/api/dashboard/cache-stats/').status_code, 403)
+
+
+class UnreadCounterTests(TestCase):
+
+    def setUp(self):
+        dashboard_cache().clear()
+        self.user = make_user('user')
+        self.sender = make_user('sender')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread_notifications'], 0)
+
+    def notify(self, **extra):
+        return Notification.objects.create(
+            user=self.user, notification_type='event_reminder', title='Reminder', message='Soon', **extra
+        )
+
+    def counts(self):
+        with self.assertNumQueries(1):
+            return self.client.get('/api/notifications/unread-count/').data
+
+    def test_counters_follow_writes(self):
+        self.notify()
+        self.assertEqual(self.counts(), {'unread_notifications': 1, 'unread_messages': 0})
+
+        first = self.notify()
+        self.notify()
+        self.notify(is_read=True)
+        message = Message.objects.create(sender=self.sender, recipient=self.user, subject='Hi', content='Hello')
+        self.assertEqual(self.counts(), {'unread_notifications': 3, 'unread_messages': 1})
+
+        self.client.post(f'/api/notifications/{first.id}/read/')
+        self.client.post(f'/api/notifications/{first.id}/read/')
+        self.assertEqual(self.counts()['unread_notifications'], 2)
+
+        self.client.get(f'/api/messages/{message.id}/')
+        self.assertEqual(self.counts()['unread_messages'], 0)
+
+        self.notify().delete()
+        self.client.post('/api/notifications/read-all/')
+        self.assertEqual(self.counts(), {'unread_notifications': 0, 'unread_messages': 0})
+
+        first.is_read = False
+        first.save()
+        self.assertEqual(self.counts()['unread_notifications'], 1)
+
+    def test_repair_command(self):
+        self.notify()
+        UnreadCounter.objects.filter(user=self.user).update(unread_notifications=7, unread_messages=3)
+        call_command('repair_unread_counters', stdout=StringIO())
+        self.assertEqual(self.counts(), {'unread_notifications': 1, 'unread_messages': 0})
+
+    def test_new_users_start_with_a_counter(self):
+        newcomer = make_user('newcomer')
+        self.assertEqual(
+            UnreadCounter.objects.filter(user=newcomer).values('unread_notifications', 'unread_messages').get(),
+            {'unread_notifications': 0, 'unread_messages': 0},
+        )
+
+    def test_missing_counter_is_built_from_a_recount(self):
+        self.notify()
+        Message.objects.create(sender=self.sender, recipient=self.user, subject='Hi', content='Hello')
+        UnreadCounter.objects.filter(user=self.user).delete()
+        self.assertEqual(get_unread_counts(self.user.id), {'unread_notifications': 1, 'unread_messages': 1})
+        # built once, then read with the primary-key lookup
+        self.assertEqual(self.counts(), {'unread_notifications': 1, 'unread_messages': 1})
+        self.notify()
+        self.assertEqual(self.counts()['unread_notifications'], 2)
+
+
+class SubmissionSearchTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.author = make_user('author', role='author')
+        self.event = make_event(self.organizer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+        self.url = f'/api/events/{self.event.id}/submissions/'
+
+    def search(self, query):
+        return self.client.get(self.url, {'search': query}).data['results']
+
+    def test_ranked_search_over_all_fields(self):
+        make_submission(self.event, self.author, title='Echocardiography in children', abstract='Imaging study.')
+        make_submission(self.event, self.author, title='Diabetes registry', abstract='We followed echocardiography findings.')
+        make_submission(self.event, self.author, title='Unrelated', abstract='Nothing here.', co_authors='Nadia Echocardiography')
+        make_submission(self.event, self.author, title='Other', abstract='Nothing.')
+
+        results = self.search('echocardiography')
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['title'], 'Echocardiography in children')
+        self.assertGreater(results[0]['search_rank'], results[-1]['search_rank'])
+        snippets = {result['title']: result['search_snippet'] for result in results}
+        self.assertEqual(snippets['Diabetes registry'], 'We followed <mark>echocardiography</mark> findings.')
+
+    def test_index_follows_updates_and_deletes(self):
+        submission = make_submission(self.event, self.author, title='Malaria vaccines')
+        self.assertEqual(len(self.search('malaria')), 1)
+        submission.title = 'Tuberculosis vaccines'
+        submission.save()
+        self.assertEqual(self.search('malaria'), [])
+        self.assertEqual(len(self.search('tuberculosis')), 1)
+        submission.delete()
+        self.assertEqual(self.search('tuberculosis'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        make_submission(self.event, self.author, title='Gene therapy')
+        self.assertEqual(len(self.search('gene OR "therapy')), 0)
+        self.assertEqual(len(self.search('gene therapy')), 1)
+        self.assertEqual(self.search('***'), [])
+
+
+class KeywordIndexTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.author = make_user('author', role='author')
+        self.event = make_event(self.organizer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def test_keywords_are_normalized_and_deduplicated(self):
+        submission = make_submission(self.event, self.author, keywords=' Cardiology,  heart   failure, cardiology ,')
+        self.assertEqual(list(submission.keyword_index.values_list('name', flat=True)), ['cardiology', 'heart failure'])
+        submission.keywords = 'Imaging'
+        submission.save()
+        self.assertEqual(list(submission.keyword_index.values_list('name', flat=True)), ['imaging'])
+
+    def test_facets_and_filter(self):
+        make_submission(self.event, self.author, title='A', keywords='Cardiology, Imaging')
+        make_submission(self.event, self.author, title='B', keywords='cardiology')
+        make_submission(make_event(self.organizer), self.author, keywords='Cardiology, Oncology')
+
+        with self.assertNumQueries(1):
+            facets = self.client.get(f'/api/events/{self.event.id}/submissions/keywords/').data
+        self.assertEqual(facets, [{'name': 'cardiology', 'count': 2}, {'name': 'imaging', 'count': 1}])
+        facets_url = f'/api/events/{self.event.id}/submissions/keywords/'
+        self.assertEqual(self.client.get(facets_url, {'limit': 1}).data, [{'name': 'cardiology', 'count': 2}])
+        self.assertEqual(self.client.get(facets_url, {'limit': -1}).status_code, 400)
+        self.assertEqual(self.client.get(facets_url, {'limit': 'all'}).status_code, 400)
+
+        url = f'/api/events/{self.event.id}/submissions/'
+        self.assertEqual(self.client.get(url, {'keyword': 'CARDIOLOGY'}).data['count'], 2)
+        results = self.client.get(url + '?keyword=cardiology&keyword=imaging').data['results']
+        self.assertEqual([r['title'] for r in results], ['A'])
+
+    def test_backfill_command(self):
+        submission = make_submission(self.event, self.author, keywords='Genomics')
+        Submission.objects.filter(pk=submission.pk).update(keywords='Genomics, Epigenetics')
+        call_command('backfill_keywords', stdout=StringIO())
+        self.assertEqual(sorted(submission.keyword_index.values_list('name', flat=True)), ['epigenetics', 'genomics'])
+
+
+class ReviewListTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.submission = make_submission(make_event(self.organizer), make_user('author', role='author'))
+        self.reviewers = [make_user(f'reviewer{i}', role='reviewer') for i in range(2)]
+        self.reviews = [
+            Review.objects.create(
+                submission=self.submission, reviewer=reviewer, relevance_score=4,
+                quality_score=4, originality_score=4, comments='ok', decision='accept',
+            )
+            for reviewer in self.reviewers
+        ]
+        self.url = f'/api/submissions/{self.submission.id}/reviews/'
+        self.client = APIClient()
+
+    def listed(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return sorted(review['id'] for review in response.data['results'])
+
+    def test_each_role_sees_its_reviews(self):
+        every_review = [review.id for review in self.reviews]
+        self.assertEqual(self.listed(self.reviewers[0]), [self.reviews[0].id])
+        self.assertEqual(self.listed(self.organizer), every_review)
+        self.assertEqual(self.listed(make_user('admin', role='super_admin')), every_review)
+        # organizers only see the reviews of their own events
+        self.assertEqual(self.listed(make_user('other', role='organizer')), [])
+
+    def test_other_roles_are_refused(self):
+        self.client.force_authenticate(make_user('author2', role='author'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        # get_queryset refuses too, whatever the permission classes let through
+        view = ReviewListCreateView()
+        view.request = mock.Mock(user=make_user('participant'))
+        view.kwargs = {'submission_id': self.submission.id}
+        with self.assertRaises(PermissionDenied):
+            view.get_queryset()
+
+
+class AutoAssignReviewersTests(TestCase):
+
+    def setUp(self):
+        dashboard_cache().clear()
+        self.organizer = make_user('organizer', role='organizer')
+        self.author = make_user('author', role='author', institution='USTHB')
+        self.event = make_event(self.organizer)
+        self.cardio = make_user('cardio', role='reviewer', research_domain='Cardiology', bio='Heart failure and echocardiography')
+        self.onco = make_user('onco', role='reviewer', research_domain='Oncology', bio='Tumor immunotherapy')
+        self.colleague = make_user('colleague', role='reviewer', research_domain='Cardiology', institution='USTHB')
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+        self.url = f'/api/events/{self.event.id}/auto-assign-reviewers/'
+
+    def test_assigns_by_affinity(self):
+        heart = make_submission(self.event, self.author, title='Heart failure outcomes', keywords='cardiology, echocardiography')
+        tumor = make_submission(self.event, self.author, title='Tumor response', keywords='oncology, immunotherapy')
+
+        response = self.client.post(self.url, {'reviewers_per_submission': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(heart.assigned_reviewers.all()), [self.cardio])
+        self.assertEqual(list(tumor.assigned_reviewers.all()), [self.onco])
+        heart.refresh_from_db()
+        self.assertEqual(heart.status, 'under_review')
+        self.assertEqual(Notification.objects.filter(user=self.cardio, notification_type='review_assigned').count(), 1)
+
+    def test_respects_load_conflicts_and_dry_run(self):
+        for i in range(3):
+            make_submission(self.event, self.author, title=f'Heart study {i}', keywords='cardiology')
+
+        data = self.client.post(self.url, {'reviewers_per_submission': 1, 'max_load': 2, 'dry_run': True}, format='json').data
+        self.assertEqual(len(data['assigned']), 3)
+        self.assertFalse(Submission.assigned_reviewers.through.objects.exists())
+
+        self.client.post(self.url, {'reviewers_per_submission': 1, 'max_load': 2}, format='json')
+        loads = dict(User.objects.filter(role='reviewer').annotate(n=Count('assigned_submissions')).values_list('username', 'n'))
+        self.assertEqual(loads, {'cardio': 2, 'onco': 1, 'colleague': 0})
+
+    def test_flags_sent_as_strings(self):
+        make_submission(self.event, self.author, title='Heart study', keywords='cardiology')
+        data = self.client.post(self.url, {'reviewers_per_submission': 2, 'dry_run': 'false', 'avoid_same_institution': '0'}).data
+        self.assertEqual(len(data['assigned']), 2)
+        self.assertTrue(Submission.assigned_reviewers.through.objects.filter(user=self.colleague).exists())
+        response = self.client.post(self.url, {'dry_run': 'maybe'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_affinity_ignores_terms_one_side_lacks(self):
+        from .assignment import affinity_matrix
+        import numpy as np
+
+        affinity = affinity_matrix(
+            [['tumor', 'tumor', 'unseen'], ['genome'], []],
+            [['heart', 'valve'], ['tumor'], ['genome', 'heart']],
+        )
+        self.assertEqual(affinity.shape, (3, 3))
+        # 'unseen' is not in the reviewer vocabulary, so it does not dilute the match
+        self.assertAlmostEqual(float(affinity[0, 1]), 1.0, places=5)
+        self.assertEqual(affinity[1].argmax(), 2)
+        self.assertEqual(float(affinity[1, 0]), 0.0)
+        self.assertTrue(np.allclose(affinity[2], 0))
+        self.assertTrue(((affinity >= 0) & (affinity <= 1 + 1e-6)).all())
+
+        rng = random.Random(3)
+        words = ['heart', 'tumor', 'genome', 'valve', 'stroke', 'insulin', 'vaccine']
+        submissions = [[rng.choice(words) for _ in range(8)] for _ in range(25)]
+        reviewers = [[rng.choice(words) for _ in range(4)] for _ in range(6)]
+        whole = affinity_matrix(submissions, reviewers)
+        with mock.patch('api.assignment.CHUNK_BYTES', 1):
+            self.assertTrue(np.allclose(affinity_matrix(submissions, reviewers), whole))
+
+    def test_solver_is_balanced(self):
+        from .assignment import solve
+        import numpy as np
+
+        affinity = np.random.default_rng(0).random((40, 8)).astype(np.float32)
+        new = solve(affinity, 3, 16)
+        self.assertTrue((new.sum(axis=1) == 3).all())
+        self.assertLessEqual(new.sum(axis=0).max(), 16)
+
+
+class BulkAssignReviewersTests(TestCase):
+
+    def setUp(self):
+        dashboard_cache().clear()
+        self.organizer = make_user('organizer', role='organizer')
+        self.author = make_user('author', role='author')
+        self.reviewers = [make_user(f'reviewer{i}', role='reviewer') for i in range(3)]
+        self.event = make_event(self.organizer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+        self.url = f'/api/events/{self.event.id}/bulk-assign-reviewers/'
+
+    def mapping(self, submissions):
+        return {str(s.id): [r.id for r in self.reviewers[:2]] for s in submissions}
+
+    def test_query_count_does_not_grow_with_mapping_size(self):
+        small = [make_submission(self.event, self.author) for _ in range(2)]
+        large = [make_submission(self.event, self.author) for _ in range(30)]
+        with CaptureQueriesContext(connection) as small_queries:
+            self.client.post(self.url, {'assignments': self.mapping(small)}, format='json')
+        with CaptureQueriesContext(connection) as large_queries:
+            response = self.client.post(self.url, {'assignments': self.mapping(large)}, format='json')
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual(response.data['newly_assigned'], 60)
+        self.assertEqual(Submission.objects.filter(status='under_review').count(), 32)
+        self.assertEqual(Notification.objects.filter(user=self.reviewers[0]).count(), 32)
+
+    def test_existing_pairs_are_skipped(self):
+        submission = make_submission(self.event, self.author)
+        submission.assigned_reviewers.add(self.reviewers[0])
+        response = self.client.post(self.url, {'assignments': self.mapping([submission])}, format='json')
+        self.assertEqual((response.data['newly_assigned'], response.data['already_assigned']), (1, 1))
+        self.assertFalse(Notification.objects.filter(user=self.reviewers[0]).exists())
+
+    def test_invalid_mapping_is_rejected_as_a_whole(self):
+        submission = make_submission(self.event, self.author)
+        other_event = make_submission(make_event(self.organizer), self.author)
+        response = self.client.post(self.url, {'assignments': {
+            str(submission.id): [self.reviewers[0].id],
+            str(other_event.id): [self.author.id],
+        }}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['unknown_submission_ids'], [other_event.id])
+        self.assertEqual(response.data['invalid_reviewer_ids'], [self.author.id])
+        self.assertFalse(submission.assigned_reviewers.exists())
+
+
+@task('tests.always_fails')
+def always_fails():
+    raise RuntimeError('boom')
+
+
+@task('tests.long_running', atomic=False)
+def long_running(reclaimed=False):
+    job = Job.objects.get(status='running')
+    if reclaimed:
+        # the lock expired meanwhile and another worker claimed the job
+        Job.objects.filter(pk=job.pk).update(locked_by='other-worker')
+    heartbeat()
+    return {'extended': Job.objects.get(pk=job.pk).locked_until > job.locked_until}
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        dashboard_cache().clear()
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def test_broadcast_is_queued_and_fanned_out(self):
+        attendees = [make_user(f'attendee{i}') for i in range(3)]
+        for attendee in attendees:
+            Registration.objects.create(event=self.event, user=attendee, registration_type='participant')
+        get_unread_counts(attendees[0].id)
+
+        response = self.client.post(f'/api/events/{self.event.id}/broadcast/', {
+            'title': 'Program updated', 'message': 'Room change for session 2',
+        }, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(run_worker(burst=True), 1)
+        job = self.client.get(f"/api/jobs/{response.data['id']}/").data
+        self.assertEqual((job['status'], job['result']), ('succeeded', {'sent': 3}))
+        self.assertEqual(Notification.objects.filter(notification_type='program_updated').count(), 3)
+        self.assertEqual(get_unread_counts(attendees[0].id)['unread_notifications'], 1)
+
+    def test_broadcast_commits_per_batch_and_resumes(self):
+        for i in range(5):
+            Registration.objects.create(event=self.event, user=make_user(f'attendee{i}'), registration_type='participant')
+        self.client.post(f'/api/events/{self.event.id}/broadcast/', {'title': 'Moved', 'message': 'New room'}, format='json')
+
+        from . import notifications
+        send, calls = notifications.notify_users, []
+
+        def flaky(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OperationalError('database is locked')
+            return send(*args, **kwargs)
+
+        with mock.patch('api.notifications.BROADCAST_BATCH_SIZE', 2), \
+                mock.patch('api.notifications.notify_users', flaky), self.assertLogs('api.tasks', level='ERROR'):
+            run_worker(burst=True)
+        # the first batch stays committed when a later one fails
+        self.assertEqual(Notification.objects.filter(title='Moved').count(), 2)
+
+        Job.objects.update(run_after=timezone.now())
+        with mock.patch('api.notifications.BROADCAST_BATCH_SIZE', 2):
+            run_worker(burst=True)
+        self.assertEqual(Job.objects.get().result, {'sent': 3})
+        self.assertEqual(Notification.objects.filter(title='Moved').values('user').distinct().count(), 5)
+        self.assertEqual(Notification.objects.filter(title='Moved').count(), 5)
+
+    def test_certificate_generation_is_queued(self):
+        response = self.client.post(f'/api/events/{self.event.id}/generate-certificates/')
+        self.assertEqual(response.status_code, 202)
+        run_worker(burst=True)
+        job = Job.objects.get(pk=response.data['job']['id'])
+        self.assertEqual(job.result, {'created': 1, 'total_certificates': 1})
+
+    def test_failed_jobs_are_retried_then_marked_failed(self):
+        job = enqueue('tests.always_fails', max_attempts=2)
+        with self.assertLogs('api.tasks', level='ERROR'):
+            run_worker(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertIn('RuntimeError: boom', job.error)
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('api.tasks', level='ERROR'):
+            run_worker(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_expired_lock_is_reclaimed(self):
+        job = enqueue('certificates.generate', {'event_id': self.event.id})
+        self.assertEqual(claim('dead-worker').pk, job.pk)
+        self.assertIsNone(claim('other-worker'))
+
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - datetime.timedelta(seconds=1))
+        self.assertEqual(run_worker(burst=True, worker='other-worker'), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), ('succeeded', 2, 'other-worker'))
+
+    def test_heartbeat_extends_the_lock(self):
+        job = enqueue('tests.long_running')
+        run_worker(burst=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), ('succeeded', {'extended': True}))
+
+    def test_heartbeat_stops_a_job_that_lost_its_lock(self):
+        job = enqueue('tests.long_running', {'reclaimed': True})
+        with self.assertLogs('api.tasks', level='ERROR') as logs:
+            run_worker(burst=True, worker='first-worker')
+        self.assertIn('LockLost', logs.output[0])
+        job.refresh_from_db()
+        # left to the worker that holds it now
+        self.assertEqual((job.status, job.locked_by, job.error), ('running', 'other-worker', ''))
+
+    def test_jobs_are_private(self):
+        job = enqueue('certificates.generate', {'event_id': self.event.id}, user=self.organizer)
+        self.client.force_authenticate(make_user('someone'))
+        self.assertEqual(self.client.get(f'/api/jobs/{job.id}/').status_code, 404)
+
+
+class CertificateGenerationTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+
+    def register(self, count, registration_type='participant', prefix='attendee'):
+        users = [make_user(f'{prefix}{i}') for i in range(count)]
+        for user in users:
+            Registration.objects.create(event=self.event, user=user, registration_type=registration_type)
+        return users
+
+    def test_creates_missing_certificates_only(self):
+        speakers = self.register(2, 'speaker', prefix='speaker')
+        self.register(3)
+        member = make_user('member', role='reviewer')
+        self.event.scientific_committee.add(member)
+        Certificate.objects.create(event=self.event, user=speakers[0], certificate_type='presentation')
+
+        self.assertEqual(create_certificate_records(self.event.id), {'created': 6, 'total_certificates': 7})
+        self.assertEqual(create_certificate_records(self.event.id), {'created': 0, 'total_certificates': 7})
+        types = dict(Certificate.objects.values_list('user__username', 'certificate_type'))
+        self.assertEqual(types['speaker1'], 'presentation')
+        self.assertEqual(types['attendee0'], 'participation')
+        self.assertEqual(types['member'], 'committee')
+        self.assertEqual(types['organizer'], 'organization')
+
+    def test_query_count_does_not_grow_with_registrations(self):
+        self.register(2, prefix='small')
+        with CaptureQueriesContext(connection) as small:
+            create_certificate_records(self.event.id)
+        self.register(40, prefix='large')
+        with CaptureQueriesContext(connection) as large:
+            create_certificate_records(self.event.id)
+        self.assertEqual(len(small), len(large))
+
+
+class CertificateRenderingTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        for i in range(5):
+            user = make_user(f'attendee{i}', first_name='Ada', last_name=f'Lovelace {i}')
+            Registration.objects.create(event=self.event, user=user, registration_type='participant')
+        create_certificate_records(self.event.id)
+
+    def test_renders_pdf_for_every_certificate(self):
+        progress = render_certificates(self.event.id, processes=0, batch_size=2)
+        self.assertEqual(progress, {'total': 6, 'rendered': 6, 'pending': 0})
+        for certificate in Certificate.objects.filter(event=self.event):
+            with certificate.certificate_file.open('rb') as handle:
+                self.assertEqual(handle.read(5), b'%PDF-')
+
+    def test_process_pool_renders_every_certificate(self):
+        batches = []
+        progress = render_certificates(self.event.id, processes=2, batch_size=2, on_batch=lambda: batches.append(1))
+        self.assertEqual(progress, {'total': 6, 'rendered': 6, 'pending': 0})
+        self.assertEqual(len(batches), 3)
+        names = set()
+        for certificate in Certificate.objects.filter(event=self.event):
+            names.add(certificate.certificate_file.name)
+            with certificate.certificate_file.open('rb') as handle:
+                self.assertEqual(handle.read(5), b'%PDF-')
+        self.assertEqual(len(names), 6)
+
+    def test_render_job_heartbeats_after_every_batch(self):
+        job = enqueue('certificates.render', {'event_id': self.event.id, 'processes': 0})
+        with mock.patch('api.tasks.heartbeat') as beat, mock.patch('api.rendering.render_batch', wraps=render_batch) as rendered:
+            run_worker(burst=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual(beat.call_count, rendered.call_count)
+
+    def rendered_files(self):
+        directory = os.path.join(self.media_root, 'certificates', f'event_{self.event.id}')
+        return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+    def test_render_job_runs_in_a_worker_process(self):
+        # the forked worker uses its copy of the test database; the files land in MEDIA_ROOT
+        enqueue('certificates.render', {'event_id': self.event.id, 'processes': 2})
+        workers = start_workers(1, burst=True, poll_interval=0)
+        for worker in workers:
+            worker.join(60)
+        self.assertEqual([worker.exitcode for worker in workers], [0])
+        self.assertEqual(len(self.rendered_files()), 6)
+
+    def test_daemonic_process_renders_in_process(self):
+        context = multiprocessing.get_context('fork')
+        process = context.Process(target=render_certificates, args=(self.event.id,), kwargs={'processes': 2}, daemon=True)
+        process.start()
+        process.join(60)
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(len(self.rendered_files()), 6)
+
+    def test_resume_renders_only_pending_certificates(self):
+        render_certificates(self.event.id, processes=0)
+        first = Certificate.objects.order_by('id').first()
+        untouched = set(Certificate.objects.exclude(id=first.id).values_list('certificate_file', flat=True))
+        Certificate.objects.filter(id=first.id).update(certificate_file='')
+
+        self.assertEqual(render_progress(self.event.id)['pending'], 1)
+        with CaptureQueriesContext(connection) as queries:
+            render_certificates(self.event.id, processes=0)
+        updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(set(Certificate.objects.exclude(id=first.id).values_list('certificate_file', flat=True)), untouched)
+        self.assertEqual(render_progress(self.event.id)['pending'], 0)
+
+    def test_render_endpoint_queues_job(self):
+        client = APIClient()
+        client.force_authenticate(self.organizer)
+        response = client.post(f'/api/events/{self.event.id}/render-certificates/', {'processes': 2}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['progress']['pending'], 6)
+        job = Job.objects.get(pk=response.data['job']['id'])
+        self.assertEqual(job.payload, {'event_id': self.event.id, 'processes': 2})
+
+        outsider = make_user('other', role='organizer')
+        client.force_authenticate(outsider)
+        response = client.get(f'/api/events/{self.event.id}/certificates/progress/')
+        self.assertEqual(response.status_code, 403)
+
+
+class CertificateExportTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        for i in range(3):
+            Registration.objects.create(event=self.event, user=make_user(f'attendee{i}'), registration_type='participant')
+        create_certificate_records(self.event.id)
+        render_certificates(self.event.id, processes=0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def download(self, query=''):
+        response = self.client.get(f'/api/events/{self.event.id}/certificates/export/{query}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+
+    def test_streams_stored_archive_of_all_certificates(self):
+        archive = self.download()
+        self.assertIsNone(archive.testzip())
+        names = archive.namelist()
+        self.assertEqual(len(names), 4)
+        self.assertIn('organization/organizer_%d.pdf' % Certificate.objects.get(user=self.organizer).id, names)
+        for info in archive.infolist():
+            self.assertEqual(info.compress_type, zipfile.ZIP_STORED)
+            self.assertTrue(archive.read(info).startswith(b'%PDF-'))
+
+    def test_filters_by_certificate_type(self):
+        archive = self.download('?certificate_type=participation')
+        self.assertEqual(len(archive.namelist()), 3)
+        self.assertTrue(all(name.startswith('participation/') for name in archive.namelist()))
+        response = self.client.get(f'/api/events/{self.event.id}/certificates/export/?certificate_type=bogus')
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_organizer_can_export(self):
+        self.client.force_authenticate(make_user('other', role='organizer'))
+        response = self.client.get(f'/api/events/{self.event.id}/certificates/export/')
+        self.assertEqual(response.status_code, 403)
+
+
+class ProtectedMediaTests(TestCase):
+    content = b'%PDF-1.4 ' + bytes(range(256)) * 8
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, PROTECTED_MEDIA_SERVER=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.owner = make_user('owner')
+        self.certificate = Certificate.objects.create(event=self.event, user=self.owner, certificate_type='participation')
+        self.certificate.certificate_file.save('owner.pdf', ContentFile(self.content))
+        self.url = f'/api/certificates/{self.certificate.id}/download/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def test_full_download_sets_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+    def test_conditional_get_returns_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # a stale If-Range falls back to the whole file
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_offloads_to_front_server(self):
+        with override_settings(PROTECTED_MEDIA_SERVER='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.certificate.certificate_file.name)
+        self.assertEqual(response.content, b'')
+
+        with override_settings(PROTECTED_MEDIA_SERVER='apache'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.certificate.certificate_file.path)
+
+    def test_file_missing_from_storage_is_a_404(self):
+        self.certificate.certificate_file.storage.delete(self.certificate.certificate_file.name)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=0-9').status_code, 404)
+
+    def test_permissions(self):
+        self.client.force_authenticate(make_user('stranger'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_authenticate(self.organizer)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        submission = make_submission(self.event, self.owner)
+        submission.abstract_file.save('abstract.pdf', ContentFile(b'abstract'))
+        url = f'/api/submissions/{submission.id}/abstract/download/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(f'/api/submissions/{submission.id}/paper/download/').status_code, 404)
+        self.client.force_authenticate(make_user('stranger2'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class SurveyResultsTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.survey = Survey.objects.create(event=self.event, title='Feedback')
+        self.rating = SurveyQuestion.objects.create(survey=self.survey, question_text='Rate', question_type='rating', order=1)
+        self.choice = SurveyQuestion.objects.create(
+            survey=self.survey, question_text='Pick', question_type='choice', choices='Yes, No, Maybe', order=2
+        )
+        self.text = SurveyQuestion.objects.create(survey=self.survey, question_text='Comments', question_type='text', order=3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def answer(self, count, prefix='user'):
+        for i in range(count):
+            user = make_user(f'{prefix}{i}')
+            SurveyResponse.objects.bulk_create([
+                SurveyResponse(survey=self.survey, question=self.rating, user=user, response_rating=i % 5 + 1),
+                SurveyResponse(survey=self.survey, question=self.choice, user=user, response_text='Yes' if i % 2 else 'No'),
+                SurveyResponse(survey=self.survey, question=self.text, user=user, response_text=f'comment {i}'),
+            ])
+
+    def results(self):
+        response = self.client.get(f'/api/surveys/{self.survey.id}/results/')
+        self.assertEqual(response.status_code, 200)
+        return {entry['question_id']: entry for entry in response.data}
+
+    def test_aggregates(self):
+        self.answer(25)
+        results = self.results()
+        self.assertEqual(results[self.rating.id]['average_rating'], 3.0)
+        self.assertEqual(results[self.rating.id]['total_responses'], 25)
+        self.assertEqual(results[self.choice.id]['choices'], {'Yes': 12, 'No': 13, 'Maybe': 0})
+        self.assertEqual(len(results[self.text.id]['responses']), 20)
+        self.assertTrue(results[self.text.id]['has_more'])
+
+        response = self.client.get(f'/api/surveys/{self.survey.id}/questions/{self.text.id}/answers/?page=2')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual([a['response_text'] for a in response.data['results']], [f'comment {i}' for i in range(20, 25)])
+
+    def test_query_count_does_not_grow_with_responses(self):
+        self.answer(2, prefix='small')
+        with CaptureQueriesContext(connection) as small:
+            self.results()
+        self.answer(30, prefix='large')
+        with CaptureQueriesContext(connection) as large:
+            self.results()
+        self.assertEqual(len(small), len(large))
+
+    def test_csv_export_streams_every_response(self):
+        self.answer(3)
+        response = self.client.get(f'/api/surveys/{self.survey.id}/export/')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['response_id', 'question_id', 'question'])
+        self.assertEqual(len(lines), 10)
+
+        self.client.force_authenticate(make_user('other', role='organizer'))
+        self.assertEqual(self.client.get(f'/api/surveys/{self.survey.id}/export/').status_code, 403)
+
+
+class SurveySubmissionTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.survey = Survey.objects.create(event=self.event, title='Feedback')
+        self.rating = SurveyQuestion.objects.create(survey=self.survey, question_text='Rate', question_type='rating')
+        self.choice = SurveyQuestion.objects.create(
+            survey=self.survey, question_text='Pick', question_type='choice', choices='Yes, No'
+        )
+        self.text = SurveyQuestion.objects.create(survey=self.survey, question_text='Comments', question_type='text')
+        self.attendee = make_user('attendee')
+        self.client = APIClient()
+        self.client.force_authenticate(self.attendee)
+        self.url = f'/api/surveys/{self.survey.id}/submit/'
+
+    def payload(self, overrides=None):
+        answers = {
+            self.rating.id: {'question': self.rating.id, 'response_rating': 4},
+            self.choice.id: {'question': self.choice.id, 'response_text': 'Yes'},
+            self.text.id: {'question': self.text.id, 'response_text': 'Great talks'},
+        }
+        answers.update(overrides or {})
+        return {'answers': list(answers.values())}
+
+    def test_submits_all_answers_in_one_insert(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, self.payload(), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        inserts = [q for q in queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.survey.refresh_from_db()
+        self.assertEqual(self.survey.respondents_count, 1)
+        response = self.client.get(f'/api/surveys/{self.survey.id}/')
+        self.assertEqual(response.data['responses_count'], 1)
+
+    def test_rejects_invalid_answers(self):
+        other = SurveyQuestion.objects.create(
+            survey=Survey.objects.create(event=self.event, title='Other'), question_text='?', question_type='text'
+        )
+        for answers in (
+            {self.rating.id: {'question': self.rating.id, 'response_rating': 9}},
+            {self.choice.id: {'question': self.choice.id, 'response_text': 'Perhaps'}},
+            {other.id: {'question': other.id, 'response_text': 'x'}},
+        ):
+            response = self.client.post(self.url, self.payload(answers), format='json')
+            self.assertEqual(response.status_code, 400)
+        duplicated = self.payload()
+        duplicated['answers'].append({'question': self.text.id, 'response_text': 'again'})
+        self.assertEqual(self.client.post(self.url, duplicated, format='json').status_code, 400)
+        self.assertFalse(SurveyResponse.objects.exists())
+
+    def test_rejects_second_submission(self):
+        self.client.post(self.url, self.payload(), format='json')
+        response = self.client.post(self.url, self.payload(), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SurveyResponse.objects.count(), 3)
+        self.survey.refresh_from_db()
+        self.assertEqual(self.survey.respondents_count, 1)
+
+    def test_single_answers_maintain_respondent_count(self):
+        for question, data in ((self.text, {'response_text': 'a'}), (self.rating, {'response_rating': 3})):
+            response = self.client.post(
+                '/api/surveys/responses/', {'survey': self.survey.id, 'question': question.id, **data}, format='json'
+            )
+            self.assertEqual(response.status_code, 201)
+        self.survey.refresh_from_db()
+        self.assertEqual(self.survey.respondents_count, 1)
+
+    def test_concurrent_single_answer_is_a_400(self):
+        SurveyResponse.objects.create(survey=self.survey, question=self.text, user=self.attendee, response_text='a')
+        # both requests passed the duplicate check before either inserted
+        with mock.patch('django.db.models.query.QuerySet.exists', return_value=False):
+            response = self.client.post(
+                '/api/surveys/responses/', {'survey': self.survey.id, 'question': self.text.id, 'response_text': 'b'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SurveyResponse.objects.count(), 1)
+
+    def test_concurrent_submission_is_a_400(self):
+        from . import views
+
+        def race(survey, user, answers):
+            SurveyResponse.objects.create(survey=survey, question=self.text, user=user, response_text='first')
+            return submit_answers(survey, user, answers)
+
+        submit_answers = views.submit_answers
+        with mock.patch('api.views.submit_answers', race):
+            response = self.client.post(self.url, self.payload(), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(SurveyResponse.objects.values_list('response_text', flat=True)), ['first'])
+
+
+class LiveQuestionsTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.session = make_session(self.event)
+        self.attendee = make_user('attendee')
+        self.questions = [
+            Question.objects.create(session=self.session, user=self.attendee, content=f'Question {i}') for i in range(3)
+        ]
+        QuestionLikes.objects.create(question=self.questions[0], user=self.organizer)
+        self.token = str(AccessToken.for_user(self.attendee))
+
+    def test_likes_are_coalesced_into_one_delta(self):
+        async def run():
+            subscription = get_channel_layer().subscribe(session_group(self.session.id))
+            coalescer = LikeCoalescer(interval=60)
+            for _ in range(3):
+                coalescer.add(self.session.id, 1)
+            coalescer.add(self.session.id, 2)
+            coalescer.flush()
+            event = await asyncio.wait_for(anext(subscription), 1)
+            subscription.close()
+            return event
+
+        event = asyncio.run(run())
+        self.assertEqual(event, {'type': 'question.likes', 'id': None, 'data': {1: 3, 2: 1}})
+
+    async def test_stream_resumes_from_last_seen_question(self):
+        first = self.questions[0]
+        response = await self.async_client.get(
+            f'/api/sessions/{self.session.id}/live/', {'token': self.token, 'last_id': first.id}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 3000\n\n')
+        replayed = [await anext(stream) for _ in range(3)]
+        self.assertTrue(replayed[0].startswith(f'id: {self.questions[1].id}\nevent: question.created'.encode()))
+        self.assertTrue(replayed[1].startswith(f'id: {self.questions[2].id}\n'.encode()))
+        self.assertIn(f'"likes":{{"{first.id}":1}}'.encode(), replayed[2])
+
+        get_channel_layer().publish(session_group(self.session.id), {'type': 'question.likes', 'id': None, 'data': {first.id: 2}})
+        self.assertEqual(await anext(stream), f'event: question.likes\ndata: {{"{first.id}":2}}\n\n'.encode())
+        # a client disconnect cancels the pending read
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+        self.assertEqual(get_channel_layer().subscriber_count(session_group(self.session.id)), 0)
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get(f'/api/sessions/{self.session.id}/live/')
+        self.assertEqual(response.status_code, 403)
+
+
+class QuestionLikesTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.session = make_session(make_event(self.organizer))
+        self.author = make_user('author')
+        self.questions = [
+            Question.objects.create(session=self.session, user=self.author, content=f'Question {i}') for i in range(3)
+        ]
+        self.client = APIClient()
+
+    def like(self, question, user):
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/questions/{question.id}/like/')
+
+    def test_like_is_counted_once(self):
+        voter = make_user('voter')
+        response = self.like(self.questions[0], voter)
+        self.assertEqual(response.data, {'likes': 1})
+        self.assertEqual(self.like(self.questions[0], voter).status_code, 400)
+        self.assertEqual(QuestionLikes.objects.count(), 1)
+        self.questions[0].refresh_from_db()
+        self.assertEqual(self.questions[0].likes_count, 1)
+
+    def test_counter_follows_deleted_likes(self):
+        voter = make_user('voter')
+        self.like(self.questions[1], voter)
+        voter.delete()
+        self.questions[1].refresh_from_db()
+        self.assertEqual(self.questions[1].likes_count, 0)
+
+    def test_counter_follows_likes_added_outside_the_api(self):
+        voter = make_user('voter')
+        like = QuestionLikes.objects.create(question=self.questions[2], user=voter)
+        self.questions[2].refresh_from_db()
+        self.assertEqual(self.questions[2].likes_count, 1)
+        self.assertEqual(self.like(self.questions[2], make_user('fan')).data, {'likes': 2})
+        like.delete()
+        self.questions[2].refresh_from_db()
+        self.assertEqual(self.questions[2].likes_count, 1)
+
+    def test_ranked_feed(self):
+        for i in range(3):
+            self.like(self.questions[1], make_user(f'fan{i}'))
+        self.like(self.questions[2], make_user('fan3'))
+        self.client.force_authenticate(self.organizer)
+        response = self.client.get(f'/api/sessions/{self.session.id}/questions/?ordering=-likes')
+        self.assertEqual(
+            [(q['id'], q['likes_count']) for q in response.data['results']],
+            [(self.questions[1].id, 3), (self.questions[2].id, 1), (self.questions[0].id, 0)],
+        )
+
+
+class WorkshopSeatTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.workshop = make_workshop(self.event, self.organizer, max_participants=2)
+        self.client = APIClient()
+
+    def call(self, user, action):
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/workshops/{self.workshop.id}/{action}/')
+
+    def test_full_workshop_waitlists_and_promotes_in_order(self):
+        users = [make_user(f'user{i}') for i in range(4)]
+        self.assertEqual(self.call(users[0], 'register').status_code, 200)
+        self.assertEqual(self.call(users[1], 'register').status_code, 200)
+        response = self.call(users[2], 'register')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['waitlist_position'], 1)
+        self.assertEqual(self.call(users[3], 'register').data['waitlist_position'], 2)
+        self.assertEqual(self.call(users[0], 'register').status_code, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.call(users[0], 'cancel').status_code, 200)
+        self.assertEqual(set(self.workshop.participants.values_list('username', flat=True)), {'user1', 'user2'})
+        self.assertEqual(Job.objects.get(task='notifications.send').payload['user_ids'], [users[2].id])
+
+        self.client.force_authenticate(self.organizer)
+        response = self.client.get(f'/api/workshops/{self.workshop.id}/')
+        self.assertEqual((response.data['participants_count'], response.data['available_seats']), (2, 0))
+
+        # raising the capacity seats the rest of the waitlist
+        self.client.patch(f'/api/workshops/{self.workshop.id}/', {'max_participants': 5}, format='json')
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.seats_taken, 3)
+        self.assertFalse(WorkshopWaitlist.objects.exists())
+
+    def test_promotion_skips_a_waitlisted_user_who_already_has_a_seat(self):
+        users = [make_user(f'user{i}') for i in range(4)]
+        for user in users:
+            self.call(user, 'register')
+        # user2 was seated by a concurrent register while still on the waitlist
+        Workshop.participants.through.objects.create(workshop=self.workshop, user=users[2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.call(users[0], 'cancel').status_code, 200)
+        self.assertEqual(set(self.workshop.participants.values_list('username', flat=True)), {'user1', 'user2', 'user3'})
+        self.assertFalse(WorkshopWaitlist.objects.exists())
+        self.assertEqual(Job.objects.get(task='notifications.send').payload['user_ids'], [users[3].id])
+
+    def test_cancel_without_waitlist_frees_the_seat(self):
+        user = make_user('user')
+        self.call(user, 'register')
+        self.call(user, 'cancel')
+        self.workshop.refresh_from_db()
+        self.assertEqual(self.workshop.seats_taken, 0)
+        self.assertEqual(self.call(user, 'cancel').status_code, 400)
+
+
+class WorkshopSeatConcurrencyTests(TransactionTestCase):
+
+    def test_parallel_registrations_never_oversell(self):
+        organizer = make_user('organizer', role='organizer')
+        workshop = make_workshop(make_event(organizer), organizer, max_participants=50)
+        users = User.objects.bulk_create([User(username=f'rush{i}', email=f'rush{i}@example.com') for i in range(500)])
+
+        def attempt(user):
+            try:
+                for _ in range(500):
+                    try:
+                        return register_participant(workshop, user)[0]
+                    except OperationalError:
+                        # the shared in-memory test database reports a locked table instead of waiting
+                        time.sleep(random.uniform(0, 0.02))
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            states = list(pool.map(attempt, users))
+
+        workshop.refresh_from_db()
+        self.assertEqual(states.count('registered'), 50)
+        self.assertEqual(states.count('waitlisted'), 450)
+        self.assertEqual(workshop.seats_taken, 50)
+        self.assertEqual(workshop.participants.count(), 50)
+        self.assertEqual(WorkshopWaitlist.objects.filter(workshop=workshop).count(), 450)
+
+
+class AdmissionControlTests(TestCase):
+
+    def setUp(self):
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+        self.url = f'/api/events/{self.event.id}/registrations/'
+        self.client = APIClient()
+        registration_queue.reset_stats()
+
+    def test_registration_goes_through_the_queue(self):
+        attendee = make_user('attendee')
+        self.client.force_authenticate(attendee)
+        response = self.client.post(self.url, {'registration_type': 'participant'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], Registration.objects.get(user=attendee).id)
+        response = self.client.post(self.url, {'registration_type': 'participant'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(registration_queue.stats()['admitted'], 2)
+
+    def test_saturated_queue_answers_429(self):
+        self.client.force_authenticate(make_user('attendee'))
+        with override_settings(ADMISSION_QUEUE_LIMIT=0):
+            response = self.client.post(self.url, {'registration_type': 'participant'}, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertFalse(Registration.objects.exists())
+
+        self.client.force_authenticate(make_user('admin', role='super_admin'))
+        stats = self.client.get('/api/admission/stats/').data
+        self.assertEqual(stats['registrations']['rejected'], 1)
+
+    def test_concurrent_writes_are_batched_in_arrival_order(self):
+        written = []
+
+        def write_batch(event_id, items):
+            time.sleep(0.02)
+            written.append(list(items))
+            return [item * 10 for item in items]
+
+        queue = AdmissionQueue('test', write_batch, batch_size=8)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda item: queue.submit(1, item), range(40)))
+
+        self.assertEqual(results, [item * 10 for item in range(40)])
+        self.assertEqual(sorted(item for batch in written for item in batch), list(range(40)))
+        self.assertTrue(all(len(batch) <= 8 for batch in written))
+        self.assertLess(len(written), 40)
+        self.assertEqual(queue.stats()['written'], 40)
+        self.assertEqual(queue.stats()['queue_depth'], 0)
+
+    def test_depth_is_bounded_per_event(self):
+        started, release = threading.Event(), threading.Event()
+        written = []
+
+        def write_batch(event_id, items):
+            started.set()
+            release.wait(5)
+            written.append((event_id, list(items)))
+            return items
+
+        queue = AdmissionQueue('test', write_batch)
+        with override_settings(ADMISSION_QUEUE_LIMIT=2), ThreadPoolExecutor(max_workers=4) as pool:
+            first = pool.submit(queue.submit, 1, 'a')
+            started.wait(5)
+            # 'a' is being written; two more writes for event 1 fill its lane
+            waiting = [pool.submit(queue.submit, 1, item) for item in 'bc']
+            while queue.stats()['queue_depth'] < 2:
+                time.sleep(0.001)
+            with self.assertRaises(Saturated):
+                queue.submit(1, 'd')
+            other = pool.submit(queue.submit, 2, 'x')
+            release.set()
+            self.assertEqual([future.result() for future in [first, *waiting, other]], ['a', 'b', 'c', 'x'])
+        # the writes queued behind the first one were committed together
+        self.assertEqual(written, [(1, ['a']), (1, ['b', 'c']), (2, ['x'])])
+        self.assertEqual(queue.stats()['rejected'], 1)
+
+
+class AdmissionWriterThreadTests(TransactionTestCase):
+    """Outside a transaction, queued writes are saved by the queue's writer thread."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.organizer = make_user('organizer', role='organizer')
+        self.event = make_event(self.organizer)
+
+    def post(self, queue, user, url, data, format):
+        writers = []
+        write_batch = queue.write_batch
+
+        def recorded(event_id, items):
+            writers.append(threading.get_ident())
+            return write_batch(event_id, items)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        with mock.patch.object(queue, 'write_batch', recorded):
+            response = client.post(url, data, format=format)
+        self.assertEqual(len(writers), 1)
+        self.assertNotEqual(writers[0], threading.get_ident())
+        return response
+
+    def test_submission_written_by_another_thread(self):
+        author = make_user('author', role='author')
+        response = self.post(submission_queue, author, f'/api/events/{self.event.id}/submissions/', {
+            'event': self.event.id,
+            'title': 'Cardiac imaging in athletes',
+            'abstract': 'Abstract',
+            'keywords': 'cardiology, imaging',
+            'co_authors': 'A. Author',
+            'submission_type': 'oral',
+            'abstract_file': SimpleUploadedFile('abstract.pdf', b'%PDF-1.4 abstract'),
+        }, 'multipart')
+        self.assertEqual(response.status_code, 201)
+        submission = Submission.objects.get()
+        self.assertEqual(response.data['id'], submission.id)
+        self.assertEqual(submission.author, author)
+        self.assertTrue(submission.abstract_file.storage.exists(submission.abstract_file.name))
+        # the writer's post-commit work ran for the other request
+        self.assertEqual(sorted(submission.keyword_index.values_list('name', flat=True)), ['cardiology', 'imaging'])
+        self.assertEqual(submission_queue.stats()['queue_depth'], 0)
+
+    def test_registration_written_by_another_thread(self):
+        attendee = make_user('attendee')
+        url = f'/api/events/{self.event.id}/registrations/'
+        response = self.post(registration_queue, attendee, url, {'registration_type': 'participant'}, 'json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], Registration.objects.get(event=self.event, user=attendee).id)
+        response = self.post(registration_queue, attendee, url, {'registration_type': 'participant'}, 'json')
+        self.assertEqual(response.status_code, 400)
+
+
+class CursorPaginationTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('reader')
+        Notification.objects.bulk_create([
+            Notification(user=self.user, notification_type='event_reminder', title=f'N{i}', message='m') for i in range(25)
+        ])
+        # plenty of ties on the timestamp: the id has to break them
+        same = timezone.now() - datetime.timedelta(days=1)
+        Notification.objects.filter(id__in=Notification.objects.order_by('id').values('id')[5:15]).update(created_at=same)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            self.assertFalse(any('COUNT(' in q['sql'] for q in queries))
+            ids.extend(n['id'] for n in response.data['results'])
+            if not ids or len(ids) == 10:
+                # a notification arriving mid-walk must not shift later pages
+                Notification.objects.create(user=self.user, notification_type='event_reminder', title='new', message='m')
+            url = response.data['next']
+        return ids
+
+    def test_walks_every_row_once_in_keyset_order(self):
+        expected = list(
+            Notification.objects.filter(user=self.user).order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        ids = self.walk('/api/notifications/?pagination=cursor&page_size=10')
+        self.assertEqual(ids, expected)
+
+    def test_page_numbers_stay_the_default(self):
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(response.data['count'], 25)
+        self.assertEqual(self.client.get('/api/notifications/?cursor=garbage').status_code, 404)
+
+
+class ConversationTests(TestCase):
+
+    def setUp(self):
+        self.alice = make_user('alice')
+        self.bob = make_user('bob')
+        self.carol = make_user('carol')
+        self.client = APIClient()
+
+    def send(self, sender, recipient, content='Hello', **extra):
+        self.client.force_authenticate(sender)
+        response = self.client.post('/api/messages/', {
+            'recipient': recipient.id, 'subject': 'Hi', 'content': content, **extra
+        })
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def inbox(self, user):
+        self.client.force_authenticate(user)
+        with self.assertNumQueries(2):
+            return self.client.get('/api/conversations/').data['results']
+
+    def test_send_threads_messages_by_pair(self):
+        first = self.send(self.alice, self.bob)
+        reply = self.send(self.bob, self.alice, 'Hi back')
+        self.assertEqual(first['conversation'], reply['conversation'])
+        self.assertEqual(Conversation.objects.count(), 1)
+
+        [row] = self.inbox(self.alice)
+        self.assertEqual(row['id'], reply['conversation'])
+        self.assertEqual(row['other_user']['username'], 'bob')
+        self.assertEqual(row['last_message']['content'], 'Hi back')
+        self.assertEqual(row['unread_count'], 1)
+        self.assertEqual(self.inbox(self.bob)[0]['unread_count'], 1)
+
+        self.client.force_authenticate(self.alice)
+        self.client.get(f"/api/messages/{reply['id']}/")
+        self.assertEqual(self.inbox(self.alice)[0]['unread_count'], 0)
+
+        event = make_event(self.carol)
+        about_event = self.send(self.alice, self.bob, related_event=event.id)
+        self.assertNotEqual(about_event['conversation'], first['conversation'])
+
+    def test_deleting_an_event_keeps_its_messages(self):
+        event = make_event(self.carol)
+        self.send(self.alice, self.bob, 'Before the event')
+        self.send(self.alice, self.bob, 'About the event', related_event=event.id)
+        self.send(self.alice, self.carol, 'Also about it', related_event=event.id)
+        last = self.send(self.bob, self.alice, 'See you there', related_event=event.id)
+        self.assertEqual(Conversation.objects.count(), 3)
+
+        event.delete()
+
+        self.assertEqual(Message.objects.count(), 4)
+        self.assertFalse(Message.objects.filter(related_event__isnull=False).exists())
+        self.assertFalse(Conversation.objects.filter(related_event__isnull=False).exists())
+        rows = {row['other_user']['username']: row for row in self.inbox(self.alice)}
+        self.assertEqual(sorted(rows), ['bob', 'carol'])
+        self.assertEqual(rows['bob']['last_message']['id'], last['id'])
+        self.assertEqual(rows['bob']['unread_count'], 1)
+        [row] = self.inbox(self.bob)
+        self.assertEqual(row['unread_count'], 2)
+        self.assertEqual(self.inbox(self.carol)[0]['unread_count'], 1)
+        self.assertEqual(get_unread_counts(self.bob.id)['unread_messages'], 2)
+
+    def test_deleting_an_organizer_leaves_no_orphan_thread(self):
+        event = make_event(self.carol)
+        self.send(self.alice, self.carol, 'About the event', related_event=event.id)
+        kept = self.send(self.alice, self.bob, 'Also about it', related_event=event.id)
+        self.carol.delete()
+        self.assertEqual(list(Message.objects.values_list('id', flat=True)), [kept['id']])
+        self.assertEqual(list(Conversation.objects.values_list('id', 'related_event')), [(kept['conversation'], None)])
+
+    def test_inbox_orders_by_last_activity(self):
+        self.send(self.alice, self.bob)
+        self.send(self.carol, self.alice)
+        self.assertEqual([row['other_user']['username'] for row in self.inbox(self.alice)], ['carol', 'bob'])
+        self.send(self.bob, self.alice)
+        self.assertEqual([row['other_user']['username'] for row in self.inbox(self.alice)], ['bob', 'carol'])
+        self.assertEqual([row['other_user']['username'] for row in self.inbox(self.bob)], ['alice'])
+
+    def test_deleting_the_latest_message_restores_the_previous_one(self):
+        self.send(self.alice, self.bob, 'First')
+        older = self.send(self.carol, self.alice)
+        kept = self.send(self.bob, self.alice, 'Second')
+        latest = self.send(self.alice, self.bob, 'Third')
+
+        Message.objects.get(pk=latest['id']).delete()
+        rows = self.inbox(self.alice)
+        self.assertEqual([row['other_user']['username'] for row in rows], ['bob', 'carol'])
+        self.assertEqual(rows[0]['last_message']['id'], kept['id'])
+        self.assertEqual(
+            Conversation.objects.get(pk=kept['conversation']).last_activity,
+            Message.objects.get(pk=kept['id']).sent_at,
+        )
+
+        Message.objects.filter(conversation_id=kept['conversation']).delete()
+        rows = self.inbox(self.alice)
+        self.assertEqual([row['other_user']['username'] for row in rows], ['carol', 'bob'])
+        self.assertIsNone(rows[1]['last_message'])
+        self.assertEqual(rows[0]['last_message']['id'], older['id'])
+
+    def test_thread_is_cursor_paginated_and_private(self):
+        sent = [self.send(self.alice if i % 2 else self.bob, self.bob if i % 2 else self.alice, f'm{i}') for i in range(7)]
+        conversation_id = sent[0]['conversation']
+
+        self.client.force_authenticate(self.alice)
+        url, ids = f'/api/conversations/{conversation_id}/messages/?page_size=3', []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(message['id'] for message in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(ids, [message['id'] for message in reversed(sent)])
+
+        response = self.client.post(f'/api/conversations/{conversation_id}/read/')
+        self.assertEqual(response.data['marked_read'], 4)
+        self.assertEqual(self.inbox(self.alice)[0]['unread_count'], 0)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread_messages'], 0)
+
+        self.client.force_authenticate(self.carol)
+        self.assertEqual(self.client.get(f'/api/conversations/{conversation_id}/messages/').status_code, 404)
+        self.assertEqual(self.client.post(f'/api/conversations/{conversation_id}/read/').status_code, 404)
+
+
+class QueryPlanAuditTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        organizer = make_user('organizer', role='organizer')
+        author = make_user('author', role='author')
+        reviewer = make_user('reviewer', role='reviewer')
+        participant = make_user('participant')
+        event = make_event(organizer)
+        make_event(organizer, status='draft')
+        session = make_session(event)
+        submission = make_submission(event, author, session=session)
+        submission.assigned_reviewers.add(reviewer)
+        Review.objects.create(
+            submission=submission, reviewer=reviewer, relevance_score=4, quality_score=4, originality_score=4,
+            comments='Good', decision='accept',
+        )
+        Registration.objects.create(event=event, user=participant, registration_type='participant')
+        make_workshop(event, organizer)
+        Question.objects.create(session=session, user=participant, content='Why?')
+        survey = Survey.objects.create(event=event, title='Feedback')
+        SurveyQuestion.objects.create(survey=survey, question_text='Comments', question_type='text')
+        Certificate.objects.create(event=event, user=organizer, certificate_type='organization')
+        Message.objects.create(sender=participant, recipient=organizer, subject='Hi', content='Hello')
+        Notification.objects.create(user=organizer, notification_type='event_reminder', title='Soon', message='Soon')
+
+    def test_list_endpoints_use_indexes(self):
+        out = StringIO()
+        call_command('audit_query_plans', stdout=out)
+        output = out.getvalue()
+        self.assertNotIn('skip', output)
+        self.assertIn('ok   submissions', output)
+        self.assertIn('full scan: api_user (expected)', output)
+
+    def test_flags_full_scans(self):
+        with mock.patch.dict('api.plans.EXPECTED_SCANS', clear=True):
+            with self.assertRaisesMessage(CommandError, '1 list endpoint(s) read a table in full'):
+                call_command('audit_query_plans', 'users', 'events', stdout=StringIO())
+
+    def test_plan_of_a_filter_without_index(self):
+        query = explain(*Submission.objects.filter(keywords='imaging').query.sql_with_params())
+        self.assertEqual(query.scans, ['api_submission'])
+        query = explain(*Submission.objects.filter(event_id=1, status='accepted').query.sql_with_params())
+        self.assertEqual(query.scans, [])
+
+
+class SeedAndBenchmarkTests(TestCase):
+
+    def setUp(self):
+        # the seeder stores a placeholder file for every abstract, paper, handout and certificate
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, PROTECTED_MEDIA_SERVER=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def snapshot(self):
+        return {
+            'users': list(User.objects.filter(username__startswith='seed_').order_by('username').values_list('username', 'role')),
+            'submissions': list(Submission.objects.order_by('title').values_list('title', 'author__username', 'status')),
+            'registrations': sorted(Registration.objects.values_list('event__title', 'user__username')),
+            'likes': sorted(Question.objects.values_list('content', 'likes_count')),
+        }
+
+    def test_seed_is_deterministic_and_consistent(self):
+        call_command('seed_data', scale=0.002, stdout=StringIO())
+        first = self.snapshot()
+        self.assertEqual(len(first['users']), 100)
+        self.assertEqual({role for _, role in first['users']}, {role for role, _ in User.ROLE_CHOICES})
+        for question in Question.objects.annotate(likes=Count('questionlikes')):
+            self.assertEqual(question.likes_count, question.likes)
+        for workshop in Workshop.objects.annotate(seats=Count('participants')):
+            self.assertEqual(workshop.seats_taken, workshop.seats)
+        self.assertEqual(Conversation.objects.count(), Message.objects.values('conversation').distinct().count())
+        stored = [certificate.certificate_file for certificate in Certificate.objects.all()]
+        stored += [submission.abstract_file for submission in Submission.objects.all()]
+        self.assertTrue(stored)
+        self.assertTrue(all(field_file.storage.exists(field_file.name) for field_file in stored))
+
+        with self.assertRaises(CommandError):
+            call_command('seed_data', scale=0.002, stdout=StringIO())
+        call_command('seed_data', scale=0.002, reset=True, stdout=StringIO())
+        self.assertEqual(self.snapshot(), first)
+
+    def benchmark(self, *names):
+        output = f'{self.media_root}/report.json'
+        call_command('benchmark_api', *names, iterations=2, warmup=0, output=output, stdout=StringIO(), stderr=StringIO())
+        with open(output) as handle:
+            return json.load(handle)
+
+    def test_benchmark_reports_every_route(self):
+        call_command('seed_data', scale=0.002, stdout=StringIO())
+        report = self.benchmark()
+        self.assertEqual(report['missing'], {})
+        self.assertEqual({label.split(' [')[0] for label in report['routes']}, {route.name for route in routes()})
+        for label in ('session_live', 'submissions [POST]', 'registrations [POST]', 'payment-status-update [PATCH]'):
+            self.assertIn(label, report['routes'])
+        for result in report['routes'].values():
+            self.assertEqual(result['iterations'], 2)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(report['meta']['dataset']['api.User'], 100)
+        # the run leaves the data as it was, and no uploaded file behind
+        self.assertFalse(Message.objects.filter(subject='Benchmark').exists())
+        self.assertFalse(Submission.objects.filter(title='Benchmark submission').exists())
+        uploads = os.listdir(f'{self.media_root}/submissions/abstracts')
+        self.assertTrue(all(name.startswith('seed_') for name in uploads))
+
+    def test_benchmark_fails_on_a_missing_route(self):
+        call_command('seed_data', scale=0.002, stdout=StringIO())
+        with mock.patch.dict(benchmark.WRITE_REQUESTS):
+            del benchmark.WRITE_REQUESTS['register']
+            with self.assertRaisesMessage(CommandError, '1 route(s) missing'):
+                self.benchmark('events', 'register')
+        report = self.benchmark('events', 'register')
+        self.assertEqual(set(report['routes']), {'events', 'register [POST]'})
+
+
+def get_routes():
+    planned, _ = plan_requests(routes())
+    return [route for route, method, _ in planned if method == 'get']
+
+
+@override_settings(PROTECTED_MEDIA_SERVER=None)
+class QueryBudgetTests(TestCase):
+    """
+    Every GET endpoint runs the same number of queries with few and many
+    rows, and no more than the budget declared on its view (api/budgets.py).
+    """
+    # seeder scales: one event with 80 and 800 registrations, 40 and 400 questions, and so on
+    sizes = (0.002, 0.02)
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=cls.media_root)
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        # {size: {route name: [(sql, params), ...] or None when no sample user got a 2xx}}
+        cls.recorded = {}
+        for size in cls.sizes:
+            with transaction.atomic():
+                seed(SeedPlan().scaled(size))
+                samples = Samples()
+                # the same shape at both scales: the sample submission is scheduled, the sample message unread
+                samples.submission.session_id = samples.session_id
+                samples.submission.save()
+                message = Message.objects.get(pk=samples.pks[Message])
+                message.is_read = False
+                message.save()
+                dashboard_cache().clear()
+                cls.recorded[size] = {}
+                for route in get_routes():
+                    result = representative_call(route, samples)
+                    cls.recorded[size][route.name] = result and result.queries
+                transaction.set_rollback(True)
+
+    def test_every_get_endpoint_declares_a_budget(self):
+        missing = [route.name for route in get_routes() if budget_for(route.callback) is None]
+        self.assertEqual(missing, [])
+
+    def test_every_get_endpoint_is_exercised(self):
+        for size, recorded in self.recorded.items():
+            failed = [name for name, queries in recorded.items() if queries is None]
+            self.assertEqual(failed, [], f'no sample user got a 2xx at scale {size}')
+
+    def test_queries_do_not_grow_with_rows(self):
+        small, large = self.sizes
+        for name, before in self.recorded[small].items():
+            after = self.recorded[large][name]
+            if before is None or after is None:
+                continue
+            with self.subTest(route=name):
+                if len(before) != len(after):
+                    self.fail('\n'.join([
+                        f'{name}: {len(before)} queries at scale {small}, {len(after)} at scale {large}',
+                        *query_diff(before, after),
+                    ]))
+
+    def test_queries_within_budget(self):
+        for route in get_routes():
+            budget = budget_for(route.callback)
+            queries = max((recorded[route.name] or [] for recorded in self.recorded.values()), key=len)
+            if budget is None:
+                continue
+            with self.subTest(route=route.name):
+                if len(queries) > budget:
+                    self.fail('\n'.join([
+                        f'{route.name}: {len(queries)} queries, budget {budget}',
+                        *query_summary(queries),
+                    ]))
+
+    def test_diff_names_the_extra_queries(self):
+        before = [('SELECT "api_event"."id" FROM "api_event"', ())]
+        lookup = ('SELECT "api_user"."id", "api_user"."password", "api_user"."last_login", "api_user"."username" '
+                  'FROM "api_user" WHERE "api_user"."id" = %s LIMIT 21')
+        after = before + [(lookup, (n,)) for n in range(3)]
+        self.assertEqual(query_diff(before, after), ['  +3 SELECT ... FROM "api_user" WHERE "api_user"."id" = %s LIMIT n'])
+        self.assertEqual(query_diff(after, before)[0][:4], '  -3')
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework_simplejwt.views import (TokenObtainPairView,TokenRefreshView,TokenVerifyView)
 from .views import *
+from .live import session_live
 
 urlpatterns = [
 
@@ -14,6 +15,8 @@ urlpatterns = [
     
     # Dashboard
     path('dashboard/', dashboard, name='dashboard'),
+    path('dashboard/cache-stats/', dashboard_cache_stats, name='dashboard_cache_stats'),#[IsSuperAdmin]
+    path('admission/stats/', admission_queue_stats, name='admission_stats'),#[IsSuperAdmin]
     
     # Events
     path('events/', EventListCreateView.as_view(), name='events'),#[IsAuthenticated] 
@@ -27,9 +30,14 @@ urlpatterns = [
     
     # Submissions
     path('events/<int:event_id>/submissions/', SubmissionListCreateView.as_view(), name='submissions'),#[IsAuthenticated]
+    path('events/<int:event_id>/submissions/keywords/', submission_keyword_facets, name='submission_keywords'),#[IsAuthenticated]
     path('submissions/<int:pk>/', SubmissionDetailView.as_view(), name='submission_detail'),#[IsAuthenticated]
     path('submissions/my-submissions/', MySubmissionsView.as_view(), name='my_submissions'),#[IsAuthenticated]
+    path('submissions/<int:submission_id>/abstract/download/', download_submission_file, {'kind': 'abstract'}, name='submission_abstract_download'),#[IsAuthenticated]
+    path('submissions/<int:submission_id>/paper/download/', download_submission_file, {'kind': 'paper'}, name='submission_paper_download'),#[IsAuthenticated]
     path('submissions/<int:submission_id>/assign-reviewers/', assign_reviewers, name='assign_reviewers'),
+    path('events/<int:event_id>/bulk-assign-reviewers/', bulk_assign_reviewers, name='bulk_assign_reviewers'),#[IsOrganizer]
+    path('events/<int:event_id>/auto-assign-reviewers/', auto_assign_reviewers, name='auto_assign_reviewers'),#[IsOrganizer]
     
     # Reviews
     path('submissions/<int:submission_id>/reviews/', ReviewListCreateView.as_view(), name='reviews'),#[IsAuthenticated, IsReviewerOrOrganizer]
@@ -44,9 +52,12 @@ urlpatterns = [
     path('events/<int:event_id>/workshops/', WorkshopListCreateView.as_view(), name='workshops'),#[IsAuthenticated]
     path('workshops/<int:pk>/', WorkshopDetailView.as_view(), name='workshop_detail'),#[IsAuthenticated]
     path('workshops/<int:workshop_id>/register/', register_workshop, name='workshop_register'),#[IsAuthenticated]
+    path('workshops/<int:workshop_id>/cancel/', cancel_workshop_registration, name='workshop_cancel'),#[IsAuthenticated]
+    path('workshops/<int:workshop_id>/materials/download/', download_workshop_materials, name='workshop_materials_download'),#[IsAuthenticated]
     
     # Questions
     path('sessions/<int:session_id>/questions/', QuestionListCreateView.as_view(), name='questions'),#[IsAuthorOrReadOnly]
+    path('sessions/<int:session_id>/live/', session_live, name='session_live'),#[IsAuthenticated] SSE, ASGI only
     path('questions/<int:question_id>/like/', like_question, name='question_like'),
     path('questions/<int:question_id>/answer/', answer_question, name='question_answer'),
     
@@ -54,21 +65,35 @@ urlpatterns = [
     path('events/<int:event_id>/surveys/', SurveyListCreateView.as_view(), name='surveys'),#[IsAuthenticated]
     path('surveys/<int:pk>/', SurveyDetailView.as_view(), name='survey_detail'),
     path('surveys/responses/', SurveyResponseCreateView.as_view(), name='survey_response'),
+    path('surveys/<int:survey_id>/submit/', submit_survey, name='survey_submit'),#[IsAuthenticated]
     path('surveys/<int:survey_id>/results/', survey_results, name='survey_results'),
+    path('surveys/<int:survey_id>/questions/<int:question_id>/answers/', SurveyTextAnswersView.as_view(), name='survey_text_answers'),#[IsAuthenticated]
+    path('surveys/<int:survey_id>/export/', export_survey_responses, name='survey_export'),#[IsOrganizer]
     
     # Certificates
     path('certificates/', CertificateListView.as_view(), name='certificates'),
     path('certificates/<int:pk>/', CertificateDetailView.as_view(), name='certificate_detail'),
     path('certificates/<int:certificate_id>/download/', download_certificate, name='certificate_download'),
     path('events/<int:event_id>/generate-certificates/', generate_certificates, name='generate_certs'),
+    path('events/<int:event_id>/render-certificates/', render_certificates, name='render_certs'), #[IsOrganizer]
+    path('events/<int:event_id>/certificates/progress/', certificate_render_progress, name='certificate_render_progress'), #[IsOrganizer]
+    path('events/<int:event_id>/certificates/export/', export_certificates, name='certificate_export'), #[IsOrganizer]
     
     # Messages
     path('messages/', MessageListCreateView.as_view(), name='messages'),
     path('messages/<int:pk>/', MessageDetailView.as_view(), name='message_detail'),
+    path('conversations/', InboxView.as_view(), name='inbox'),#[IsAuthenticated]
+    path('conversations/<int:conversation_id>/messages/', ConversationMessagesView.as_view(), name='conversation_messages'),#[IsAuthenticated]
+    path('conversations/<int:conversation_id>/read/', mark_conversation_read, name='conversation_read'),#[IsAuthenticated]
     
     # Notifications
     path('notifications/', NotificationListView.as_view(), name='notifications'),
     path('notifications/<int:notification_id>/read/', mark_notification_read, name='notification_read'),
     path('notifications/read-all/', mark_all_notifications_read, name='notifications_read_all'),
+    path('notifications/unread-count/', unread_counts, name='unread_counts'),
+    path('events/<int:event_id>/broadcast/', broadcast_notification, name='event_broadcast'),#[IsOrganizer]
+    
+    # Background jobs
+    path('jobs/<int:pk>/', JobDetailView.as_view(), name='job_detail'),#[IsAuthenticated]
     
 ]
\ No newline at end of file
@@ -1,15 +1,33 @@
 from rest_framework import generics, status, filters
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework_simplejwt.views import TokenObtainPairView
+from django.db import IntegrityError, transaction
 from django.db.models import Q, Count, Avg
 from django.utils import timezone
-from django.http import FileResponse
+from django.http import StreamingHttpResponse
 from .models import *
 from .serializers import *
 from .permissions import *
+from .stats import get_event_statistics, serialize_event_statistics
+from .cache import SHARED_KEY, cache_stats, get_or_build, user_key
+from .counters import get_unread_counts, mark_read
+from .search import FullTextSearchFilter, attach_snippets
+from .keywords import filter_by_keywords, keyword_facets
+from .assignment import auto_assign, bulk_assign, parse_assignment_mapping
+from .rendering import render_progress
+from .exports import certificate_entries, stream_survey_responses, stream_zip
+from .media import serve_file
+from .questions import QuestionOrderingFilter, add_like
+from .workshops import cancel_participation, fill_from_waitlist, register_participant
+from .surveys import record_respondent, submit_answers, survey_results_data
+from .tasks import enqueue
+from .pagination import CreatedAtCursorPagination, LastActivityCursorPagination, SentAtCursorPagination, ThreadPagination
+from .conversations import inbox, thread_messages
+from .admission import admission_stats, registration_queue, submission_queue
+from .budgets import query_budget
 
 
 # Authentication Views
@@ -23,6 +41,7 @@ class RegisterView(generics.CreateAPIView):
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 0
     
     def get_object(self):
         return self.request.user
@@ -32,6 +51,7 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsSuperAdmin | IsOrganizer]
+    query_budget = 2
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['username', 'email', 'institution']
     ordering_fields = ['created_at', 'username']
@@ -43,6 +63,7 @@ class UserListView(generics.ListAPIView):
 class EventListCreateView(generics.ListCreateAPIView):
     queryset = Event.objects.all()
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'theme', 'city', 'country']
     ordering_fields = ['start_date', 'created_at']
@@ -53,7 +74,7 @@ class EventListCreateView(generics.ListCreateAPIView):
         return EventDetailSerializer
     
     def get_queryset(self):
-        queryset = Event.objects.all()
+        queryset = Event.objects.with_counts()
         status_param = self.request.query_params.get('status', None)
         if status_param:
             queryset = queryset.filter(status=status_param)
@@ -89,17 +110,19 @@ class EventRetrieveUpdateView(generics.RetrieveUpdateAPIView):
 
 
 class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Event.objects.all()
+    queryset = Event.objects.for_detail()
     serializer_class = EventDetailSerializer
     permission_classes = [IsAuthenticated, IsEventOrganizer]
+    query_budget = 3
 
 
 class MyEventsView(generics.ListAPIView):
     serializer_class = EventListSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     
     def get_queryset(self):
-        return Event.objects.filter(organizer=self.request.user)
+        return Event.objects.with_counts().filter(organizer=self.request.user)
 
 
 
@@ -108,10 +131,11 @@ class MyEventsView(generics.ListAPIView):
 class SessionListCreateView(generics.ListCreateAPIView):
     serializer_class = SessionSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     
     def get_queryset(self):
         event_id = self.kwargs.get('event_id')
-        return Session.objects.filter(event_id=event_id)
+        return Session.objects.select_related('chair').with_counts().filter(event_id=event_id)
     
     def perform_create(self, serializer):
         event_id = self.kwargs.get('event_id')
@@ -119,9 +143,10 @@ class SessionListCreateView(generics.ListCreateAPIView):
 
 
 class SessionDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Session.objects.all()
+    queryset = Session.objects.select_related('chair').with_counts()
     serializer_class = SessionSerializer
     permission_classes = [IsAuthenticated, IsEventOrganizer]
+    query_budget = 1
 
 
 
@@ -131,34 +156,47 @@ class SessionDetailView(generics.RetrieveUpdateDestroyAPIView):
 class SubmissionListCreateView(generics.ListCreateAPIView):
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['title', 'keywords']
+    query_budget = 5
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     ordering_fields = ['submitted_at', 'status']
+    search_query = None
     
     def get_queryset(self):
         event_id = self.kwargs.get('event_id')
-        queryset = Submission.objects.filter(event_id=event_id)
+        queryset = Submission.objects.for_listing().filter(event_id=event_id)
         
         status_param = self.request.query_params.get('status', None)
         if status_param:
             queryset = queryset.filter(status=status_param)
         
+        keywords = self.request.query_params.getlist('keyword')
+        if keywords:
+            queryset = filter_by_keywords(queryset, keywords)
+        
         if self.request.user.role not in ['organizer', 'super_admin']:
             queryset = queryset.filter(author=self.request.user)
         
         return queryset
     
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.search_query:
+            attach_snippets(page, self.search_query)
+        return page
+    
     def perform_create(self, serializer):
         event_id = self.kwargs.get('event_id')
         if self.request.user.role != 'author':
             raise serializers.ValidationError("Only authors can submit.")
-        serializer.save(author=self.request.user, event_id=event_id)
+        # queued per event so a call-for-papers rush is written in order
+        submission_queue.submit(event_id, lambda: serializer.save(author=self.request.user, event_id=event_id))
 
 
 class SubmissionDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Submission.objects.all()
+    queryset = Submission.objects.for_listing()
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 4
 
     def perform_update(self, serializer):
         submission = self.get_object()
@@ -173,9 +211,55 @@ class SubmissionDetailView(generics.RetrieveUpdateDestroyAPIView):
 class MySubmissionsView(generics.ListAPIView):
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 5
     
     def get_queryset(self):
-        return Submission.objects.filter(author=self.request.user)
+        return Submission.objects.for_listing().filter(author=self.request.user)
+
+
+@query_budget(1)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def submission_keyword_facets(request, event_id):
+    # Same visibility as SubmissionListCreateView: authors only see their own submissions
+    author = None
+    if request.user.role not in ['organizer', 'super_admin']:
+        author = request.user
+    try:
+        limit = int(request.query_params.get('limit', 0))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    if limit < 0:
+        return Response({'error': 'limit must not be negative'}, status=status.HTTP_400_BAD_REQUEST)
+    limit = limit or None
+    return Response(keyword_facets(event_id, author=author, limit=limit), status=status.HTTP_200_OK)
+
+
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_submission_file(request, submission_id, kind):
+    """
+    Download a submission's abstract or full paper
+    (author, assigned reviewers, scientific committee, event organizer)
+    """
+    try:
+        submission = Submission.objects.select_related('event').get(id=submission_id)
+        user = request.user
+        allowed = (
+            user.role == 'super_admin'
+            or user.id in (submission.author_id, submission.event.organizer_id)
+            or submission.assigned_reviewers.filter(id=user.id).exists()
+            or submission.event.scientific_committee.filter(id=user.id).exists()
+        )
+        if not allowed:
+            raise PermissionDenied('You do not have access to this submission')
+        field_file = submission.abstract_file if kind == 'abstract' else submission.full_paper
+        if not field_file:
+            return Response({'error': 'File not uploaded'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, field_file)
+    except Submission.DoesNotExist:
+        return Response({'error': 'Submission not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
 @api_view(['POST'])
@@ -221,14 +305,14 @@ def assign_reviewers(request, submission_id):
         submission.save()
 
         # Notify only newly assigned reviewers
-        for reviewer in reviewers.filter(id__in=newly_assigned):
-            Notification.objects.create(
-                user=reviewer,
-                notification_type='review_assigned',
-                title='New Review Assigned',
-                message=f'You have been assigned to review: {submission.title}',
-                related_event=submission.event
-            )
+        if newly_assigned:
+            enqueue('notifications.send', {
+                'user_ids': newly_assigned,
+                'notification_type': 'review_assigned',
+                'title': 'New Review Assigned',
+                'message': f'You have been assigned to review: {submission.title}',
+                'related_event_id': submission.event_id,
+            }, user=request.user)
 
         return Response({
             'message': 'Reviewers assigned successfully',
@@ -242,21 +326,89 @@ def assign_reviewers(request, submission_id):
 
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsOrganizer])
+def bulk_assign_reviewers(request, event_id):
+    """
+    Assign reviewers to many submissions of an event in one transaction.
+    Body: {"assignments": {"<submission_id>": [<reviewer_id>, ...], ...}}
+    The whole mapping is rejected if any submission or reviewer id is invalid.
+    """
+    try:
+        event = Event.objects.get(id=event_id)
+        if not (request.user == event.organizer or request.user.role == 'super_admin'):
+            raise PermissionDenied('Only the event organizer or super admin can assign reviewers')
+
+        pairs, errors = parse_assignment_mapping(event, request.data.get('assignments'))
+        if errors:
+            return Response({'error': 'Invalid assignments', **errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        new_pairs = bulk_assign(event, pairs)
+        return Response({
+            'message': 'Reviewers assigned successfully',
+            'newly_assigned': len(new_pairs),
+            'already_assigned': len(set(pairs)) - len(new_pairs),
+            'submissions': len({submission_id for submission_id, _ in pairs}),
+        }, status=status.HTTP_200_OK)
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsOrganizer])
+def auto_assign_reviewers(request, event_id):
+    """
+    Assign reviewers to every pending/under-review submission of an event by
+    topic affinity (see api/assignment.py).
+    Body: reviewers_per_submission (default 3), max_load (default 10),
+    avoid_same_institution (default true), dry_run (default false).
+    """
+    try:
+        event = Event.objects.get(id=event_id)
+        if not (request.user == event.organizer or request.user.role == 'super_admin'):
+            raise PermissionDenied('Only the event organizer or super admin can assign reviewers')
+        try:
+            k = int(request.data.get('reviewers_per_submission', 3))
+            max_load = int(request.data.get('max_load', 10))
+        except (TypeError, ValueError):
+            return Response({'error': 'reviewers_per_submission and max_load must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if k < 1 or max_load < 1:
+            return Response({'error': 'reviewers_per_submission and max_load must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # "false" / "0" from a form post must not count as true
+        flag = serializers.BooleanField()
+        result = auto_assign(
+            event, k=k, max_load=max_load,
+            avoid_same_institution=flag.to_internal_value(request.data.get('avoid_same_institution', True)),
+            dry_run=flag.to_internal_value(request.data.get('dry_run', False)),
+        )
+        return Response(result, status=status.HTTP_200_OK)
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+
+
 # Review Views
 
 class ReviewListCreateView(generics.ListCreateAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated, IsReviewerOrOrganizer]
+    query_budget = 2
     
     def get_queryset(self):
         submission_id = self.kwargs.get('submission_id')
         if self.request.user.role == 'reviewer':
             user=self.request.user.id
-            return Review.objects.filter(reviewer_id=user ,submission_id=submission_id)
-        elif self.request.user.role in ['super-admin', 'organizer']:
-            return Review.objects.filter(submission_id=submission_id)
+            return Review.objects.select_related('reviewer').filter(reviewer_id=user ,submission_id=submission_id)
+        elif self.request.user.role == 'super_admin':
+            return Review.objects.select_related('reviewer').filter(submission_id=submission_id)
+        elif self.request.user.role == 'organizer':
+            return Review.objects.select_related('reviewer').filter(
+                submission_id=submission_id, submission__event__organizer=self.request.user
+            )
         else:
-            return PermissionDenied("You don't have the privilege to access this information.")
+            raise PermissionDenied("You don't have the privilege to access this information.")
                 
     
     def perform_create(self, serializer):
@@ -283,19 +435,20 @@ class ReviewListCreateView(generics.ListCreateAPIView):
                 submission.status = 'revision_requested'
             submission.save()
             
-            Notification.objects.create(
-                user=submission.author,
-                notification_type=f'submission_{submission.status}',
-                title=f'Decision on your submission',
-                message=f'Your submission "{submission.title}" has been {submission.get_status_display()}',
-                related_event=submission.event
-            )
+            enqueue('notifications.send', {
+                'user_ids': [submission.author_id],
+                'notification_type': f'submission_{submission.status}',
+                'title': f'Decision on your submission',
+                'message': f'Your submission "{submission.title}" has been {submission.get_status_display()}',
+                'related_event_id': submission.event_id,
+            }, user=self.request.user)
 
 
 class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Review.objects.all()
+    queryset = Review.objects.select_related('reviewer')
     serializer_class = ReviewSerializer
     permission_classes = [IsAuthenticated, IsReviewerOrOrganizer]
+    query_budget = 1
 
 
 
@@ -304,21 +457,24 @@ class ReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
 class RegistrationListCreateView(generics.ListCreateAPIView):
     serializer_class = RegistrationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     
     def get_queryset(self):
         if self.request.user.role in ['organizer', 'super_admin']:
             event_id = self.kwargs.get('event_id')
-            return Registration.objects.filter(event_id=event_id)
-        return Registration.objects.filter(user=self.request.user)
+            return Registration.objects.select_related('user', 'event').filter(event_id=event_id)
+        return Registration.objects.select_related('user', 'event').filter(user=self.request.user)
     
     def perform_create(self, serializer):
         event_id = self.kwargs.get('event_id')
-        serializer.save(user=self.request.user, event_id=event_id)
+        # written in batches with the other registrations queued for this event
+        serializer.instance = registration_queue.submit(event_id, (self.request.user, serializer.validated_data))
 
 class RegistrationDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Registration.objects.all()
+    queryset = Registration.objects.select_related('user', 'event')
     serializer_class = RegistrationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 1
 
     def perform_update(self, serializer):
         if 'payment_status' in self.request.data:
@@ -328,12 +484,13 @@ class RegistrationDetailView(generics.RetrieveUpdateDestroyAPIView):
 class MyRegistrationsView(generics.ListAPIView):
     serializer_class = RegistrationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     
     def get_queryset(self):
-        return Registration.objects.filter(user=self.request.user)
+        return Registration.objects.select_related('user', 'event').filter(user=self.request.user)
 
 class AssignPaymentView(generics.UpdateAPIView):
-    queryset = Registration.objects.all()
+    queryset = Registration.objects.select_related('user', 'event')
     serializer_class= RegistrationSerializer
     permission_classes = [IsOrganizer | IsSuperAdmin]
 
@@ -343,10 +500,11 @@ class AssignPaymentView(generics.UpdateAPIView):
 class WorkshopListCreateView(generics.ListCreateAPIView):
     serializer_class = WorkshopSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 3
     
     def get_queryset(self):
         event_id = self.kwargs.get('event_id')
-        return Workshop.objects.filter(event_id=event_id)
+        return Workshop.objects.for_listing().filter(event_id=event_id)
     
     def perform_create(self, serializer):
         event_id = self.kwargs.get('event_id')
@@ -354,25 +512,81 @@ class WorkshopListCreateView(generics.ListCreateAPIView):
 
 
 class WorkshopDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Workshop.objects.all()
+    queryset = Workshop.objects.for_listing()
     serializer_class = WorkshopSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
+
+    def perform_update(self, serializer):
+        workshop = serializer.save()
+        # new seats go to the waitlist first
+        fill_from_waitlist(workshop)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def register_workshop(request, workshop_id):
+    """
+    Take a seat, or a place on the waitlist when the workshop is full
+    """
     try:
         workshop = Workshop.objects.get(id=workshop_id)
-        
-        if workshop.participants.count() >= workshop.max_participants:
-            return Response({'error': 'Workshop is full'}, status=status.HTTP_400_BAD_REQUEST)
-        workshop.participants.add(request.user)
+        state, position = register_participant(workshop, request.user)
+        if state == 'already_registered':
+            return Response({'error': 'You are already registered to this workshop'}, status=status.HTTP_400_BAD_REQUEST)
+        if state == 'waitlisted':
+            return Response({
+                'message': 'Workshop is full, you have been added to the waitlist',
+                'waitlist_position': position
+            }, status=status.HTTP_202_ACCEPTED)
         return Response({'message': 'Successfully registered to workshop'}, status=status.HTTP_200_OK)
     except Workshop.DoesNotExist:
         return Response({'error': 'Workshop not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cancel_workshop_registration(request, workshop_id):
+    """
+    Give up a seat (the first waitlisted user gets it) or leave the waitlist
+    """
+    try:
+        workshop = Workshop.objects.get(id=workshop_id)
+        state = cancel_participation(workshop, request.user)
+        if state is None:
+            return Response({'error': 'You are not registered to this workshop'}, status=status.HTTP_400_BAD_REQUEST)
+        if state == 'left_waitlist':
+            return Response({'message': 'Removed from the waitlist'}, status=status.HTTP_200_OK)
+        return Response({'message': 'Workshop registration cancelled'}, status=status.HTTP_200_OK)
+    except Workshop.DoesNotExist:
+        return Response({'error': 'Workshop not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_workshop_materials(request, workshop_id):
+    """
+    Download workshop materials (leader, participants, event registrants, organizer)
+    """
+    try:
+        workshop = Workshop.objects.select_related('event').get(id=workshop_id)
+        user = request.user
+        allowed = (
+            user.role == 'super_admin'
+            or user.id in (workshop.leader_id, workshop.event.organizer_id)
+            or workshop.participants.filter(id=user.id).exists()
+            or Registration.objects.filter(event_id=workshop.event_id, user=user).exists()
+        )
+        if not allowed:
+            raise PermissionDenied('Only workshop participants and event registrants can download materials')
+        if not workshop.materials:
+            return Response({'error': 'No materials uploaded for this workshop'}, status=status.HTTP_404_NOT_FOUND)
+        return serve_file(request, workshop.materials)
+    except Workshop.DoesNotExist:
+        return Response({'error': 'Workshop not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
 
 
 # Question Views
@@ -381,10 +595,13 @@ def register_workshop(request, workshop_id):
 class QuestionListCreateView(generics.ListCreateAPIView):
     serializer_class = QuestionSerializer
     permission_classes = [IsAuthorOrReadOnly]
+    query_budget = 2
+    filter_backends = [QuestionOrderingFilter]
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         session_id = self.kwargs.get('session_id')
-        return Question.objects.filter(session_id=session_id)
+        return Question.objects.select_related('user').filter(session_id=session_id)
     
     def perform_create(self, serializer):
         session_id = self.kwargs.get('session_id')
@@ -396,11 +613,9 @@ class QuestionListCreateView(generics.ListCreateAPIView):
 def like_question(request, question_id):
     try:
         question = Question.objects.get(id=question_id)
-        if QuestionLikes.objects.filter(question=question, user=request.user).exists():
+        created, likes_count = add_like(question, request.user)
+        if not created:
             return Response({'error': 'You have already liked this question'}, status=status.HTTP_400_BAD_REQUEST)
-
-        QuestionLikes.objects.create(question=question, user=request.user)
-        likes_count = QuestionLikes.objects.filter(question=question).count()
         return Response({'likes': likes_count}, status=status.HTTP_200_OK)
     except Question.DoesNotExist:
         return Response({'error': 'Question not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -430,10 +645,11 @@ def answer_question(request, question_id):
 class SurveyListCreateView(generics.ListCreateAPIView):
     serializer_class = SurveySerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 3
     
     def get_queryset(self):
         event_id = self.kwargs.get('event_id')
-        return Survey.objects.filter(event_id=event_id)
+        return Survey.objects.prefetch_related('questions').filter(event_id=event_id)
     
     def perform_create(self, serializer):
         event_id = self.kwargs.get('event_id')
@@ -441,9 +657,10 @@ class SurveyListCreateView(generics.ListCreateAPIView):
 
 
 class SurveyDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Survey.objects.all()
+    queryset = Survey.objects.prefetch_related('questions')
     serializer_class = SurveySerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
 
 class SurveyResponseCreateView(generics.CreateAPIView):
@@ -451,51 +668,110 @@ class SurveyResponseCreateView(generics.CreateAPIView):
     permission_classes = [IsAuthenticated]
     
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        survey = serializer.validated_data['survey']
+        question = serializer.validated_data['question']
+        if question.survey_id != survey.id:
+            raise serializers.ValidationError({'question': 'Question does not belong to this survey.'})
+        already_answered = serializers.ValidationError({'question': 'You already answered this question.'})
+        try:
+            with transaction.atomic():
+                answers = SurveyResponse.objects.filter(survey=survey, user=self.request.user)
+                if answers.filter(question=question).exists():
+                    raise already_answered
+                had_answered = answers.exists()
+                serializer.save(user=self.request.user)
+                record_respondent(survey.id, self.request.user, had_answered)
+        except IntegrityError:
+            # a concurrent request stored the same answer first
+            raise already_answered
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_survey(request, survey_id):
+    """
+    Submit all answers to a survey at once.
+    Body: {"answers": [{"question": id, "response_rating": 1-5} | {"question": id, "response_text": "..."}]}
+    """
+    try:
+        survey = Survey.objects.get(id=survey_id)
+        if not survey.is_active:
+            return Response({'error': 'Survey is closed'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = SurveySubmissionSerializer(data=request.data, context={'survey': survey})
+        serializer.is_valid(raise_exception=True)
+        answers = serializer.validated_data['answers']
+        answered = set(
+            SurveyResponse.objects.filter(
+                user=request.user, question_id__in=[question.id for question, _, _ in answers]
+            ).values_list('question_id', flat=True)
+        )
+        if answered:
+            return Response({
+                'error': 'Some questions were already answered',
+                'questions': sorted(answered)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created = submit_answers(survey, request.user, answers)
+        except IntegrityError:
+            # a concurrent submission by the same user won the race
+            return Response({'error': 'Survey already submitted'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'survey': survey.id, 'created': len(created)}, status=status.HTTP_201_CREATED)
+    except Survey.DoesNotExist:
+        return Response({'error': 'Survey not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@query_budget(5)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def survey_results(request, survey_id):
+    """
+    Per-question results; text questions include the first answers,
+    the rest are paginated under questions/<id>/answers/
+    """
     try:
         survey = Survey.objects.get(id=survey_id)
-        results = []
-        
-        for question in survey.questions.all():
-            responses = question.responses.all()
-            
-            if question.question_type == 'rating':
-                avg_rating = responses.aggregate(Avg('response_rating'))['response_rating__avg']
-                results.append({
-                    'question': question.question_text,
-                    'type': 'rating',
-                    'average_rating': round(avg_rating, 2) if avg_rating else 0,
-                    'total_responses': responses.count()
-                })
-            elif question.question_type == 'choice':
-                choice_counts = {}
-                for response in responses:
-                    choice = response.response_text
-                    choice_counts[choice] = choice_counts.get(choice, 0) + 1
-                results.append({
-                    'question': question.question_text,
-                    'type': 'choice',
-                    'choices': choice_counts,
-                    'total_responses': responses.count()
-                })
-            else:
-                results.append({
-                    'question': question.question_text,
-                    'type': 'text',
-                    'responses': [r.response_text for r in responses],
-                    'total_responses': responses.count()
-                })
-        
+        results = survey_results_data(survey)
+        for entry in results:
+            if entry['type'] == 'text':
+                entry['answers_url'] = request.build_absolute_uri(
+                    f'/api/surveys/{survey.id}/questions/{entry["question_id"]}/answers/'
+                )
         return Response(results, status=status.HTTP_200_OK)
     except Survey.DoesNotExist:
         return Response({'error': 'Survey not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+class SurveyTextAnswersView(generics.ListAPIView):
+    serializer_class = SurveyAnswerSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+    filter_backends = []
+
+    def get_queryset(self):
+        return SurveyResponse.objects.filter(
+            survey_id=self.kwargs['survey_id'], question_id=self.kwargs['question_id']
+        ).order_by('id')
+
+
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsOrganizer])
+def export_survey_responses(request, survey_id):
+    """
+    Stream every raw response of the survey as CSV
+    """
+    try:
+        survey = Survey.objects.select_related('event').get(id=survey_id)
+        if not (request.user == survey.event.organizer or request.user.role == 'super_admin'):
+            raise PermissionDenied('Only the event organizer or super admin can export survey responses')
+        response = StreamingHttpResponse(stream_survey_responses(survey.id), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="survey_{survey.id}_responses.csv"'
+        return response
+    except Survey.DoesNotExist:
+        return Response({'error': 'Survey not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
 
 # Certificate Views
 
@@ -503,85 +779,128 @@ def survey_results(request, survey_id):
 class CertificateListView(generics.ListAPIView):
     serializer_class = CertificateSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
     
     def get_queryset(self):
-        return Certificate.objects.filter(user=self.request.user)
+        return Certificate.objects.select_related('user', 'event').filter(user=self.request.user)
 
 
 class CertificateDetailView(generics.RetrieveAPIView):
     serializer_class = CertificateSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 1
     
     def get_queryset(self):
-        return Certificate.objects.filter(user=self.request.user)
+        return Certificate.objects.select_related('user', 'event').filter(user=self.request.user)
 
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsOrganizer])
 def generate_certificates(request, event_id):
     """
-    Generate certificate records for all participants
-    Note: This creates database records only. Actual PDF files can be uploaded via admin panel.
+    Queue the creation of certificate records for all participants.
+    Note: This creates database records only. PDFs are produced by render-certificates/.
+    Poll jobs/<id>/ for the created/total counts.
     """
     try:
         event = Event.objects.get(id=event_id)
-        generated_count = 0
-        
-        # Generate for all registrations
-        for registration in event.registrations.all():
-            cert_type = 'participation'
-            if registration.registration_type == 'speaker':
-                cert_type = 'presentation'
-            
-            certificate, created = Certificate.objects.get_or_create(
-                event=event,
-                user=registration.user,
-                certificate_type=cert_type
-            )
-            if created:
-                generated_count += 1
-        
-        # Generate for scientific committee members
-        for member in event.scientific_committee.all():
-            certificate, created = Certificate.objects.get_or_create(
-                event=event,
-                user=member,
-                certificate_type='committee'
-            )
-            if created:
-                generated_count += 1
-        
-        # Generate for organizer
-        certificate, created = Certificate.objects.get_or_create(
-            event=event,
-            user=event.organizer,
-            certificate_type='organization'
-        )
-        if created:
-            generated_count += 1
-        
+        job = enqueue('certificates.generate', {'event_id': event.id}, user=request.user)
         return Response({
-            'message': f'{generated_count} new certificates created successfully',
-            'total_certificates': event.certificates.count(),
-            'note': 'Certificate PDFs can be uploaded through the admin panel'
-        }, status=status.HTTP_200_OK)
+            'message': 'Certificate generation queued',
+            'job': JobSerializer(job).data,
+            'note': 'Render the PDFs with render-certificates/ once the records exist'
+        }, status=status.HTTP_202_ACCEPTED)
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsOrganizer])
+def render_certificates(request, event_id):
+    """
+    Queue PDF rendering for every certificate of the event that has no file yet.
+    Optional body: processes (worker processes, default one per CPU).
+    """
+    try:
+        event = Event.objects.get(id=event_id)
+        if not (request.user == event.organizer or request.user.role == 'super_admin'):
+            raise PermissionDenied('Only the event organizer or super admin can render certificates')
+
+        payload = {'event_id': event.id}
+        if request.data.get('processes') is not None:
+            try:
+                payload['processes'] = max(1, int(request.data['processes']))
+            except (TypeError, ValueError):
+                return Response({'error': 'processes must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        job = enqueue('certificates.render', payload, user=request.user, max_attempts=5)
+        return Response({
+            'job': JobSerializer(job).data,
+            'progress': render_progress(event.id),
+        }, status=status.HTTP_202_ACCEPTED)
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@query_budget(3)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsOrganizer])
+def export_certificates(request, event_id):
+    """
+    Stream a ZIP of every rendered certificate of the event.
+    Optional filter: ?certificate_type=participation|presentation|committee|organization
+    """
+    try:
+        event = Event.objects.get(id=event_id)
+        if not (request.user == event.organizer or request.user.role == 'super_admin'):
+            raise PermissionDenied('Only the event organizer or super admin can export certificates')
+
+        certificate_type = request.query_params.get('certificate_type')
+        if certificate_type and certificate_type not in dict(Certificate.CERTIFICATE_TYPE_CHOICES):
+            return Response({'error': 'Invalid certificate_type'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filename = f'certificates_event_{event.id}' + (f'_{certificate_type}' if certificate_type else '') + '.zip'
+        response = StreamingHttpResponse(
+            stream_zip(certificate_entries(event.id, certificate_type)),
+            content_type='application/zip',
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+@query_budget(4)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsOrganizer])
+def certificate_render_progress(request, event_id):
+    """
+    Rendered / pending certificate counts for an event
+    """
+    try:
+        event = Event.objects.get(id=event_id)
+        if not (request.user == event.organizer or request.user.role == 'super_admin'):
+            raise PermissionDenied('Only the event organizer or super admin can view rendering progress')
+        return Response(render_progress(event.id))
     except Event.DoesNotExist:
         return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@query_budget(2)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def download_certificate(request, certificate_id):
     """
-    Download certificate PDF if it exists
+    Download certificate PDF if it exists (owner, event organizer or super admin)
     """
     try:
-        certificate = Certificate.objects.get(id=certificate_id, user=request.user)
-        
+        certificate = Certificate.objects.select_related('event', 'user').get(id=certificate_id)
+        if request.user not in (certificate.user, certificate.event.organizer) and request.user.role != 'super_admin':
+            raise Certificate.DoesNotExist
+
         if certificate.certificate_file:
-            return FileResponse(
-                certificate.certificate_file.open('rb'),
-                as_attachment=True,
+            return serve_file(
+                request,
+                certificate.certificate_file,
                 filename=f'certificate_{certificate.user.username}_{certificate.event.title}.pdf'
             )
         else:
@@ -603,44 +922,85 @@ def download_certificate(request, certificate_id):
 class MessageListCreateView(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
+    pagination_class = SentAtCursorPagination
     
     def get_queryset(self):
-        return Message.objects.filter(
+        return Message.objects.select_related('sender', 'recipient').filter(
             Q(sender=self.request.user) | Q(recipient=self.request.user)
         ).order_by('-sent_at')
     
     def perform_create(self, serializer):
         message = serializer.save(sender=self.request.user)
         
-        Notification.objects.create(
-            user=message.recipient,
-            notification_type='new_message',
-            title='New Message',
-            message=f'You have received a message from {message.sender.username}',
-            related_event=message.related_event
-        )
+        enqueue('notifications.send', {
+            'user_ids': [message.recipient_id],
+            'notification_type': 'new_message',
+            'title': 'New Message',
+            'message': f'You have received a message from {message.sender.username}',
+            'related_event_id': message.related_event_id,
+        }, user=self.request.user)
 
 
 class MessageDetailView(generics.RetrieveDestroyAPIView):
-    queryset = Message.objects.all()
+    queryset = Message.objects.select_related('sender', 'recipient')
     serializer_class = MessageSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrRecipient]
+    query_budget = 8
     
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         if instance.recipient == request.user and not instance.is_read:
+            mark_read(Message.objects.filter(pk=instance.pk))
             instance.is_read = True
-            instance.save()
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
 
+class InboxView(generics.ListAPIView):
+    # conversations by last activity; ?pagination=cursor for keyset pages
+    serializer_class = ConversationSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+    pagination_class = LastActivityCursorPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        return inbox(self.request.user).order_by('-last_activity', '-id')
+
+
+class ConversationMessagesView(generics.ListAPIView):
+    serializer_class = MessageSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
+    pagination_class = ThreadPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        conversation_id = self.kwargs.get('conversation_id')
+        if not ConversationParticipant.objects.filter(conversation_id=conversation_id, user=self.request.user).exists():
+            raise NotFound('Conversation not found')
+        return thread_messages(conversation_id)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_conversation_read(request, conversation_id):
+    if not ConversationParticipant.objects.filter(conversation_id=conversation_id, user=request.user).exists():
+        return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    updated = mark_read(Message.objects.filter(conversation_id=conversation_id, recipient=request.user))
+    return Response({'marked_read': updated}, status=status.HTTP_200_OK)
+
+
+
 # Notification Views
 
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
+    pagination_class = CreatedAtCursorPagination
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -651,8 +1011,7 @@ class NotificationListView(generics.ListAPIView):
 def mark_notification_read(request, notification_id):
     try:
         notification = Notification.objects.get(id=notification_id, user=request.user)
-        notification.is_read = True
-        notification.save()
+        mark_read(Notification.objects.filter(pk=notification.pk))
         return Response({'message': 'Notification marked as read'}, status=status.HTTP_200_OK)
     except Notification.DoesNotExist:
         return Response({'error': 'Notification not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -661,70 +1020,104 @@ def mark_notification_read(request, notification_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_all_notifications_read(request):
-    Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+    mark_read(Notification.objects.filter(user=request.user))
     return Response({'message': 'All notifications marked as read'}, status=status.HTTP_200_OK)
 
 
+@query_budget(1)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def unread_counts(request):
+    # Badge polling: a primary-key lookup on UnreadCounter
+    return Response(get_unread_counts(request.user.id), status=status.HTTP_200_OK)
+
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated, IsOrganizer])
+def broadcast_notification(request, event_id):
+    """
+    Queue a notification to every registrant of an event.
+    Body: title, message, notification_type (default program_updated).
+    """
+    try:
+        event = Event.objects.get(id=event_id)
+        if not (request.user == event.organizer or request.user.role == 'super_admin'):
+            raise PermissionDenied('Only the event organizer or super admin can notify registrants')
+
+        notification_type = request.data.get('notification_type', 'program_updated')
+        title = request.data.get('title', '')
+        message = request.data.get('message', '')
+        if notification_type not in dict(Notification.NOTIFICATION_TYPE_CHOICES):
+            return Response({'error': 'Invalid notification_type'}, status=status.HTTP_400_BAD_REQUEST)
+        if not title or not message:
+            return Response({'error': 'title and message are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = enqueue('notifications.broadcast', {
+            'event_id': event.id,
+            'notification_type': notification_type,
+            'title': title,
+            'message': message,
+            'queued_at': timezone.now().isoformat(),
+        }, user=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    except Event.DoesNotExist:
+        return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
+
+
+
+# Job Views
+
+class JobDetailView(generics.RetrieveAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 1
+    
+    def get_queryset(self):
+        if self.request.user.role == 'super_admin':
+            return Job.objects.all()
+        return Job.objects.filter(created_by=self.request.user)
+
+
 
 # Statistics & Dashboard Views
 
+@query_budget(11)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, IsOrganizer])
 def event_statistics(request, event_id):
     try:
-        event = Event.objects.get(id=event_id)
-        submissions = event.submissions.all()
-        registrations = event.registrations.all()
-        
-        stats = {
-            'total_submissions': submissions.count(),
-            'accepted_submissions': submissions.filter(status='accepted').count(),
-            'rejected_submissions': submissions.filter(status='rejected').count(),
-            'pending_submissions': submissions.filter(status='pending').count(),
-            'acceptance_rate': round(submissions.filter(status='accepted').count() / submissions.count() * 100, 2) if submissions.count() > 0 else 0,
-            'total_registrations': registrations.count(),
-            'participants': registrations.filter(registration_type='participant').count(),
-            'speakers': registrations.filter(registration_type='speaker').count(),
-            'invited': registrations.filter(registration_type='invited').count(),
-            'submissions_by_institution': list(submissions.values('author__institution').annotate(count=Count('id')).order_by('-count')[:10]),
-            'submissions_by_country': list(submissions.values('author__country').annotate(count=Count('id')).order_by('-count')),
-            'registrations_by_country': list(registrations.values('user__country').annotate(count=Count('id')).order_by('-count')),
-            'total_sessions': event.sessions.count(),
-            'total_workshops': event.workshops.count(),
-        }
-        
-        return Response(stats, status=status.HTTP_200_OK)
+        stats = get_event_statistics(event_id)
+        return Response(serialize_event_statistics(stats), status=status.HTTP_200_OK)
     except Event.DoesNotExist:
         return Response({'error': 'Event not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def dashboard(request):
-    user = request.user
-    
+def build_upcoming_events():
+    return EventListSerializer(
+        Event.objects.with_counts().filter(start_date__gte=timezone.now().date(), status='open_call').order_by('start_date')[:5],
+        many=True
+    ).data
+
+
+def build_user_dashboard(user):
     data = {
-        'upcoming_events': EventListSerializer(
-            Event.objects.filter(start_date__gte=timezone.now().date(), status='open_call').order_by('start_date')[:5],
-            many=True
-        ).data,
         'my_registrations': RegistrationSerializer(
-            Registration.objects.filter(user=user).order_by('-registered_at')[:5],
+            Registration.objects.select_related('user', 'event').filter(user=user).order_by('-registered_at')[:5],
             many=True
         ).data,
-        'unread_notifications': user.notifications.filter(is_read=False).count(),
-        'unread_messages': user.received_messages.filter(is_read=False).count(),
+        **get_unread_counts(user.id),
     }
     
     if user.role == 'organizer':
         data['my_events'] = EventListSerializer(
-            Event.objects.filter(organizer=user).order_by('-created_at')[:5],
+            Event.objects.with_counts().filter(organizer=user).order_by('-created_at')[:5],
             many=True
         ).data
     
     if user.role == 'author':
         data['my_submissions'] = SubmissionSerializer(
-            Submission.objects.filter(author=user).order_by('-submitted_at')[:5],
+            Submission.objects.for_listing().filter(author=user).order_by('-submitted_at')[:5],
             many=True
         ).data
     
@@ -735,4 +1128,32 @@ def dashboard(request):
             reviews__reviewer=user
         ).count()
     
-    return Response(data, status=status.HTTP_200_OK)
\ No newline at end of file
+    return data
+
+
+@query_budget(11)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    user = request.user
+    
+    # Cached entries are invalidated by api/signals.py
+    data = {'upcoming_events': get_or_build(SHARED_KEY, build_upcoming_events)}
+    data.update(get_or_build(user_key(user.id, user.role), lambda: build_user_dashboard(user)))
+    
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@query_budget(0)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsSuperAdmin])
+def dashboard_cache_stats(request):
+    return Response(cache_stats(), status=status.HTTP_200_OK)
+
+
+@query_budget(0)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsSuperAdmin])
+def admission_queue_stats(request):
+    # queue depth, rejections and wait times of the registration/submission write queues
+    return Response(admission_stats(), status=status.HTTP_200_OK)
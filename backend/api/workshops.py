@@ -0,0 +1,115 @@
+"""
+Workshop seat allocation.
+
+``Workshop.seats_taken`` is the seat counter. A seat is claimed with a
+conditional ``UPDATE ... SET seats_taken = seats_taken + 1 WHERE
+seats_taken < max_participants``: the database applies it atomically, so
+concurrent registrations can never oversell, and no ``COUNT(*)`` of
+participants is needed. When the update matches nothing, the user joins the
+waitlist, which is served in insertion order.
+
+A cancellation hands the freed seat directly to the first person on the
+waitlist (the counter does not move) or, when nobody is waiting, gives it
+back. Raising ``max_participants`` fills the new seats from the waitlist.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import Workshop, WorkshopWaitlist
+from .tasks import enqueue
+
+Participant = Workshop.participants.through
+
+
+def claim_seat(workshop_id):
+    return Workshop.objects.filter(pk=workshop_id, seats_taken__lt=F('max_participants')).update(
+        seats_taken=F('seats_taken') + 1
+    ) == 1
+
+
+def waitlist_position(workshop_id, user_id):
+    entry = WorkshopWaitlist.objects.filter(workshop_id=workshop_id, user_id=user_id).values_list('id', flat=True).first()
+    if entry is None:
+        return None
+    return WorkshopWaitlist.objects.filter(workshop_id=workshop_id, id__lte=entry).count()
+
+
+def register_participant(workshop, user):
+    """
+    Give ``user`` a seat or a waitlist place; returns ``(state, position)``
+    with state ``'registered'``, ``'waitlisted'`` or ``'already_registered'``.
+    """
+    if Participant.objects.filter(workshop_id=workshop.id, user_id=user.id).exists():
+        return 'already_registered', None
+    try:
+        with transaction.atomic():
+            if claim_seat(workshop.id):
+                # the unique (workshop, user) pair rolls the seat back on a concurrent duplicate
+                Participant.objects.create(workshop_id=workshop.id, user_id=user.id)
+                WorkshopWaitlist.objects.filter(workshop_id=workshop.id, user_id=user.id).delete()
+                return 'registered', None
+            WorkshopWaitlist.objects.get_or_create(workshop_id=workshop.id, user_id=user.id)
+    except IntegrityError:
+        return 'already_registered', None
+    return 'waitlisted', waitlist_position(workshop.id, user.id)
+
+
+def promote_next(workshop):
+    """Move the first waitlisted user into a seat that is already counted; returns the user id or None."""
+    while True:
+        entry = (
+            WorkshopWaitlist.objects.filter(workshop_id=workshop.id)
+            .select_for_update(skip_locked=True).order_by('id').first()
+        )
+        if entry is None:
+            return None
+        entry.delete()
+        try:
+            with transaction.atomic():
+                Participant.objects.create(workshop_id=workshop.id, user_id=entry.user_id)
+        except IntegrityError:
+            # the entry's user got a seat meanwhile (a concurrent register): the entry is stale
+            continue
+        return entry.user_id
+
+
+def notify_promoted(workshop, user_ids):
+    if user_ids:
+        transaction.on_commit(lambda: enqueue('notifications.send', {
+            'user_ids': list(user_ids),
+            'notification_type': 'program_updated',
+            'title': 'Workshop seat available',
+            'message': f'A seat opened up in "{workshop.title}" and you are now registered.',
+            'related_event_id': workshop.event_id,
+        }))
+
+
+def cancel_participation(workshop, user):
+    """
+    Release ``user``'s seat or waitlist place; returns ``'cancelled'``,
+    ``'left_waitlist'`` or ``None`` when the user held neither.
+    """
+    with transaction.atomic():
+        if not Participant.objects.filter(workshop_id=workshop.id, user_id=user.id).delete()[0]:
+            left = WorkshopWaitlist.objects.filter(workshop_id=workshop.id, user_id=user.id).delete()[0]
+            return 'left_waitlist' if left else None
+        promoted = promote_next(workshop)
+        if promoted is None:
+            Workshop.objects.filter(pk=workshop.id, seats_taken__gt=0).update(seats_taken=F('seats_taken') - 1)
+        else:
+            notify_promoted(workshop, [promoted])
+    return 'cancelled'
+
+
+def fill_from_waitlist(workshop):
+    """Hand any free seats (e.g. after max_participants was raised) to the waitlist; returns promoted user ids."""
+    promoted = []
+    with transaction.atomic():
+        while WorkshopWaitlist.objects.filter(workshop_id=workshop.id).exists() and claim_seat(workshop.id):
+            user_id = promote_next(workshop)
+            if user_id is None:
+                Workshop.objects.filter(pk=workshop.id).update(seats_taken=F('seats_taken') - 1)
+                break
+            promoted.append(user_id)
+        notify_promoted(workshop, promoted)
+    return promoted
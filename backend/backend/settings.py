@@ -75,6 +75,39 @@ DATABASES = {
      }
  }
 """
+# Caches
+# The dashboard cache is per process with local memory; point it at a shared
+# backend when running several worker processes, e.g.
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+#   'LOCATION': BASE_DIR / 'cache' / 'dashboard',
+# or 'django.core.cache.backends.db.DatabaseCache' with LOCATION 'dashboard_cache'
+# (run `python manage.py createcachetable` first).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'dashboard': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'dashboard',
+    },
+}
+
+DASHBOARD_CACHE_ALIAS = 'dashboard'
+DASHBOARD_CACHE_TIMEOUT = 300  # seconds, safety net on top of write invalidation
+
+# Background jobs (api/tasks.py, `python manage.py run_workers`)
+JOB_VISIBILITY_TIMEOUT = 300  # seconds a claimed job stays locked before another worker may retry it
+JOB_RETRY_BASE_DELAY = 5  # seconds, doubled on every failed attempt
+
+# Live session Q&A (api/live.py, served over ASGI)
+LIVE_CHANNEL_LAYER = 'api.live.InProcessChannelLayer'  # swap for a broker-backed layer with several processes
+LIVE_LIKE_FLUSH_INTERVAL = 1.0  # seconds, likes are sent as one delta per interval
+LIVE_KEEPALIVE = 15  # seconds between SSE keepalive comments
+
+# Admission control for registration/submission bursts (api/admission.py, per process)
+ADMISSION_QUEUE_LIMIT = 200  # pending writes per event before answering 429
+ADMISSION_BATCH_SIZE = 50  # registrations written per transaction
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -96,6 +129,13 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Protected media (api/media.py): after the permission check Django can hand the
+# file to the front server. 'nginx' sends X-Accel-Redirect to an `internal`
+# location aliased to MEDIA_ROOT, 'apache' sends X-Sendfile (mod_xsendfile).
+# None streams the file from Python.
+PROTECTED_MEDIA_SERVER = None
+PROTECTED_MEDIA_INTERNAL_URL = '/protected-media/'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom User Model